@@ -0,0 +1 @@
+# Offline micro-benchmarks: python -m benchmarks.<name>
@@ -0,0 +1,166 @@
+"""Co-play index: update cost, lookup latency and memory vs a dict-of-dicts graph.
+
+    python -m benchmarks.autoplay_bench [plays] [tracks] [guilds]
+
+Synthetic listening: tracks belong to genres with Zipf popularity, each
+guild mostly sticks to one genre. "on-genre" is the share of picks from
+the genre the guild was just playing. The "capped" run holds a quarter of
+the catalogue, so it compacts over and over while guilds are mid-window.
+"compaction" fills a capped index to the brink inside an event loop, then
+times every record() call and the loop's longest stall until the off-loop
+rebuild has been swapped in, next to what the rebuild costs inline.
+"""
+import asyncio
+import collections
+import functools
+import gc
+import itertools
+import random
+import sys
+import time
+import tracemalloc
+from bot.autoplay import CoPlayIndex
+from bot.track import Track
+
+GENRES = 40
+
+
+class DictIndex:
+    """Baseline: key -> {key: weight}, same window and weighting, no caps."""
+    def __init__(self, window: int = 4):
+        self.graph = collections.defaultdict(dict)
+        self.recent = collections.defaultdict(lambda: collections.deque(maxlen=window))
+
+    def record(self, guild_id, track):
+        recent = self.recent[guild_id]
+        for distance, other in enumerate(reversed(recent), 1):
+            if other != track.key:
+                self.graph[track.key][other] = self.graph[track.key].get(other, 0) + 1 / distance
+                self.graph[other][track.key] = self.graph[other].get(track.key, 0) + 1 / distance
+        recent.append(track.key)
+
+
+def make_plays(plays: int, tracks: int, guilds: int):
+    rng = random.Random(7)
+    catalog = [Track(f"Song {i}", f"https://www.youtube.com/watch?v=vid{i:07d}", None, 200) for i in range(tracks)]
+    by_genre = [catalog[g::GENRES] for g in range(GENRES)]
+    zipf = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(by_genre[0]))))
+    taste = {guild: rng.randrange(GENRES) for guild in range(guilds)}
+    events = []
+    for _ in range(plays):
+        guild = rng.randrange(guilds)
+        genre = taste[guild] if rng.random() < 0.85 else rng.randrange(GENRES)
+        pool = by_genre[genre]
+        events.append((guild, rng.choices(pool, cum_weights=zipf[:len(pool)])[0], genre))
+    return events
+
+
+def build(index_cls, events):
+    """Times a build, then measures a second one under tracemalloc (which slows it down)."""
+    index = index_cls()
+    start = time.perf_counter()
+    for guild, track, _ in events:
+        index.record(guild, track)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    sized = index_cls()
+    for guild, track, _ in events:
+        sized.record(guild, track)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return index, elapsed, size
+
+
+def compaction(events, max_tracks: int):
+    """Per-record() latency and loop stalls across one off-loop compaction."""
+    index = CoPlayIndex(max_tracks=max_tracks)
+    plays = iter(events)
+    for guild, track, _ in plays:
+        if len(index) == max_tracks - 1 and track.key not in index._node:
+            pending = (guild, track) # This play triggers the compaction
+            break
+        index.record(guild, track)
+    else:
+        return None
+
+    start = time.perf_counter()
+    index._compacted() # What record() used to block the loop for
+    inline = time.perf_counter() - start
+
+    async def run():
+        stalls = []
+        async def heartbeat():
+            last = time.perf_counter()
+            while True:
+                await asyncio.sleep(0.001)
+                now = time.perf_counter()
+                stalls.append(now - last)
+                last = now
+        beat = asyncio.create_task(heartbeat())
+        await asyncio.sleep(0.01)
+        calls = []
+        started = time.perf_counter()
+        for guild, track in itertools.chain([pending], ((g, t) for g, t, _ in plays)):
+            begin = time.perf_counter()
+            index.record(guild, track)
+            calls.append(time.perf_counter() - begin)
+            await asyncio.sleep(0) # Plays arrive between other loop work
+            if index.compactions and index._compacting is None:
+                break
+        wall = time.perf_counter() - started
+        beat.cancel()
+        return calls, max(stalls), wall
+
+    # The prebuilt graph and event list would otherwise make full collections stall the loop
+    # about as long with or without a compaction; only what the compaction allocates is measured
+    gc.collect()
+    gc.freeze()
+    try:
+        calls, stall, wall = asyncio.run(run())
+    finally:
+        gc.unfreeze()
+    return len(index), index.edges(), inline, calls, stall, wall
+
+
+def main():
+    plays = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    tracks = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    guilds = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    events = make_plays(plays, tracks, guilds)
+
+    capped = functools.partial(CoPlayIndex, max_tracks=max(tracks // 4, 20))
+    for name, cls in (("capped", capped), ("dict-of-dicts", DictIndex), ("CoPlayIndex", CoPlayIndex)):
+        index, elapsed, size = build(cls, events)
+        nodes = len(index.graph) if cls is DictIndex else len(index)
+        links = sum(map(len, index.graph.values())) if cls is DictIndex else index.edges()
+        compactions = f" | {index.compactions} compactions" if cls is capped else ""
+        print(f"{name:>14}: {elapsed / plays * 1e6:5.2f} us/update | {size / 1024 / 1024:6.1f} MiB "
+              f"| {nodes} tracks, {links} links, {size / max(links, 1):5.1f} B/link{compactions}")
+
+    result = compaction(events, max(tracks // 4, 20))
+    if result:
+        nodes, links, inline, calls, stall, wall = result
+        print(f"    compaction: inline {inline * 1000:.0f} ms | off-loop {wall * 1000:.0f} ms over {len(calls)} "
+              f"record() calls, slowest {max(calls) * 1e6:.0f} us | loop stall max {stall * 1000:.1f} ms "
+              f"| {nodes} tracks, {links} links after")
+
+    genre_of = {track.key: genre for _, track, genre in events}
+    last_genre = {guild: genre for guild, _, genre in events}
+    latencies, on_genre, misses = [], 0, 0
+    for guild in range(guilds):
+        start = time.perf_counter()
+        pick = index.suggest(guild)
+        latencies.append(time.perf_counter() - start)
+        if pick is None:
+            misses += 1
+        elif genre_of[pick.key] == last_genre.get(guild):
+            on_genre += 1
+    latencies.sort()
+    pct = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1e6
+    print(f"suggest: p50 {pct(0.5):.0f} us | p99 {pct(0.99):.0f} us | on-genre {on_genre / max(guilds - misses, 1):.0%} "
+          f"| no pick {misses}/{guilds}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Per-frame CPU per guild for the in-process EQ / bass boost stage.
+
+    python -m benchmarks.eq_bench [frames]
+
+Feeds 20 ms PCM frames (what FFmpegPCMAudio yields) through each source's
+read(), the call discord.py's audio thread makes 50 times a second per guild.
+"""
+import sys
+import time
+import numpy as np
+import discord
+from bot.audio_effects import EffectsSource, filter_bank
+
+FRAME_SECONDS = 0.02
+
+
+class NoiseSource(discord.AudioSource):
+    def __init__(self, frames: int):
+        rng = np.random.default_rng(0)
+        self.frames = [(rng.standard_normal(1920) * 4000).astype(np.int16).tobytes() for _ in range(frames)]
+        self.i = 0
+
+    def read(self) -> bytes:
+        self.i += 1
+        return self.frames[self.i % len(self.frames)]
+
+
+def per_frame(source, frames: int) -> float:
+    start = time.perf_counter()
+    for _ in range(frames):
+        source.read()
+    return (time.perf_counter() - start) / frames
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    original = NoiseSource(64)
+    cases = (
+        ("volume only (baseline)", discord.PCMVolumeTransformer(original, volume=0.8)),
+        ("flat EQ (bypass)", EffectsSource(original, volume=0.8)),
+        ("EQ 3 bands", EffectsSource(original, volume=0.8, eq=(4, -3, 5))),
+        ("EQ + bass boost", EffectsSource(original, volume=0.8, eq=(4, -3, 5), bass_boost=True)),
+    )
+    for name, source in cases:
+        cost = per_frame(source, frames)
+        print(f"{name:>24}: {cost * 1e6:7.1f} us/frame | {cost / FRAME_SECONDS * 100:5.2f}% of a core per guild | "
+              f"~{int(FRAME_SECONDS / cost)} guilds per core")
+
+    live = cases[-1][1]
+    filter_bank.cache_clear()
+    start = time.perf_counter()
+    for gain in range(-10, 11):
+        live.set_effects((gain, 0, 0), True)
+    build = (time.perf_counter() - start) / 21
+    start = time.perf_counter()
+    for gain in range(-10, 11):
+        live.set_effects((gain, 0, 0), True)
+    cached = (time.perf_counter() - start) / 21
+    print(f"parameter change: {build * 1e3:.2f} ms new bank, {cached * 1e6:.1f} us cached; heard from the next frame")
+
+
+if __name__ == "__main__":
+    main()
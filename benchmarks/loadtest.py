@@ -0,0 +1,680 @@
+"""End-to-end load test: the real bot, bridge and player, with Discord and YouTube stubbed out.
+
+    python -m benchmarks.loadtest [--guilds 20] [--clients 60] [--seconds 30] [--json report.json]
+    python -m benchmarks.loadtest --json new.json --compare old.json
+
+What runs for real: AkazaBot's play_next/play_song/prefetch/autoplay paths,
+QueueManager, the journal, MusicPlayer with FFmpeg sources, and the
+DashboardBridge served by uvicorn on a local port. What is stubbed:
+  - voice: FakeVoiceClient plays each source on a thread at real-time pace,
+    like discord.py's AudioPlayer (Opus-encoding too when libopus is loadable),
+    and records how late every 20 ms frame was;
+  - yt-dlp: StubExtractor answers after a configurable latency, with at most
+    EXTRACTION_WORKERS lookups in flight like the real pool;
+  - YouTube: tracks are sine tones rendered by FFmpeg, served over local HTTP
+    so FFmpeg takes the same network input path as googlevideo URLs.
+Dashboard clients connect over WebSocket and send a mix of commands, timing
+each one until its ack. Needs ffmpeg on PATH.
+"""
+import argparse
+import asyncio
+import collections
+import contextlib
+import functools
+import http.server
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import aiohttp
+import discord
+import psutil
+import uvicorn
+
+FRAME_SECONDS = 0.02
+LATE_AFTER = FRAME_SECONDS # A frame sent a whole frame past its slot is an audible hiccup
+COMMAND_MIX = (("volume", 40), ("equalizer", 20), ("bass_boost", 5), ("seek", 10), ("play", 15), ("skip", 5),
+               ("move_queue", 5))
+# (report path, True when lower is better) compared by --compare
+KEY_METRICS = (
+    ("commands.per_s", False), ("commands.ack_ms.p50", True), ("commands.ack_ms.p99", True),
+    ("dashboard.frames_per_s", False), ("dashboard.fanout.latency_p99_ms", True),
+    ("audio.late_ratio", True), ("audio.read_ms.p99", True), ("audio.first_frame_ms.p95", True),
+    ("transition_gaps.p95_ms", True), ("loop_lag_ms.p99", True),
+    ("resources.cpu_percent", True), ("resources.ffmpeg_cpu_percent", True), ("resources.rss_mb_max", True),
+)
+
+
+def percentiles(values, scale: float = 1000.0) -> dict:
+    values = sorted(values)
+    if not values:
+        return {"samples": 0}
+    pick = lambda q: round(values[min(len(values) - 1, int(len(values) * q))] * scale, 2)
+    return {"samples": len(values), "p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99),
+            "max": round(values[-1] * scale, 2)}
+
+
+# --- Audio fixtures ---
+def render_tones(directory: str, count: int, seconds: int):
+    """Opus-in-Ogg sine tones, the codec/container YouTube's audio streams mostly use."""
+    for i in range(count):
+        subprocess.run([
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", f"sine=frequency={220 + 55 * i}:duration={seconds}",
+            "-ac", "2", "-c:a", "libopus", "-b:a", "128k", os.path.join(directory, f"tone{i}.ogg")
+        ], check=True)
+
+
+class RangeHandler(http.server.SimpleHTTPRequestHandler):
+    """Static files with byte ranges, which FFmpeg needs for -ss and the Ogg duration probe (googlevideo has them)."""
+    def do_GET(self):
+        try:
+            f = open(self.translate_path(self.path), "rb")
+        except OSError:
+            return self.send_error(404)
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            start, end = 0, size - 1
+            match = re.fullmatch(r"bytes=(\d*)-(\d*)", self.headers.get("Range", ""))
+            if match and (match[1] or match[2]):
+                if match[1]:
+                    start = int(match[1])
+                    end = min(int(match[2]), size - 1) if match[2] else size - 1
+                else:
+                    start = max(size - int(match[2]), 0) # Suffix range: the last N bytes
+                if start >= size:
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.end_headers()
+                    return
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            else:
+                self.send_response(200)
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("Content-Type", "audio/ogg")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.end_headers()
+
+            f.seek(start)
+            remaining = end - start + 1
+            try:
+                while remaining > 0:
+                    chunk = f.read(min(65536, remaining))
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+                    remaining -= len(chunk)
+            except (BrokenPipeError, ConnectionResetError):
+                pass # FFmpeg killed mid-read by a skip, seek or teardown
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_directory(directory: str):
+    """Threaded static HTTP server on a free local port; returns (server, base URL)."""
+    handler = functools.partial(RangeHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# --- yt-dlp stand-in ---
+class StubExtractor:
+    """Drop-in for ExtractionPool: a catalog of fake videos mapped onto the tone files."""
+    def __init__(self, base_url: str, tracks: int, tones: int, seconds: int, latency: float, workers: int):
+        self.base_url = base_url
+        self.tracks = tracks
+        self.tones = tones
+        self.seconds = seconds
+        self.latency = latency
+        self._gate = asyncio.Semaphore(workers)
+        self.completed = 0
+        self.playlists = 0
+        self.latencies = []
+
+    @staticmethod
+    def query(i: int) -> str:
+        return f"loadtest song {i}"
+
+    def _index(self, query: str) -> int:
+        tail = query.rsplit("=", 1)[-1] if query.startswith("http") else query.rsplit(" ", 1)[-1]
+        digits = "".join(c for c in tail if c.isdigit())
+        return int(digits or 0) % self.tracks
+
+    def info(self, i: int, with_stream: bool = True) -> dict:
+        return {
+            'title': f"Load Test Song {i}",
+            'url': f"{self.base_url}/tone{i % self.tones}.ogg?v={i}&expire={int(time.time()) + 6 * 3600}" if with_stream else None,
+            'thumbnail': None,
+            'duration': self.seconds,
+            'original_url': f"https://www.youtube.com/watch?v=lt{i:06d}"
+        }
+
+    async def _wait(self):
+        started = time.perf_counter()
+        async with self._gate:
+            await asyncio.sleep(random.uniform(0.5, 1.5) * self.latency)
+        self.latencies.append(time.perf_counter() - started)
+
+    async def extract(self, query: str):
+        await self._wait()
+        self.completed += 1
+        return self.info(self._index(query))
+
+    @staticmethod
+    def playlist_query(i: int) -> str:
+        return f"https://www.youtube.com/playlist?list=ltpl{i:04d}"
+
+    async def extract_playlist(self, url: str, batch_size: int = 50):
+        """Autoplay mixes and imported playlists: random catalog entries, first one alone.
+
+        Like a worker that is still paging, the playlist keeps its worker slot
+        until the last page has been consumed, so a consumer that extracts
+        between batches competes with it for the remaining workers.
+        """
+        started = time.perf_counter()
+        async with self._gate:
+            self.latencies.append(time.perf_counter() - started)
+            self.playlists += 1
+            entries = [self.info(random.randrange(self.tracks), with_stream=False) for _ in range(25)]
+            pages = [entries[:1]] + [entries[i:i + batch_size] for i in range(1, len(entries), batch_size)]
+            for page in pages:
+                await asyncio.sleep(random.uniform(0.5, 1.5) * self.latency)
+                yield page
+
+    def stats(self):
+        return {"completed": self.completed, "playlists": self.playlists, "latency_ms": percentiles(self.latencies)}
+
+    async def close(self):
+        pass
+
+
+# --- Discord stand-ins ---
+class AudioStats:
+    """Shared by every fake player thread (list appends are atomic under the GIL)."""
+    def __init__(self):
+        self.frames = 0
+        self.late = 0
+        self.read_times = collections.deque(maxlen=200000)
+        self.first_frame = []
+        self.tracks = 0
+
+
+class FakeMember:
+    bot = False
+
+
+class FakeChannel:
+    def __init__(self, guild, channel_id: int, stats: AudioStats):
+        self.guild = guild
+        self.id = channel_id
+        self.name = f"voice-{channel_id}"
+        self.members = [FakeMember()]
+        self.stats = stats
+
+    async def connect(self, timeout: float = None, reconnect: bool = True):
+        await asyncio.sleep(0.05) # Voice handshake
+        self.guild.voice_client = FakeVoiceClient(self, self.stats)
+        return self.guild.voice_client
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int, stats: AudioStats):
+        self.id = guild_id
+        self.name = f"Load Guild {guild_id}"
+        self.voice_client = None
+        self.voice_channels = [FakeChannel(self, guild_id * 10, stats)]
+
+    def get_channel(self, channel_id: int):
+        return next((c for c in self.voice_channels if c.id == channel_id), None)
+
+
+class _Player(threading.Thread):
+    """discord.py's AudioPlayer loop, minus the UDP socket, timing every frame."""
+    def __init__(self, source, after, stats: AudioStats, **encoder_options):
+        super().__init__(daemon=True)
+        self.source = source
+        self.after = after
+        self.stats = stats
+        self.encoder = discord.opus.Encoder(**encoder_options) if discord.opus.is_loaded() else None
+        self._end = threading.Event()
+        self._resumed = threading.Event()
+        self._resumed.set()
+        self._lock = threading.Lock()
+        self._restart = True
+
+    def run(self):
+        error = None
+        try:
+            self._play()
+        except Exception as e:
+            error = e
+        finally:
+            if self.after is not None:
+                self.after(error)
+            self.source.cleanup()
+
+    def _play(self):
+        requested = time.perf_counter()
+        start, loops = requested, 0
+        while not self._end.is_set():
+            if not self._resumed.is_set():
+                self._resumed.wait()
+                continue
+            with self._lock:
+                source, restart = self.source, self._restart
+                self._restart = False
+            if restart:
+                requested = time.perf_counter()
+            began = time.perf_counter()
+            data = source.read()
+            if not data:
+                break
+            if self.encoder is not None and not source.is_opus():
+                self.encoder.encode(data, self.encoder.SAMPLES_PER_FRAME)
+
+            now = time.perf_counter()
+            if restart:
+                # First frame of a new source: time to audio, then the schedule starts from here
+                self.stats.first_frame.append(now - requested)
+                start, loops = now, 0
+            else:
+                self.stats.read_times.append(now - began)
+                if now - (start + FRAME_SECONDS * loops) > LATE_AFTER:
+                    self.stats.late += 1
+            self.stats.frames += 1
+            loops += 1
+            time.sleep(max(0.0, start + FRAME_SECONDS * loops - time.perf_counter()))
+
+    def set_source(self, source):
+        with self._lock:
+            self.source = source
+            self._restart = True
+
+    def stop(self):
+        self._end.set()
+        self._resumed.set()
+
+    def pause(self):
+        self._resumed.clear()
+
+    def resume(self):
+        with self._lock:
+            self._restart = True # Like AudioPlayer.resume(): the schedule restarts
+        self._resumed.set()
+
+
+class FakeVoiceClient:
+    """The slice of discord.VoiceClient the bot uses, playing into a _Player thread."""
+    def __init__(self, channel: FakeChannel, stats: AudioStats):
+        self.channel = channel
+        self.guild = channel.guild
+        self.stats = stats
+        self._connected = True
+        self._player = None
+
+    def is_connected(self):
+        return self._connected
+
+    def play(self, source, *, after=None, bitrate: int = 128, bandwidth: str = "full"):
+        if self._player is not None and self._player.is_alive() and not self._player._end.is_set():
+            raise discord.ClientException("Already playing audio.")
+        self.stats.tracks += 1
+        self._player = _Player(source, after, self.stats, bitrate=bitrate, bandwidth=bandwidth)
+        self._player.start()
+
+    @property
+    def encoder(self):
+        return self._player.encoder if self._player else None
+
+    def is_playing(self):
+        return self._player is not None and self._player.is_alive() and self._player._resumed.is_set() \
+            and not self._player._end.is_set()
+
+    def is_paused(self):
+        return self._player is not None and not self._player._end.is_set() and not self._player._resumed.is_set()
+
+    def pause(self):
+        if self._player:
+            self._player.pause()
+
+    def resume(self):
+        if self._player:
+            self._player.resume()
+
+    def stop(self):
+        if self._player:
+            self._player.stop()
+            self._player = None
+
+    @property
+    def source(self):
+        return self._player.source if self._player else None
+
+    @source.setter
+    def source(self, value):
+        if self._player:
+            self._player.set_source(value)
+
+    async def disconnect(self, force: bool = False):
+        self.stop()
+        self._connected = False
+        self.guild.voice_client = None
+
+    async def move_to(self, channel):
+        self.channel = channel
+
+
+# --- Load generators ---
+class ClientStats:
+    def __init__(self):
+        self.sent = collections.Counter()
+        self.failed = collections.Counter()
+        self.acks = []
+        self.frames = 0
+        self.bytes = 0
+        self.disconnects = 0
+
+
+async def dashboard_client(session, url: str, stop_at: float, interval: float, extractor: StubExtractor,
+                           stats: ClientStats):
+    actions, weights = zip(*COMMAND_MIX)
+    sent = {} # seq -> sent at
+    try:
+        async with session.ws_connect(url) as ws:
+            async def receive():
+                async for msg in ws:
+                    if msg.type != aiohttp.WSMsgType.TEXT:
+                        continue
+                    stats.frames += 1
+                    stats.bytes += len(msg.data)
+                    frame = json.loads(msg.data)
+                    if frame.get("type") == "ack" and frame.get("seq") in sent:
+                        stats.acks.append(time.perf_counter() - sent.pop(frame["seq"]))
+                        if not frame.get("ok"):
+                            stats.failed[frame.get("status")] += 1
+
+            receiver = asyncio.create_task(receive())
+            seq = 0
+            await asyncio.sleep(random.uniform(0, interval)) # Don't start in lockstep
+            while time.perf_counter() < stop_at and not ws.closed:
+                action = random.choices(actions, weights)[0]
+                params = {
+                    "volume": lambda: {"level": random.randint(20, 150)},
+                    "equalizer": lambda: {"band": random.choice(("low", "mid", "high")), "gain": random.randint(-10, 10)},
+                    "bass_boost": lambda: {"enabled": random.random() < 0.5},
+                    "seek": lambda: {"position": random.uniform(0, extractor.seconds - 2)},
+                    "play": lambda: {"query": extractor.playlist_query(random.randrange(100)) if random.random() < 0.1
+                                     else extractor.query(random.randrange(extractor.tracks))},
+                    "skip": lambda: {},
+                    "move_queue": lambda: {"id": seq % 7, "to": 0},
+                }[action]()
+                seq += 1
+                sent[seq] = time.perf_counter()
+                stats.sent[action] += 1
+                await ws.send_str(json.dumps({"type": "command", "seq": seq, "action": action, "params": params}))
+                await asyncio.sleep(random.expovariate(1 / interval))
+            await asyncio.sleep(1) # Let the last acks arrive
+            receiver.cancel()
+    except aiohttp.ClientError:
+        stats.disconnects += 1
+
+
+def sample_resources(stop: threading.Event, samples: dict):
+    """Bot process CPU/RSS and FFmpeg children CPU, once a second (on a thread: /proc reads block)."""
+    process = psutil.Process()
+    process.cpu_percent(None)
+    children = {}
+    while not stop.wait(1):
+        live = {}
+        for child in process.children(recursive=True):
+            try:
+                if child.name().startswith("ffmpeg"):
+                    live[child.pid] = children.get(child.pid) or child
+            except psutil.Error:
+                pass
+        ffmpeg = 0.0
+        for pid, child in live.items():
+            try:
+                usage = child.cpu_percent(None)
+            except psutil.Error:
+                continue
+            if pid in children: # A new process's first reading only primes its counter
+                ffmpeg += usage
+        children = live
+        samples["cpu"].append(process.cpu_percent(None))
+        samples["ffmpeg_cpu"].append(ffmpeg)
+        samples["ffmpeg_processes"].append(len(live))
+        samples["rss"].append(process.memory_info().rss)
+
+
+async def sample_loop_lag(stop: asyncio.Event, lags: list, interval: float = 0.05):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+# --- Harness ---
+def load_bot(workdir: str):
+    """Imports the bot module with its journal and audio cache moved into `workdir`."""
+    from bot import bot as bot_module
+    from bot.journal import PlaybackJournal
+    from bot.audio_cache import AudioCache
+    engine = bot_module.bot
+    engine.journal = engine.queue_mgr.journal = PlaybackJournal(engine, os.path.join(workdir, "journal.db"))
+    engine.player.audio_cache = AudioCache(directory=os.path.join(workdir, "audio_cache"))
+    return bot_module
+
+
+async def run(args, workdir: str) -> dict:
+    render_tones(workdir, args.tones, args.track_seconds)
+    http_server, base_url = serve_directory(workdir)
+    bot_module = load_bot(workdir)
+    engine = bot_module.bot
+    await engine.player.audio_cache.load() # What setup_hook does
+    audio = AudioStats()
+    extractor = StubExtractor(base_url, args.tracks, args.tones, args.track_seconds, args.extract_ms / 1000,
+                              args.extract_workers)
+    guilds = {1000 + i: FakeGuild(1000 + i, audio) for i in range(args.guilds)}
+
+    # Just enough of a logged-in discord.Client
+    engine.loop = asyncio.get_running_loop()
+    engine.is_ready = lambda: True
+    engine.get_guild = guilds.get
+    engine.player.extractor = extractor
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(engine.bridge.app, host="127.0.0.1", port=port, log_level="error"))
+    background = [asyncio.create_task(coro) for coro in (
+        server.serve(), engine.broadcast_loop(), engine.prefetch_loop(), engine.journal.run(), engine.watchdog.run(),
+        engine.governor.run()
+    )]
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    stop = asyncio.Event()
+    resources = {"cpu": [], "ffmpeg_cpu": [], "ffmpeg_processes": [], "rss": []}
+    lags = []
+    sampling = threading.Event()
+    samplers = [asyncio.create_task(asyncio.to_thread(sample_resources, sampling, resources)),
+                asyncio.create_task(sample_loop_lag(stop, lags))]
+
+    # Every guild starts with a few songs queued, the way a /play burst would; every fourth with a playlist,
+    # which starts playback while the import is still paging
+    for i, guild_id in enumerate(guilds):
+        if i % 4 == 0:
+            await engine.bridge.control(guild_id, "play", {"query": extractor.playlist_query(i)})
+            continue
+        for _ in range(3):
+            await engine.bridge.control(guild_id, "play", {"query": extractor.query(random.randrange(args.tracks))})
+
+    clients = ClientStats()
+    started = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        gids = list(guilds)
+        await asyncio.gather(*(
+            dashboard_client(session, f"ws://127.0.0.1:{port}/ws/{gids[i % len(gids)]}", started + args.seconds,
+                             args.command_interval, extractor, clients)
+            for i in range(args.clients)
+        ))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    sampling.set()
+    await asyncio.gather(*samplers)
+
+    report = {
+        "config": vars(args),
+        "duration_s": round(elapsed, 1),
+        "commands": {
+            "sent": sum(clients.sent.values()),
+            "acked": len(clients.acks),
+            "per_s": round(len(clients.acks) / elapsed, 1),
+            "by_action": dict(clients.sent),
+            "failed_by_status": {str(k): v for k, v in clients.failed.items()},
+            "ack_ms": percentiles(clients.acks),
+            "queue": engine.bridge.command_stats.as_dict(),
+        },
+        "dashboard": {
+            "clients": args.clients,
+            "disconnects": clients.disconnects,
+            "frames": clients.frames,
+            "frames_per_s": round(clients.frames / elapsed, 1),
+            "bytes_per_s": round(clients.bytes / elapsed),
+            "fanout": engine.bridge.fanout_stats.as_dict(),
+        },
+        "audio": {
+            "opus_encode": discord.opus.is_loaded(),
+            "tracks_started": audio.tracks,
+            "frames": audio.frames,
+            "frames_per_s": round(audio.frames / elapsed, 1),
+            "late_frames": audio.late,
+            "late_ratio": round(audio.late / audio.frames, 5) if audio.frames else None,
+            "read_ms": percentiles(audio.read_times),
+            "first_frame_ms": percentiles(audio.first_frame),
+        },
+        "transition_gaps": engine.transition_gap_stats(),
+        "extraction": extractor.stats(),
+        "track_cache": engine.player.cache.stats(),
+        "autoplay": engine.autoplay.as_dict(),
+        "loop_lag_ms": percentiles(lags),
+        "loop_stalls": engine.watchdog.report(5),
+        "governor": engine.governor.as_dict(),
+        "resources": {
+            "cpu_percent": round(sum(resources["cpu"]) / max(len(resources["cpu"]), 1), 1),
+            "ffmpeg_cpu_percent": round(sum(resources["ffmpeg_cpu"]) / max(len(resources["ffmpeg_cpu"]), 1), 1),
+            "ffmpeg_processes_max": max(resources["ffmpeg_processes"], default=0),
+            "rss_mb_max": round(max(resources["rss"], default=0) / 1024 / 1024, 1),
+            "rss_mb_end": round(resources["rss"][-1] / 1024 / 1024, 1) if resources["rss"] else None,
+        },
+    }
+
+    # Tear down: leave voice on purpose (no reconnects), then stop the servers
+    for guild in guilds.values():
+        await engine.voice_mgr.disconnect_from(guild)
+    await asyncio.sleep(0.5) # Players finish their `after` callbacks
+    server.should_exit = True
+    for task in background[1:]:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    await engine.journal.flush()
+    await engine.journal.close()
+    await engine.bridge.http_client.aclose()
+    http_server.shutdown()
+    return report
+
+
+def lookup(report: dict, path: str):
+    for part in path.split("."):
+        if not isinstance(report, dict) or part not in report:
+            return None
+        report = report[part]
+    return report
+
+
+def print_summary(report: dict):
+    c, d, a, r = report["commands"], report["dashboard"], report["audio"], report["resources"]
+    print(f"commands : {c['acked']}/{c['sent']} acked, {c['per_s']}/s | ack p50 {c['ack_ms'].get('p50')} ms "
+          f"p99 {c['ack_ms'].get('p99')} ms | coalesced {c['queue']['coalesced']}")
+    print(f"dashboard: {d['clients']} sockets, {d['frames_per_s']} frames/s, {d['bytes_per_s'] // 1024} KiB/s | "
+          f"fanout p99 {d['fanout']['latency_p99_ms']} ms | dropped {d['fanout']['clients_dropped']}")
+    print(f"audio    : {a['tracks_started']} tracks, {a['frames_per_s']} frames/s | late {a['late_frames']} "
+          f"({(a['late_ratio'] or 0):.3%}) | read p99 {a['read_ms'].get('p99')} ms | "
+          f"first frame p95 {a['first_frame_ms'].get('p95')} ms | opus encode {'on' if a['opus_encode'] else 'off'}")
+    g = report["transition_gaps"]
+    print(f"gaps     : {g['samples']} transitions, avg {g.get('avg_ms')} ms, p95 {g.get('p95_ms')} ms | "
+          f"loop lag p99 {report['loop_lag_ms'].get('p99')} ms")
+    stalls = report["loop_stalls"]
+    hot = ", ".join(f"{h['where']} ({h['blocked_ms']} ms)" for h in stalls["hotspots"][:3]) or "none"
+    print(f"stalls   : {stalls['stalls']} over {stalls['threshold_ms']:.0f} ms | hotspots: {hot}")
+    gov = report["governor"]
+    steps = " ".join(f"{c['from']}→{c['to']}" for c in gov["changes"]) or "none"
+    print(f"governor : tier {gov['tier']['name']}, admissions {'open' if gov['accepting'] else 'closed'} | "
+          f"held {gov['held']}, rejected {gov['rejected']}, respawned {gov['respawned']} | changes: {steps}")
+    print(f"process  : {r['cpu_percent']}% CPU, RSS max {r['rss_mb_max']} MiB | "
+          f"FFmpeg {r['ffmpeg_cpu_percent']}% CPU over up to {r['ffmpeg_processes_max']} processes")
+
+
+def print_comparison(old: dict, new: dict):
+    print("\nvs baseline:")
+    for path, lower_is_better in KEY_METRICS:
+        before, after = lookup(old, path), lookup(new, path)
+        if not isinstance(before, (int, float)) or not isinstance(after, (int, float)):
+            continue
+        change = (after - before) / before if before else 0.0
+        worse = change > 0.1 if lower_is_better else change < -0.1
+        print(f"  {path:<34} {before:>10} -> {after:<10} {change:+7.1%}{'  <-- regression' if worse else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--guilds", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=60, help="dashboard WebSocket clients, spread over the guilds")
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--command-interval", type=float, default=1.0, help="mean seconds between a client's commands")
+    parser.add_argument("--extract-ms", type=float, default=300, help="mean yt-dlp stand-in latency")
+    parser.add_argument("--extract-workers", type=int, default=2)
+    parser.add_argument("--tracks", type=int, default=500, help="distinct fake videos")
+    parser.add_argument("--tones", type=int, default=4, help="distinct audio files behind them")
+    parser.add_argument("--track-seconds", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="write the report here ('-' for stdout)")
+    parser.add_argument("--compare", help="baseline report to diff against")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        report = asyncio.run(run(args, workdir))
+
+    # With the JSON on stdout the human-readable part moves to stderr
+    with contextlib.redirect_stdout(sys.stderr if args.json == "-" else sys.stdout):
+        print_summary(report)
+        if args.compare:
+            with open(args.compare) as f:
+                print_comparison(json.load(f), report)
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
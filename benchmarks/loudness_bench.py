@@ -0,0 +1,63 @@
+"""FFmpeg CPU per stream: live single-pass loudnorm vs precomputed loudness (static gain / linear).
+
+    python -m benchmarks.loudness_bench [seconds]
+
+Renders a synthetic track, then runs the same decode -> filter -> 48 kHz PCM
+pipeline FFmpegPCMAudio uses with each filter, measuring the child's CPU time.
+"% core" is the CPU one stream costs while playing in real time.
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from bot.config import FFMPEG_AUDIO_FILTER
+from bot.loudness import parse_loudnorm_report, loudness_filter
+
+
+def child_cpu(cmd) -> (float, str):
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True)
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    return cpu, result.stderr.decode(errors="replace")
+
+
+def playback(path, audio_filter):
+    return ["ffmpeg", "-hide_banner", "-nostats", "-i", path, "-vn", "-af", audio_filter,
+            "-f", "s16le", "-ar", "48000", "-ac", "2", "-"]
+
+
+def main():
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "track.ogg")
+        # Tone + pink noise with a slow level swing, encoded like a YouTube opus stream
+        subprocess.run([
+            "ffmpeg", "-hide_banner", "-loglevel", "error",
+            "-f", "lavfi", "-i", f"sine=frequency=220:duration={seconds}",
+            "-f", "lavfi", "-i", f"anoisesrc=color=pink:amplitude=0.3:duration={seconds}",
+            "-filter_complex", "amix=inputs=2,volume='0.5+0.4*sin(t/5)':eval=frame,aformat=channel_layouts=stereo",
+            "-c:a", "libopus", "-b:a", "128k", path
+        ], check=True)
+
+        cpu, stderr = child_cpu(["ffmpeg", "-hide_banner", "-nostats", "-i", path, "-vn",
+                                 "-af", f"{FFMPEG_AUDIO_FILTER}:print_format=json", "-f", "null", "-"])
+        measured = parse_loudnorm_report(stderr)
+        print(f"analysis (once per track): {cpu:.2f}s CPU for {seconds}s of audio -> {measured}")
+
+        baseline = None
+        for name, audio_filter in (
+            ("live loudnorm", FFMPEG_AUDIO_FILTER),
+            ("linear loudnorm", loudness_filter(measured, "linear")),
+            ("static gain", loudness_filter(measured, "gain")),
+            ("no filter", "anull"),
+        ):
+            cpu, _ = child_cpu(playback(path, audio_filter))
+            baseline = baseline or cpu
+            print(f"{name:>16}: {cpu:6.2f}s CPU | {cpu / seconds * 100:5.2f}% core per stream | "
+                  f"{cpu / baseline * 100:5.1f}% of live loudnorm")
+
+
+if __name__ == "__main__":
+    main()
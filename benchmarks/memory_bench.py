@@ -0,0 +1,101 @@
+"""Bytes per guild and per queued track: dict songs + plain GuildState vs Track + slotted GuildState.
+
+    python -m benchmarks.memory_bench [guilds] [tracks_per_guild]
+"""
+import collections
+import sys
+import time
+import tracemalloc
+from bot.bot import GuildState
+from bot.queue_manager import QueueManager
+from bot.track import Track
+
+# Typical signed googlevideo stream URL length
+STREAM_URL = "https://rr3---sn-example.googlevideo.com/videoplayback?expire=1700000000&" + "x" * 1000
+REQUESTERS = ["Akaza", "Rengoku", "Tanjiro", "Dashboard"]
+
+
+class LegacyGuildState:
+    """The original GuildState layout, kept as the baseline."""
+    def __init__(self, guild_id):
+        self.guild_id = guild_id
+        self.current_song = None
+        self.is_paused = False
+        self.volume = 1.0
+        self.bass_boost = False
+        self.auto_play = True
+        self.eq_gains = {"low": 0, "mid": 0, "high": 0}
+        self.start_time = 0
+        self.pause_start_time = 0
+        self.total_paused_duration = 0
+        self.voice_client = None
+        self.queue_list = []
+        self.history = []
+        self.listeners_count = 0
+
+
+def legacy_song(i):
+    # Strings are rebuilt per song, as they arrive from yt-dlp
+    return {
+        'title': "".join(["Popular Song #", str(i % 50)]),
+        'url': STREAM_URL + str(i),
+        'thumbnail': "".join(["https://i.ytimg.com/vi/", str(i % 50), "/hqdefault.jpg"]),
+        'duration': 215,
+        'requester': "".join(REQUESTERS[i % 4]),
+        'original_url': f"https://www.youtube.com/watch?v={i % 50:011d}"
+    }
+
+
+def compact_song(i):
+    info = legacy_song(i)
+    return Track.from_info(info, requester=info['requester'])
+
+
+def build_legacy(guilds, tracks):
+    queues = collections.defaultdict(list)
+    states = {}
+    for g in range(guilds):
+        states[g] = LegacyGuildState(g)
+        for i in range(tracks):
+            queues[g].append(legacy_song(g * tracks + i))
+        states[g].queue_list = queues[g]
+    return states, queues
+
+
+def build_compact(guilds, tracks):
+    mgr = QueueManager(max_queue=tracks)
+    states = {}
+    for g in range(guilds):
+        states[g] = GuildState(g)
+        for i in range(tracks):
+            mgr.add_to_queue(g, compact_song(g * tracks + i))
+    return states, mgr
+
+
+def measure(builder, guilds, tracks):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    started = time.perf_counter()
+    kept = builder(guilds, tracks)
+    elapsed = time.perf_counter() - started
+    total = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, "filename"))
+    tracemalloc.stop()
+    del kept
+    return total, elapsed
+
+
+def main():
+    guilds = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    tracks = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    empty_legacy, _ = measure(build_legacy, guilds, 0)
+    empty_compact, _ = measure(build_compact, guilds, 0)
+    for name, builder, empty in (("legacy", build_legacy, empty_legacy), ("compact", build_compact, empty_compact)):
+        total, elapsed = measure(builder, guilds, tracks)
+        print(f"{name:>8}: {guilds} guilds x {tracks} tracks = {total / 1024 / 1024:7.2f} MiB | "
+              f"{empty / guilds:6.0f} B/guild | {(total - empty) / (guilds * tracks):6.0f} B/track | "
+              f"built in {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
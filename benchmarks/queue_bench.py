@@ -0,0 +1,68 @@
+"""Compares the deque-backed QueueManager against the original list-based one.
+
+    python -m benchmarks.queue_bench
+"""
+import collections
+import timeit
+from bot.queue_manager import QueueManager
+from bot.track import Track
+
+
+class ListQueueManager:
+    """The original list-backed implementation, kept here as the baseline."""
+    def __init__(self):
+        self._queues = collections.defaultdict(list)
+        self._history = collections.defaultdict(list)
+
+    def get_queue(self, guild_id):
+        return self._queues[guild_id]
+
+    def add_to_queue(self, guild_id, item):
+        if len(self._queues[guild_id]) < 500:
+            self._queues[guild_id].append(item)
+            return True
+        return False
+
+    def get_next(self, guild_id):
+        if self._queues[guild_id]:
+            song = self._queues[guild_id].pop(0)
+            self.add_to_history(guild_id, song)
+            return song
+        return None
+
+    def add_to_history(self, guild_id, item):
+        self._history[guild_id].insert(0, item)
+        if len(self._history[guild_id]) > 100:
+            self._history[guild_id].pop()
+
+
+def fill(mgr, guilds=50, depth=500):
+    for g in range(guilds):
+        for i in range(depth):
+            mgr.add_to_queue(g, Track(f"Song {i}", f"https://www.youtube.com/watch?v=vid{i:07d}", None, 200))
+    return mgr
+
+
+def drain(mgr, guilds=50):
+    """Drains every guild's queue through history (the play_next hot path)."""
+    for g in range(guilds):
+        while mgr.get_next(g):
+            pass
+
+
+def cold_reads(mgr, guilds=10000):
+    for g in range(guilds):
+        mgr.get_queue(g)
+
+
+def main():
+    for name, cls in (("list", ListQueueManager), ("deque", QueueManager)):
+        t_drain = min(timeit.repeat("drain(mgr)", setup="mgr = fill(cls())", number=1, repeat=5, globals={**globals(), "cls": cls}))
+        mgr = cls()
+        t_reads = min(timeit.repeat(lambda: cold_reads(mgr), number=1, repeat=5))
+        print(f"{name:>6}: drain 50x500 = {t_drain * 1000:7.2f} ms | "
+              f"10k cold reads = {t_reads * 1000:6.2f} ms | entries after reads = {len(mgr._queues)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Time to restore queues/settings/now-playing of many guilds from the journal.
+
+    python -m benchmarks.restore_bench [guilds] [tracks_per_guild]
+
+Measures replay from the raw log (crash before compaction) and from compacted
+snapshots, plus applying the records to a fresh bot.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from bot.bot import AkazaBot
+from bot.journal import PlaybackJournal
+from bot.track import Track
+
+
+def fresh_bot(path):
+    bot = AkazaBot()
+    bot.journal = bot.queue_mgr.journal = PlaybackJournal(bot, path)
+    return bot
+
+
+async def populate(bot, guilds, tracks):
+    for g in range(guilds):
+        state = bot.get_guild_state(g)
+        state.volume = 0.8
+        for i in range(tracks):
+            bot.queue_mgr.add_to_queue(g, Track(
+                f"Song {i}", f"https://www.youtube.com/watch?v={g:05d}{i:06d}",
+                f"https://i.ytimg.com/vi/{i}/hqdefault.jpg", 200 + i, "Akaza"
+            ))
+        state.current_song = bot.queue_mgr.get_next(g)
+        state.start_time = time.time() - 42
+        bot.journal.mark(g)
+    await bot.journal.flush()
+
+
+async def restore(path):
+    bot = fresh_bot(path)
+    started = time.perf_counter()
+    records = bot.journal.load()
+    loaded = time.perf_counter()
+    bot.apply_journal(records)
+    done = time.perf_counter()
+    await bot.journal.close()
+    return len(records), loaded - started, done - loaded, bot
+
+
+async def main():
+    guilds = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    tracks = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "journal.db")
+        writer = fresh_bot(path)
+        started = time.perf_counter()
+        await populate(writer, guilds, tracks)
+        print(f"write  : {writer.journal.stats['entries']} entries in {(time.perf_counter() - started) * 1000:.0f} ms "
+              f"(last batch fsync {writer.journal.stats['last_flush_ms']} ms)")
+
+        count, load, apply, restored = await restore(path)
+        print(f"log    : {count} guilds | replay {load * 1000:.0f} ms | apply {apply * 1000:.0f} ms")
+
+        await writer.journal.compact()
+        await writer.journal.close()
+        count, load, apply, restored = await restore(path)
+        print(f"compact: {count} guilds | load {load * 1000:.0f} ms | apply {apply * 1000:.0f} ms")
+
+        queued = restored.queue_mgr.total_items()
+        print(f"restored {queued} queued/history tracks, {len(restored._resume)} sessions pending resume")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
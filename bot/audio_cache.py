@@ -0,0 +1,187 @@
+import asyncio
+import collections
+import hashlib
+import os
+from .config import (
+    BITRATE, FFMPEG_BEFORE_OPTIONS, AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_BYTES, AUDIO_CACHE_MIN_PLAYS,
+    AUDIO_CACHE_MAX_TRACK_SECONDS, AUDIO_CACHE_WORKERS, AUDIO_CACHE_MAX_PENDING, AUDIO_CACHE_TIMEOUT,
+    AUDIO_CACHE_TRACKED_MAX
+)
+
+_SUFFIX = ".ogg"
+
+
+class AudioCache:
+    """Size-capped local Ogg/Opus copies of the tracks a bot keeps replaying.
+
+    `record_play` counts plays per track key; once a track reaches
+    AUDIO_CACHE_MIN_PLAYS it is transcoded once, in the background, at
+    BITRATE. `lookup` then hands FFmpeg the local file: no network I/O and
+    no reconnects, and seeks are instant. Files are written to a temp name
+    and renamed into place, so a crash never leaves a truncated entry.
+    Least recently played files are deleted past AUDIO_CACHE_MAX_BYTES
+    (FFmpeg processes still reading one keep their open handle). No new
+    transcodes start while `paused` (set by the load governor). Nothing
+    touches the disk until `load()` runs at startup.
+    """
+    def __init__(self, directory: str = AUDIO_CACHE_DIR, max_bytes: int = AUDIO_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._files = collections.OrderedDict() # file name -> bytes, least recently played first
+        self._bytes = 0
+        self._plays = collections.OrderedDict() # track key -> play count
+        self._pending = set()
+        self._gate = asyncio.Semaphore(AUDIO_CACHE_WORKERS)
+        self.paused = False
+        self.stats = {"hits": 0, "misses": 0, "transcoded": 0, "failed": 0, "evicted": 0, "skipped": 0, "deferred": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def _name(key: str) -> str:
+        return hashlib.sha1(key.encode()).hexdigest() + _SUFFIX
+
+    async def load(self):
+        """Indexes files left by previous runs (off the loop); call once at startup."""
+        if not self.enabled:
+            return
+        files = await asyncio.to_thread(self._scan)
+        files.update(self._files) # Anything transcoded by this run while the scan ran
+        self._files = files
+        self._bytes = sum(files.values())
+        self._evict()
+        if files:
+            print(f"[AUDIO CACHE] 💽 {len(self._files)} tracks on disk ({self._bytes // (1024 * 1024)} MiB)")
+
+    def _scan(self):
+        """{file name: size}, oldest play first; drops unfinished writes. Blocking."""
+        os.makedirs(self.directory, exist_ok=True)
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(_SUFFIX):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name, stat.st_size))
+                elif entry.name.endswith(".tmp"):
+                    os.unlink(entry.path)
+        return collections.OrderedDict((name, size) for _, name, size in sorted(entries))
+
+    def lookup(self, key: str):
+        """Local path for a track, or None. The hit ratio is counted by `record_play`."""
+        if not self.enabled or not key:
+            return None
+        name = self._name(key)
+        if name not in self._files:
+            return None
+        path = os.path.join(self.directory, name)
+        try:
+            os.utime(path) # mtime is the LRU order across restarts
+        except OSError:
+            self._forget(name) # Deleted behind our back
+            return None
+        self._files.move_to_end(name)
+        return path
+
+    def record_play(self, key: str, url: str, duration):
+        """Counts a track start (a hit if `url` is the local copy); schedules the transcode once it has earned one."""
+        if not self.enabled or not key or not url:
+            return
+        if not url.startswith("http"):
+            self.stats["hits"] += 1
+            return
+        self.stats["misses"] += 1
+        plays = self._plays[key] = self._plays.get(key, 0) + 1
+        self._plays.move_to_end(key)
+        while len(self._plays) > AUDIO_CACHE_TRACKED_MAX:
+            self._plays.popitem(last=False)
+
+        if plays < AUDIO_CACHE_MIN_PLAYS or key in self._pending or self._name(key) in self._files:
+            return
+        if not duration or duration > AUDIO_CACHE_MAX_TRACK_SECONDS or len(self._pending) >= AUDIO_CACHE_MAX_PENDING:
+            self.stats["skipped"] += 1 # Live streams, long mixes, or a full backlog
+            return
+        if self.paused:
+            self.stats["deferred"] += 1 # Transcoded on a later play
+            return
+        self._pending.add(key)
+        asyncio.create_task(self._run(key, url))
+
+    async def _run(self, key: str, url: str):
+        name = self._name(key)
+        try:
+            async with self._gate:
+                size = await self.transcode(url, os.path.join(self.directory, name))
+        except Exception as e:
+            print(f"[AUDIO CACHE] ⚠️ Transcode failed: {type(e).__name__}: {e}")
+            size = None
+        finally:
+            self._pending.discard(key)
+
+        if not size:
+            self.stats["failed"] += 1
+            return
+        self.stats["transcoded"] += 1
+        self._forget(name)
+        self._files[name] = size
+        self._bytes += size
+        self._evict()
+
+    async def transcode(self, url: str, path: str):
+        """Writes `url` as Ogg/Opus to `path` atomically; returns its size, or None."""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        proc = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin", "-y",
+            *FFMPEG_BEFORE_OPTIONS.split(), "-i", url,
+            "-vn", "-sn", "-dn", "-c:a", "libopus", "-b:a", str(BITRATE), "-f", "ogg", tmp,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            _, stderr = await asyncio.wait_for(proc.communicate(), timeout=AUDIO_CACHE_TIMEOUT)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            stderr = b"timed out"
+        try:
+            if proc.returncode != 0:
+                print(f"[AUDIO CACHE] ⚠️ FFmpeg exited {proc.returncode}: {stderr.decode(errors='replace')[-200:]}")
+                return None
+            return await asyncio.to_thread(_commit, tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+    def _forget(self, name: str):
+        size = self._files.pop(name, None)
+        if size is not None:
+            self._bytes -= size
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._files:
+            name, size = self._files.popitem(last=False)
+            self._bytes -= size
+            self.stats["evicted"] += 1
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def as_dict(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return dict(
+            self.stats, enabled=self.enabled, files=len(self._files), bytes=self._bytes, max_bytes=self.max_bytes,
+            pending=len(self._pending), hit_ratio=round(self.stats["hits"] / lookups, 3) if lookups else None
+        )
+
+
+def _commit(tmp: str, path: str) -> int:
+    """fsync + rename: the entry appears complete or not at all."""
+    size = os.path.getsize(tmp)
+    if size == 0:
+        return None
+    with open(tmp, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return size
@@ -0,0 +1,212 @@
+import functools
+import math
+import time
+import discord
+import numpy as np
+from .config import EQ_BANDS_HZ, EQ_MID_Q, EQ_MAX_GAIN_DB, BASS_BOOST_HZ, BASS_BOOST_DB, EQ_BLOCK_SAMPLES
+
+SAMPLE_RATE = 48000 # What FFmpegPCMAudio hands discord.py: s16le, stereo...
+FRAME_SAMPLES = 960 # ...in 20 ms frames
+SHELF_Q = 1 / math.sqrt(2) # Shelf slope S=1
+LATE_FRAME_GAP = 0.04 # A read this long after the previous one came a whole frame late
+PAUSE_GAP = 1.0 # Longer gaps are pauses and source swaps, not missed deadlines
+
+
+class FrameStats:
+    """Frames read by every EffectsSource, and how many missed their 20 ms slot.
+
+    Bumped from the audio threads without a lock: a lost increment only
+    nudges a ratio the load governor reads every few seconds.
+    """
+    __slots__ = ("frames", "late")
+
+    def __init__(self):
+        self.frames = 0
+        self.late = 0
+
+
+frame_stats = FrameStats()
+
+
+def biquad(kind: str, freq: float, gain_db: float, q: float = SHELF_Q, rate: int = SAMPLE_RATE):
+    """RBJ cookbook coefficients (b0, b1, b2, a1, a2), normalised so a0 = 1."""
+    a = 10 ** (gain_db / 40)
+    w0 = 2 * math.pi * freq / rate
+    cos_w0, alpha = math.cos(w0), math.sin(w0) / (2 * q)
+    if kind == "peaking":
+        b = (1 + alpha * a, -2 * cos_w0, 1 - alpha * a)
+        den = (1 + alpha / a, -2 * cos_w0, 1 - alpha / a)
+    else:
+        sign = 1 if kind == "lowshelf" else -1 # highshelf mirrors the cos(w0) terms
+        k = 2 * math.sqrt(a) * alpha
+        b = (a * ((a + 1) - sign * (a - 1) * cos_w0 + k),
+             sign * 2 * a * ((a - 1) - sign * (a + 1) * cos_w0),
+             a * ((a + 1) - sign * (a - 1) * cos_w0 - k))
+        den = ((a + 1) + sign * (a - 1) * cos_w0 + k,
+               -sign * 2 * ((a - 1) + sign * (a + 1) * cos_w0),
+               (a + 1) + sign * (a - 1) * cos_w0 - k)
+    return b[0] / den[0], b[1] / den[0], b[2] / den[0], den[1] / den[0], den[2] / den[0]
+
+
+def effect_sections(eq, bass_boost: bool):
+    """The biquads a guild's settings call for: one per EQ band, plus the bass shelf."""
+    sections = []
+    for (kind, freq), gain in zip(EQ_BANDS_HZ, eq):
+        gain = min(max(float(gain), -EQ_MAX_GAIN_DB), EQ_MAX_GAIN_DB)
+        sections.append(biquad(kind, freq, gain, EQ_MID_Q if kind == "peaking" else SHELF_Q))
+    sections.append(biquad("lowshelf", BASS_BOOST_HZ, BASS_BOOST_DB if bass_boost else 0))
+    return sections
+
+
+def ffmpeg_filters(eq, bass_boost: bool) -> list:
+    """The same curves as FFmpeg filters, for the opus pipeline (applied on respawn)."""
+    filters = []
+    for (kind, freq), gain in zip(EQ_BANDS_HZ, eq):
+        gain = min(max(float(gain), -EQ_MAX_GAIN_DB), EQ_MAX_GAIN_DB)
+        if gain:
+            width = f":t=q:w={EQ_MID_Q}" if kind == "peaking" else ""
+            filters.append(f"{'equalizer' if kind == 'peaking' else kind}=f={freq}{width}:g={gain:g}")
+    if bass_boost:
+        filters.append(f"lowshelf=f={BASS_BOOST_HZ}:g={BASS_BOOST_DB}")
+    return filters
+
+
+class FilterBank:
+    """A biquad cascade compiled for block processing.
+
+    The cascade is one linear system with a small state (two values per
+    biquad), so a block of L samples is exactly
+        y = T @ x + O @ s        s' = Ad @ s + Bd @ x
+    with T the L x L impulse-response Toeplitz matrix. Unrolling the state
+    recursion over a frame's blocks turns the whole frame, both channels at
+    once, into a handful of matmuls with no per-sample or per-block Python loop.
+    """
+    __slots__ = ("block", "order", "T", "O", "Ad", "Bd", "_hand_offs")
+
+    def __init__(self, sections, block: int = EQ_BLOCK_SAMPLES):
+        # State-space form of the cascade (transposed direct form II per section)
+        n = 2 * len(sections)
+        A, B, C, D = np.zeros((n, n)), np.zeros(n), np.zeros(n), 1.0
+        for i, (b0, b1, b2, a1, a2) in enumerate(sections):
+            s = slice(2 * i, 2 * i + 2)
+            b_i = np.array([b1 - a1 * b0, b2 - a2 * b0])
+            A[s, :2 * i] = np.outer(b_i, C[:2 * i]) # Fed by the previous sections' output
+            A[s, s] = [[-a1, 1], [-a2, 0]]
+            B[s] = b_i * D
+            C *= b0
+            C[2 * i] += 1
+            D *= b0
+
+        h, O, Bd = np.empty(block), np.empty((block, n)), np.empty((n, block))
+        h[0], x, row = D, B, C
+        for k in range(block):
+            O[k] = row
+            Bd[:, block - 1 - k] = x
+            if k + 1 < block:
+                h[k + 1] = C @ x
+            row, x = row @ A, A @ x
+        lag = np.arange(block)[:, None] - np.arange(block)[None, :]
+        self.block, self.order = block, n
+        self.T = np.where(lag >= 0, h[np.clip(lag, 0, None)], 0.0)
+        self.O, self.Bd = O, Bd
+        self.Ad = np.linalg.matrix_power(A, block)
+        self._hand_offs = {} # blocks per frame -> matrices
+        self._hand_off(-(-FRAME_SAMPLES // block)) # Built here so the audio thread never has to
+
+    def _hand_off(self, blocks: int):
+        """Matrices giving the state entering each block (and leaving the last) in one step."""
+        cached = self._hand_offs.get(blocks)
+        if cached is None:
+            n = self.order
+            powers = [np.eye(n)]
+            for _ in range(blocks):
+                powers.append(self.Ad @ powers[-1])
+            drive = np.zeros(((blocks + 1) * n, blocks * n))
+            for k in range(1, blocks + 1):
+                for j in range(k):
+                    drive[k * n:(k + 1) * n, j * n:(j + 1) * n] = powers[k - 1 - j]
+            cached = self._hand_offs[blocks] = (drive, np.vstack(powers))
+        return cached
+
+    def process(self, samples: np.ndarray, state: np.ndarray) -> np.ndarray:
+        """Filters (n, channels) float samples; `state` (order, channels) is updated in place."""
+        count, channels = samples.shape
+        blocks = -(-count // self.block)
+        if blocks * self.block != count: # Short final frame
+            samples = np.concatenate([samples, np.zeros((blocks * self.block - count, channels))])
+        x = samples.reshape(blocks, self.block, channels)
+
+        drive, powers = self._hand_off(blocks)
+        states = drive @ (self.Bd @ x).reshape(-1, channels) + powers @ state
+        states = states.reshape(blocks + 1, self.order, channels)
+        state[:] = states[-1]
+        y = self.T @ x
+        y += self.O @ states[:-1]
+        return y.reshape(-1, channels)[:count]
+
+
+@functools.lru_cache(maxsize=256)
+def filter_bank(eq: tuple, bass_boost: bool):
+    """Shared, read-only bank for a settings combination; None when it would be a no-op."""
+    if not bass_boost and not any(eq):
+        return None
+    return FilterBank(effect_sections(eq, bass_boost))
+
+
+class EffectsSource(discord.PCMVolumeTransformer):
+    """PCMVolumeTransformer that also runs the guild's EQ and bass boost on every frame.
+
+    `set_effects` swaps the filter bank between two frames, so dashboard
+    changes are heard within 20 ms and FFmpeg keeps running. Filter state
+    carries over the swap instead of restarting from silence. Flat settings
+    skip NumPy entirely. Every read is timed into `frame_stats`. Encoder
+    retunes requested with `retune` are applied here too, on the player
+    thread that also encodes, since the Opus encoder isn't thread-safe.
+    """
+    def __init__(self, original, volume: float = 1.0, eq=(), bass_boost: bool = False):
+        super().__init__(original, volume=volume)
+        self._bank = None
+        self._state = None
+        self._last_read = 0.0
+        self._retune = self._retuned = None # (encoder, kbps, bandwidth): requested / last applied
+        self.set_effects(eq, bass_boost)
+
+    def set_effects(self, eq, bass_boost: bool):
+        self._bank = filter_bank(tuple(eq), bool(bass_boost))
+
+    def retune(self, encoder, kbps: int, bandwidth: str):
+        """Asks the player thread to set the encoder's bitrate/bandwidth before its next frame."""
+        self._retune = (encoder, kbps, bandwidth) # One reference swap; read() compares, never clears
+
+    def retune_like(self, other: "EffectsSource"):
+        if other._retune is not other._retuned:
+            self._retune = other._retune
+
+    def read(self) -> bytes:
+        retune = self._retune
+        if retune is not self._retuned:
+            encoder, kbps, bandwidth = retune
+            encoder.set_bitrate(kbps)
+            encoder.set_bandwidth(bandwidth)
+            self._retuned = retune
+        now = time.perf_counter()
+        gap, self._last_read = now - self._last_read, now
+        frame_stats.frames += 1
+        if LATE_FRAME_GAP < gap < PAUSE_GAP:
+            frame_stats.late += 1
+
+        bank = self._bank
+        if bank is None:
+            self._state = None
+            return super().read()
+
+        frame = self.original.read()
+        if not frame:
+            return frame
+        samples = np.frombuffer(frame, dtype=np.int16).reshape(-1, 2).astype(np.float64)
+        if self._state is None:
+            self._state = np.zeros((bank.order, 2))
+        out = bank.process(samples, self._state)
+        out *= min(self.volume, 2.0)
+        np.clip(out, -32768, 32767, out=out)
+        return out.astype(np.int16).tobytes()
@@ -0,0 +1,271 @@
+import array
+import asyncio
+import collections
+import contextlib
+import heapq
+import random
+from urllib.parse import urlparse, parse_qs
+from .config import (
+    AUTOPLAY_WINDOW, AUTOPLAY_MAX_NEIGHBORS, AUTOPLAY_MAX_TRACKS, AUTOPLAY_CANDIDATES,
+    AUTOPLAY_NO_REPEAT, AUTOPLAY_TRACKED_GUILDS, AUTOPLAY_RELATED_SCAN
+)
+from .track import Track
+
+
+def youtube_id(url: str):
+    """Video id of a YouTube watch/short link, or None."""
+    if not url:
+        return None
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if host.endswith("youtu.be"):
+        return parsed.path.lstrip("/") or None
+    if "youtube.com" in host:
+        return parse_qs(parsed.query).get("v", [None])[0]
+    return None
+
+
+class CoPlayIndex:
+    """Which tracks get played near each other, across every guild.
+
+    Each play is linked to the previous AUTOPLAY_WINDOW plays of the same
+    guild (weight 1/distance, both directions). Tracks are interned to ints;
+    each one's neighbours and weights live in two flat arrays capped at
+    AUTOPLAY_MAX_NEIGHBORS (the weakest edge gives way), so an update is a
+    couple of C-level scans and the whole graph costs a few hundred bytes
+    per track. Past AUTOPLAY_MAX_TRACKS the least recently played tenth is
+    dropped in one compaction pass. It runs in a thread over the frozen graph;
+    plays recorded meanwhile are buffered and applied after the swap, so the
+    event loop never waits for the rebuild.
+    """
+    def __init__(self, window: int = AUTOPLAY_WINDOW, max_neighbors: int = AUTOPLAY_MAX_NEIGHBORS,
+                 max_tracks: int = AUTOPLAY_MAX_TRACKS):
+        self.window = window
+        self.max_neighbors = max_neighbors
+        self.max_tracks = max_tracks
+        self._node = {} # track key -> node id
+        self._tracks = [] # node id -> (title, original_url, thumbnail, duration)
+        self._neighbors = [] # node id -> array('I') of node ids
+        self._weights = [] # node id -> array('f'), parallel to _neighbors
+        self._seen = array.array('Q') # node id -> tick of its last play
+        self._tick = 0
+        self._recent = collections.OrderedDict() # guild_id -> deque of recent node ids
+        self._compacting = None # Task rebuilding the graph off the loop
+        self._backlog = collections.deque() # (guild_id, track) recorded while it runs
+        self.compactions = 0
+
+    def __len__(self):
+        return len(self._tracks)
+
+    def edges(self) -> int:
+        return sum(map(len, self._neighbors))
+
+    def _intern(self, track) -> int:
+        row = (track.title, track.original_url, track.thumbnail, track.duration)
+        node = self._node.get(track.key)
+        if node is None:
+            node = self._node[track.key] = len(self._tracks)
+            self._tracks.append(row)
+            self._neighbors.append(array.array('I'))
+            self._weights.append(array.array('f'))
+            self._seen.append(0)
+        else:
+            self._tracks[node] = row # Thumbnail/duration may have been filled in since
+        self._tick += 1
+        self._seen[node] = self._tick
+        return node
+
+    def _link(self, a: int, b: int, weight: float):
+        neighbors, weights = self._neighbors[a], self._weights[a]
+        try:
+            weights[neighbors.index(b)] += weight
+            return
+        except ValueError:
+            pass
+        if len(neighbors) < self.max_neighbors:
+            neighbors.append(b)
+            weights.append(weight)
+            return
+        weakest = weights.index(min(weights))
+        if weights[weakest] < weight:
+            neighbors[weakest], weights[weakest] = b, weight
+
+    def record(self, guild_id: int, track):
+        """Adds one play to the graph."""
+        if self._compacting is not None:
+            self._backlog.append((guild_id, track)) # The graph is frozen while it's rebuilt
+            return
+        self._add(guild_id, track)
+        if len(self._tracks) >= self.max_tracks:
+            self._start_compaction()
+
+    def _add(self, guild_id: int, track):
+        node = self._intern(track)
+        recent = self._recent.get(guild_id)
+        if recent is None:
+            recent = self._recent[guild_id] = collections.deque(maxlen=self.window)
+            while len(self._recent) > AUTOPLAY_TRACKED_GUILDS:
+                self._recent.popitem(last=False)
+        self._recent.move_to_end(guild_id)
+
+        if recent and recent[-1] == node:
+            return # Replay of the same track
+        for distance, other in enumerate(reversed(recent), 1):
+            if other != node:
+                self._link(node, other, 1.0 / distance)
+                self._link(other, node, 1.0 / distance)
+        recent.append(node)
+
+    def suggest(self, guild_id: int, exclude=(), requester: str = "Autoplay"):
+        """A track that usually follows this guild's recent plays, or None.
+
+        Recent plays vote for their neighbours (newest counts most); one of
+        the top AUTOPLAY_CANDIDATES is drawn by score so sessions don't loop.
+        """
+        recent = self._recent.get(guild_id)
+        if not recent:
+            return None
+        scores = {}
+        decay = 1.0
+        for node in reversed(recent):
+            for neighbor, weight in zip(self._neighbors[node], self._weights[node]):
+                scores[neighbor] = scores.get(neighbor, 0.0) + weight * decay
+            decay *= 0.5
+
+        tracks = self._tracks
+        skip = set(recent)
+        top = heapq.nlargest(
+            AUTOPLAY_CANDIDATES,
+            ((score, node) for node, score in scores.items() if node not in skip and tracks[node][1] not in exclude)
+        )
+        if not top:
+            return None
+        _, node = random.choices(top, weights=[score for score, _ in top])[0]
+        title, original_url, thumbnail, duration = tracks[node]
+        return Track(title, original_url, thumbnail, duration, requester)
+
+    def _start_compaction(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._swap(self._compacted()) # No event loop to protect (benchmarks, tools)
+            return
+        self._compacting = loop.create_task(self._compact())
+
+    async def _compact(self):
+        backlog = self._backlog
+        try:
+            while True:
+                try:
+                    self._swap(await asyncio.to_thread(self._compacted))
+                except Exception as e:
+                    print(f"[AUTOPLAY] ⚠️ Co-play index compaction failed: {type(e).__name__}: {e}")
+                    while backlog:
+                        self._add(*backlog.popleft())
+                    return
+                # Catch up on the plays buffered meanwhile, a slice per loop turn; new ones keep queueing behind
+                while backlog and len(self._tracks) < self.max_tracks:
+                    for _ in range(min(len(backlog), 256)):
+                        if len(self._tracks) >= self.max_tracks:
+                            break
+                        self._add(*backlog.popleft())
+                    await asyncio.sleep(0)
+                if len(self._tracks) < self.max_tracks:
+                    return
+                # Filled up again before the backlog ran out: compact again, still frozen
+        finally:
+            self._compacting = None
+
+    def _compacted(self):
+        """The graph without its least recently played tenth, renumbered. Only reads self."""
+        size = len(self._tracks)
+        seen = self._seen
+        cutoff = sorted(seen)[size // 10] # Ticks are unique, so exactly a tenth falls below
+        keep = [node for node in range(size) if seen[node] >= cutoff]
+        remap = [-1] * size
+        for new, old in enumerate(keep):
+            remap[old] = new
+
+        neighbors, weights = [], []
+        for old in keep:
+            ids = [remap[n] for n in self._neighbors[old]]
+            if -1 in ids:
+                live = [i for i, n in enumerate(ids) if n >= 0]
+                old_weights = self._weights[old]
+                neighbors.append(array.array('I', [ids[i] for i in live]))
+                weights.append(array.array('f', [old_weights[i] for i in live]))
+            else:
+                neighbors.append(array.array('I', ids))
+                weights.append(self._weights[old]) # Unchanged, and the frozen graph is discarded after the swap
+        recent = collections.OrderedDict(
+            (guild_id, collections.deque((remap[n] for n in window if remap[n] >= 0), maxlen=self.window))
+            for guild_id, window in self._recent.items()
+        )
+        return (
+            [self._tracks[old] for old in keep], neighbors, weights,
+            array.array('Q', [self._seen[old] for old in keep]),
+            {key: remap[old] for key, old in self._node.items() if remap[old] >= 0},
+            recent
+        )
+
+    def _swap(self, compacted):
+        self._tracks, self._neighbors, self._weights, self._seen, self._node, self._recent = compacted
+        self.compactions += 1
+
+
+class Autoplay:
+    """Picks what plays when a guild's queue runs dry.
+
+    The co-play index answers first. Only when it has nothing for the guild
+    does it fall back to yt-dlp: the YouTube mix of the current track, read
+    as a flat playlist.
+    """
+    def __init__(self, bot):
+        self.bot = bot
+        self.index = CoPlayIndex()
+        self.stats = {"index_picks": 0, "related_picks": 0, "misses": 0}
+
+    def seed(self, guild_ids):
+        """Builds the index from restored history, oldest plays first."""
+        for guild_id in guild_ids:
+            for track in reversed(self.bot.queue_mgr.get_history(guild_id)):
+                self.index.record(guild_id, track)
+        if len(self.index):
+            print(f"[AUTOPLAY] 🧭 Co-play index seeded: {len(self.index)} tracks, {self.index.edges()} links")
+
+    def recently_played(self, guild_id: int, current=None) -> set:
+        history = self.bot.queue_mgr.get_history(guild_id)
+        keys = {track.original_url for _, track in zip(range(AUTOPLAY_NO_REPEAT), history)}
+        if current is not None:
+            keys.add(current.original_url)
+        return keys
+
+    async def pick(self, guild_id: int, current=None):
+        exclude = self.recently_played(guild_id, current)
+        track = self.index.suggest(guild_id, exclude)
+        if track is not None:
+            self.stats["index_picks"] += 1
+            return track
+
+        track = await self._related(current, exclude)
+        self.stats["related_picks" if track else "misses"] += 1
+        return track
+
+    async def _related(self, current, exclude):
+        video_id = youtube_id(current.original_url) if current else None
+        if not video_id:
+            return None
+        mix = f"https://www.youtube.com/watch?v={video_id}&list=RD{video_id}"
+        scanned = 0
+        async with contextlib.aclosing(self.bot.player.iter_playlist(mix, requester="Autoplay")) as batches:
+            async for batch in batches: # The first batch is the seed video alone, so keep reading
+                for track in batch:
+                    if track.original_url and track.original_url not in exclude:
+                        return track
+                    scanned += 1
+                    if scanned >= AUTOPLAY_RELATED_SCAN:
+                        return None
+        return None
+
+    def as_dict(self):
+        return dict(self.stats, tracks=len(self.index), links=self.index.edges(), compactions=self.index.compactions)
@@ -2,30 +2,72 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 import asyncio
+import collections
+import contextlib
 import time
-from .config import TOKEN, SYNC_INTERVAL
+from .config import (
+    TOKEN, SYNC_INTERVAL, PREFETCH_LEAD, PREFETCH_CHECK_INTERVAL, JOURNAL_RESUME_CONCURRENCY, BRIDGE_MODE
+)
 from .music_player import MusicPlayer
+from .audio_effects import EffectsSource
 from .queue_manager import QueueManager
 from .voice_manager import VoiceManager
 from .dashboard_bridge import DashboardBridge
+from .guild_reaper import GuildReaper
+from .autoplay import Autoplay
+from .loop_watchdog import LoopWatchdog
+from .load_governor import LoadGovernor
+from .journal import PlaybackJournal, unpack_track
+from . import metrics
 
 class GuildState:
-    """Stores the real-time state of a specific guild's music player."""
+    """Stores the real-time state of a specific guild's music player.
+
+    Slotted to keep per-guild overhead small; queue and history live only in
+    QueueManager, and `current_song` is a compact Track without its stream URL.
+    """
+    __slots__ = (
+        'guild_id', 'current_song', 'stream_url', 'is_paused', 'volume', 'bass_boost', 'auto_play', 'eq',
+        'start_time', 'pause_start_time', 'total_paused_duration', 'voice_client', 'listeners_count',
+        'prefetched', 'track_ended_at', 'last_active', 'idle_since', 'resume_at', 'releasing'
+    )
+    EQ_BANDS = ("low", "mid", "high")
+
     def __init__(self, guild_id):
         self.guild_id = guild_id
         self.current_song = None
+        self.stream_url = None # Signed URL (or local cache path) of current_song, needed to respawn FFmpeg
         self.is_paused = False
         self.volume = 1.0
         self.bass_boost = False
         self.auto_play = True
-        self.eq_gains = {"low": 0, "mid": 0, "high": 0}
+        self.eq = [0, 0, 0] # low, mid, high
         self.start_time = 0
         self.pause_start_time = 0
         self.total_paused_duration = 0
         self.voice_client = None
-        self.queue_list = []
-        self.history = []
         self.listeners_count = 0
+        self.prefetched = None # (track, source, source settings, stream_url) warmed up for the next transition
+        self.track_ended_at = 0
+        self.last_active = time.time()
+        self.idle_since = 0
+        self.resume_at = None # (track, position): held at the queue head, picks up where it stopped
+        self.releasing = False # The reaper is disconnecting; it parks current_song itself
+
+    @property
+    def eq_gains(self):
+        return dict(zip(self.EQ_BANDS, self.eq))
+
+    @eq_gains.setter
+    def eq_gains(self, gains: dict):
+        self.eq = [gains.get(band, 0) for band in self.EQ_BANDS]
+
+    def set_position(self, position: float):
+        """Re-anchors elapsed-time accounting at `position` (new track, seek or resume)."""
+        now = time.time()
+        self.start_time = now - position
+        self.total_paused_duration = 0
+        self.pause_start_time = now
 
     def get_elapsed(self):
         if not self.current_song or self.start_time == 0:
@@ -42,22 +84,35 @@ class AkazaBot(commands.Bot):
         super().__init__(command_prefix="!", intents=intents)
         
         # Core Components
+        self.journal = PlaybackJournal(self)
         self.player = MusicPlayer(self)
-        self.queue_mgr = QueueManager()
+        self.queue_mgr = QueueManager(journal=self.journal)
         self.voice_mgr = VoiceManager(self)
         self.bridge = DashboardBridge(self)
+        self.bridge_host = None # Set when BRIDGE_MODE=process
+        self.reaper = GuildReaper(self)
+        self.autoplay = Autoplay(self)
+        self.watchdog = LoopWatchdog()
+        self.governor = LoadGovernor(self)
         
         # State Tracking
         self.guild_states = {} # guild_id -> GuildState
+        self.transition_gaps = collections.deque(maxlen=200) # seconds between tracks
+        self._resume = {} # guild_id -> (channel_id, track, position) to rejoin once ready
 
     def get_guild_state(self, guild_id: int) -> GuildState:
-        if guild_id not in self.guild_states:
-            self.guild_states[guild_id] = GuildState(guild_id)
-        return self.guild_states[guild_id]
+        state = self.guild_states.get(guild_id)
+        if state is None:
+            state = self.guild_states[guild_id] = GuildState(guild_id)
+            self.reaper.thaw(guild_id, state)
+        state.last_active = time.time()
+        return state
 
     async def setup_hook(self):
         """Initializes components and registers Slash Commands."""
         print("[AKAZA] Initializing Systems...")
+        await self.player.audio_cache.load()
+        await self.restore_journal()
         await self.tree.sync()
         print(f"[AKAZA] Unified Engine Operational. Synced Slash Commands.")
         
@@ -65,8 +120,25 @@ class AkazaBot(commands.Bot):
         asyncio.create_task(self.run_bridge())
         # Run periodic state broadcaster
         asyncio.create_task(self.broadcast_loop())
+        # Warm up upcoming tracks before the current one ends
+        asyncio.create_task(self.prefetch_loop())
+        # Loop lag, plus stack samples of whatever blocks the loop
+        asyncio.create_task(self.watchdog.run())
+        # Step audio quality down (then hold new streams) when CPU, memory or frame deadlines run hot
+        asyncio.create_task(self.governor.run())
+        # Release voice, FFmpeg and memory held by idle guilds
+        asyncio.create_task(self.reaper.run())
+        # Persist queue/playback mutations in batches
+        asyncio.create_task(self.journal.run())
 
     async def run_bridge(self):
+        if BRIDGE_MODE == "process":
+            # Web server in its own process; this loop only answers IPC and pushes frames
+            from .bridge_ipc import BridgeHost
+            self.bridge_host = BridgeHost(self.bridge)
+            await self.bridge_host.serve()
+            return
+
         import uvicorn
         from .config import DASHBOARD_PORT
         config = uvicorn.Config(self.bridge.app, host="0.0.0.0", port=DASHBOARD_PORT, log_level="error")
@@ -80,8 +152,243 @@ class AkazaBot(commands.Bot):
                 await self.bridge.broadcast_state(guild_id)
             await asyncio.sleep(SYNC_INTERVAL)
 
+    async def close(self):
+        try:
+            await self.journal.flush()
+        except Exception as e:
+            print(f"[JOURNAL] ❌ Final flush failed: {e}")
+        await self.journal.close()
+        if self.bridge_host:
+            await self.bridge_host.close()
+        await self.player.close()
+        await super().close()
+
+    async def restore_journal(self):
+        """Rebuilds queues and settings from the journal; voice resumes once the gateway is ready."""
+        started = time.perf_counter()
+        try:
+            records = await asyncio.to_thread(self.journal.load)
+        except Exception as e:
+            print(f"[JOURNAL] ❌ Restore failed: {type(e).__name__}: {e}")
+            return
+        self.apply_journal(records)
+        self.autoplay.seed(records)
+        if records:
+            print(f"[JOURNAL] ♻️ Restored {len(records)} guilds ({len(self._resume)} to resume) "
+                  f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    def apply_journal(self, records):
+        for guild_id, record in records.items():
+            state = self.get_guild_state(guild_id)
+            if record.settings:
+                state.volume, state.bass_boost, state.auto_play, eq = record.settings
+                state.eq = list(eq)
+
+            queued = [unpack_track(row) for row in record.queue]
+            channel_id, song, position, paused = record.now or (None, None, 0, False)
+            if song:
+                track = unpack_track(song)
+                if channel_id and not paused:
+                    self._resume[guild_id] = (channel_id, track, position)
+                else:
+                    # Paused or not in voice: wait at the head of the queue, resuming at the position
+                    if queued and queued[0].id == track.id:
+                        track = queued[0] # Already held there before the restart
+                    else:
+                        queued.insert(0, track)
+                    state.resume_at = (track, position)
+            self.queue_mgr.restore(guild_id, queued, [unpack_track(row) for row in record.history])
+
+    async def resume_sessions(self):
+        """Rejoins the voice channels that were playing before the restart, near the last position."""
+        resume, self._resume = self._resume, {}
+        gate = asyncio.Semaphore(JOURNAL_RESUME_CONCURRENCY)
+        resumed = []
+
+        async def resume_one(guild_id, channel_id, track, position):
+            async with gate:
+                guild = self.get_guild(guild_id)
+                channel = guild.get_channel(channel_id) if guild else None
+                state = self.get_guild_state(guild_id)
+                if channel is not None and any(not m.bot for m in channel.members):
+                    state.voice_client = await self.voice_mgr.connect_to(channel)
+                    if state.voice_client:
+                        await play_song(guild_id, track, start=position)
+                if state.current_song is track:
+                    resumed.append(guild_id)
+                else:
+                    # Nobody listening or rejoin failed: keep the track first in line
+                    self.hold_for_resume(guild_id, track, position)
+
+        await asyncio.gather(*(resume_one(gid, *entry) for gid, entry in resume.items()), return_exceptions=True)
+        if resume:
+            print(f"[JOURNAL] ▶️ Resumed playback in {len(resumed)}/{len(resume)} guilds")
+
+    def hold_for_resume(self, guild_id: int, track, position: float):
+        """Puts an interrupted track back at the head of the queue, to resume at `position`."""
+        state = self.get_guild_state(guild_id)
+        if self.queue_mgr.find(guild_id, track.id) is not None or self.queue_mgr.add_to_queue(guild_id, track):
+            self.queue_mgr.move(guild_id, track.id, 0)
+            state.resume_at = (track, position)
+        self.bridge.notify(guild_id)
+
+    def release_dead_voice(self, state):
+        """Detaches a voice client that died mid-song; its track waits at the queue head."""
+        vc, state.voice_client = state.voice_client, None
+        self.take_prefetched(state, None)
+        if state.current_song:
+            self.hold_for_resume(state.guild_id, state.current_song, state.get_elapsed())
+            state.current_song = None
+            state.stream_url = None
+        if vc is not None and vc.source is not None:
+            vc.stop() # Its `after` is now stale and ignored by play_next
+
+    async def resume_playback(self, guild_id: int):
+        """After a reconnect: start the queue again, held track first, at its position."""
+        state = self.get_guild_state(guild_id)
+        if not state.current_song and self.queue_mgr.get_queue(guild_id):
+            await play_next(guild_id)
+
+    def take_resume_position(self, state, song) -> float:
+        held, position = state.resume_at or (None, 0)
+        state.resume_at = None
+        return position if held is song else 0
+
+    async def seek(self, guild_id: int, position: float) -> bool:
+        """Restarts the current track's FFmpeg at `position`.
+
+        `-ss` goes before `-i` (input-side seeking), so FFmpeg jumps straight to
+        the nearest index point via a ranged request instead of downloading and
+        decoding everything up to it; deep seeks cost the same as shallow ones.
+        """
+        state = self.get_guild_state(guild_id)
+        song = state.current_song
+        if not song or not state.voice_client or not state.voice_client.source:
+            return False
+        if song.duration:
+            position = min(position, max(song.duration - 1, 0))
+        position = max(position, 0)
+
+        url = await self.player.source_url(song) # Re-signed if it expired during a long track
+        if not url or state.current_song is not song:
+            return False
+        state.stream_url = url
+        if not self.player.replace_source(state, position):
+            return False
+        state.set_position(position)
+        self.bridge.notify(guild_id)
+        return True
+
+    async def import_playlist(self, guild_id: int, url: str, requester: str):
+        """Streams a playlist into the queue; playback starts with the first entry."""
+        state = self.get_guild_state(guild_id)
+        added = 0
+        starting = None
+        async with contextlib.aclosing(self.player.iter_playlist(url, requester)) as batches:
+            async for batch in batches:
+                for song in batch:
+                    if not self.queue_mgr.add_to_queue(guild_id, song):
+                        self.bridge.notify(guild_id)
+                        return added
+                    added += 1
+
+                vc = state.voice_client
+                if vc and not (vc.is_playing() or vc.is_paused()) and (starting is None or starting.done()):
+                    # Not awaited: resolving the first stream needs a worker, and the import may be holding one
+                    starting = asyncio.create_task(play_next(guild_id))
+                self.bridge.notify(guild_id)
+        return added
+
+    async def prefetch_loop(self):
+        """Starts prefetching the head of the queue when a song nears its end."""
+        while not self.is_closed():
+            for guild_id, state in list(self.guild_states.items()):
+                song = state.current_song
+                if not song or not song.duration or state.prefetched or state.is_paused:
+                    continue
+                if song.duration - state.get_elapsed() <= PREFETCH_LEAD and (self.queue_mgr.get_queue(guild_id) or state.auto_play):
+                    state.prefetched = (None, None, None, None) # Reserve the slot while resolving
+                    asyncio.create_task(self.prefetch_next(guild_id))
+            await asyncio.sleep(PREFETCH_CHECK_INTERVAL)
+
+    async def prefetch_next(self, guild_id: int):
+        """Re-validates the stream URL of the next song and spawns its FFmpeg early.
+
+        With an empty queue and autoplay on, the autoplay pick is chosen and
+        warmed up here instead, so it starts as gaplessly as a queued song.
+        """
+        state = self.get_guild_state(guild_id)
+        queue = self.queue_mgr.get_queue(guild_id)
+        head = queue[0] if queue else None
+        if head is None and state.auto_play and state.current_song:
+            head = await self.autoplay.pick(guild_id, state.current_song)
+        url = await self.player.source_url(head) if head else None
+        if not url:
+            state.prefetched = None
+            return
+
+        queue = self.queue_mgr.get_queue(guild_id)
+        # Still next: the queue head, or an autoplay pick (never queued, so no id) with the queue still empty
+        still_next = queue[0] is head if queue else head.id is None
+        if not state.current_song or not still_next:
+            state.prefetched = None
+            return
+
+        source = self.player.create_source(url, volume=state.volume, key=head.key, eq=state.eq, bass_boost=state.bass_boost)
+        state.prefetched = (head, source, self.player.source_settings(state), url) if source else None
+
+    def take_prefetched(self, state, song):
+        """Returns (source, stream_url) warmed up for `song`, discarding any stale one."""
+        head, source, settings, url = state.prefetched or (None, None, None, None)
+        state.prefetched = None
+        if source is None:
+            return None, None
+        if head is song:
+            if isinstance(source, EffectsSource):
+                source.volume = state.volume
+                source.set_effects(*self.player.effects_for(state))
+                return source, url
+            if settings == self.player.source_settings(state):
+                return source, url
+        source.cleanup()
+        return None, None
+
+    async def autoplay_next(self, guild_id: int):
+        """Queues and pops the autoplay pick (the prefetched one if ready) so it lands in history."""
+        state = self.get_guild_state(guild_id)
+        head = state.prefetched[0] if state.prefetched else None
+        track = head if head is not None and head.id is None else await self.autoplay.pick(guild_id, state.current_song)
+        if track is None or not self.queue_mgr.add_to_queue(guild_id, track):
+            return None
+        return self.queue_mgr.get_next(guild_id)
+
+    def record_transition_gap(self, state):
+        if state.track_ended_at:
+            gap = time.perf_counter() - state.track_ended_at
+            self.transition_gaps.append(gap)
+            metrics.TRACK_GAP_SECONDS.observe(gap)
+            state.track_ended_at = 0
+
+    def transition_gap_stats(self):
+        gaps = sorted(self.transition_gaps)
+        if not gaps:
+            return {"samples": 0}
+        return {
+            "samples": len(gaps),
+            "last_ms": round(self.transition_gaps[-1] * 1000, 1),
+            "avg_ms": round(sum(gaps) / len(gaps) * 1000, 1),
+            "p95_ms": round(gaps[min(len(gaps) - 1, int(len(gaps) * 0.95))] * 1000, 1)
+        }
+
+    async def on_voice_state_update(self, member, before, after):
+        # Our own voice state going to no channel: dropped, kicked or channel deleted (the voice manager tells them apart)
+        if member.id == self.user.id and before.channel and after.channel is None:
+            self.voice_mgr.on_dropped(member.guild.id, before.channel.id)
+
     async def on_ready(self):
         print(f"[ONLINE] Akaza Music Bot: {self.user.name}")
+        if self._resume:
+            asyncio.create_task(self.resume_sessions())
         await self.change_presence(activity=discord.Activity(type=discord.ActivityType.listening, name="Premium Neon Music"))
 
     async def dashboard_play(self, guild_id: int, query: str):
@@ -108,20 +415,33 @@ class AkazaBot(commands.Bot):
         state.voice_client = await self.voice_mgr.connect_to(target_channel)
         if not state.voice_client: return
 
-        song = await self.player.extract_info(query)
+        if self.player.is_playlist_url(query):
+            await self.import_playlist(guild_id, query, "Dashboard")
+            return
+
+        song = await self.player.extract_info(query, requester="Dashboard")
         if not song: return
         
-        song['requester'] = "Dashboard"
-        
-        if state.voice_client.is_playing() or state.voice_client.is_paused():
+        vc = state.voice_client # Voice may have been released while resolving; then the song just waits in the queue
+        if vc is None or vc.is_playing() or vc.is_paused():
             self.queue_mgr.add_to_queue(guild_id, song)
-            state.queue_list = self.queue_mgr.get_queue(guild_id)
+            self.bridge.notify(guild_id)
         else:
             await play_song(guild_id, song)
 
 # Initialize instance
 bot = AkazaBot()
 
+async def admit_playback(interaction: discord.Interaction) -> bool:
+    """Lets the load governor hold a new stream; tells the user while it waits, and if it gives up."""
+    async def on_hold():
+        await interaction.followup.send("⏳ High load right now: your music starts as soon as there's room.")
+
+    if await bot.governor.admit(on_hold):
+        return True
+    await interaction.followup.send("🚦 The engine is at capacity and can't start new streams. Try again in a minute.")
+    return False
+
 # --- Slash Command Implementations ---
 
 @bot.tree.command(name="play", description="Summon music into your channel")
@@ -138,57 +458,143 @@ async def play(interaction: discord.Interaction, query: str):
     if not state.voice_client:
         return await interaction.followup.send("❌ Could not establish voice uplink.")
 
-    # 2. Extraction
-    song = await bot.player.extract_info(query)
+    # 2. Extraction (playlists stream straight into the queue)
+    if bot.player.is_playlist_url(query):
+        idle = not (state.voice_client.is_playing() or state.voice_client.is_paused())
+        if idle and not await admit_playback(interaction):
+            return
+        added = await bot.import_playlist(interaction.guild_id, query, interaction.user.display_name)
+        if not added:
+            return await interaction.followup.send("❌ Playlist decoding failed. Private, empty or unsupported.")
+        return await interaction.followup.send(f"📜 Playlist injected: **{added}** tracks queued.")
+
+    song = await bot.player.extract_info(query, requester=interaction.user.display_name)
     if not song:
         return await interaction.followup.send("❌ Signal decoding failed. Bad URL or restricted video.")
     
-    song['requester'] = interaction.user.display_name
-    
-    # 3. Add to Queue or Play Immediately
-    if state.voice_client.is_playing() or state.voice_client.is_paused():
+    # 3. Add to Queue or Play Immediately (a new stream may have to wait for room first)
+    vc = state.voice_client
+    if vc and not (vc.is_playing() or vc.is_paused()) and not await admit_playback(interaction):
+        return
+    vc = state.voice_client # Re-read: something may have started, or voice dropped, while it waited
+    if vc is None or vc.is_playing() or vc.is_paused():
         bot.queue_mgr.add_to_queue(interaction.guild_id, song)
-        state.queue_list = bot.queue_mgr.get_queue(interaction.guild_id)
-        await interaction.followup.send(f"✅ Added to Queue: **{song['title']}**")
+        bot.bridge.notify(interaction.guild_id)
+        await interaction.followup.send(f"✅ Added to Queue: **{song.title}**")
+    elif await play_song(interaction.guild_id, song):
+        await interaction.followup.send(f"🎶 Now Streaming: **{song.title}**")
+    elif bot.queue_mgr.find(interaction.guild_id, song.id) is not None:
+        await interaction.followup.send(f"✅ Up Next: **{song.title}**") # Handed back by play_song
     else:
-        await play_song(interaction.guild_id, song)
-        await interaction.followup.send(f"🎶 Now Streaming: **{song['title']}**")
+        await interaction.followup.send(f"❌ Could not start **{song.title}**.")
 
-async def play_next(guild_id):
+async def play_next(guild_id, finished_vc=None):
     state = bot.get_guild_state(guild_id)
-    next_song = bot.queue_mgr.get_next(guild_id)
-    state.queue_list = bot.queue_mgr.get_queue(guild_id)
-    state.history = bot.queue_mgr.get_history(guild_id)
-    
-    if next_song:
-        await play_song(guild_id, next_song)
-    else:
+    if state.releasing:
+        return # Fired by the reaper's disconnect, which owns the teardown
+    if finished_vc is not None and state.voice_client is not None and state.voice_client is not finished_vc:
+        return # A replaced connection's player ended; the voice supervisor restarts playback
+    if not state.voice_client or not state.voice_client.is_connected():
+        # Voice was torn down (reaper/disconnect): keep the queue intact
+        if state.voice_client is not None:
+            bot.voice_mgr.on_dropped(guild_id, getattr(state.voice_client.channel, "id", None))
+        bot.take_prefetched(state, None)
+        if state.current_song:
+            # Dropped mid-song: it goes back first in line and resumes where it stopped
+            bot.hold_for_resume(guild_id, state.current_song, state.get_elapsed())
         state.current_song = None
+        state.stream_url = None
+        state.track_ended_at = 0
+        bot.bridge.notify(guild_id)
+        return
+
+    autoplayed = False
+    while True: # Skips unresolvable tracks (e.g. a run of dead playlist entries) until one plays
+        next_song = bot.queue_mgr.get_next(guild_id)
+        if next_song is None and state.auto_play and state.current_song and not autoplayed:
+            autoplayed = True # One pick per call, so dead suggestions can't loop
+            next_song = await bot.autoplay_next(guild_id) # current_song is cleared by /stop, so stop stays stopped
+        if next_song is None:
+            break
+
+        start = bot.take_resume_position(state, next_song)
+        source, url = bot.take_prefetched(state, next_song)
+        if start and source:
+            source.cleanup() # Warmed up from 0:00
+            source = None
+        url = url or await bot.player.source_url(next_song)
+        if url:
+            return await play_song(guild_id, next_song, source, url, start)
+        print(f"[ERROR] Could not resolve stream for '{next_song.title}', skipping")
+
+    bot.take_prefetched(state, None)
+    state.current_song = None
+    state.stream_url = None
+    state.track_ended_at = 0
+    bot.bridge.notify(guild_id)
 
-async def play_song(guild_id, song):
+def hand_back(guild_id, song, start=0):
+    """Puts a song that couldn't start back first in line, to resume from `start`."""
+    if start:
+        bot.hold_for_resume(guild_id, song, start)
+    elif bot.queue_mgr.find(guild_id, song.id) is None and bot.queue_mgr.add_to_queue(guild_id, song):
+        bot.queue_mgr.move(guild_id, song.id, 0)
+        bot.bridge.notify(guild_id)
+
+async def play_song(guild_id, song, source=None, url=None, start=0) -> bool:
+    """Starts `song` on the guild's voice client; False if it didn't start."""
     state = bot.get_guild_state(guild_id)
     if not state.voice_client or not state.voice_client.is_connected():
-        return
+        if source: source.cleanup()
+        hand_back(guild_id, song, start) # Voice recovery (or the next /play) picks it up
+        return False
 
-    source = bot.player.create_source(song['url'], volume=state.volume)
-    if not source: return
+    url = url or await bot.player.source_url(song)
+    if not url: return False
+    vc = state.voice_client
+    if vc is None or not vc.is_connected() or vc.is_playing() or vc.is_paused():
+        # Voice dropped, or another start won (e.g. a playlist import's first track), while this one resolved
+        if source: source.cleanup()
+        hand_back(guild_id, song, start)
+        return False
+    source = source or bot.player.create_source(url, volume=state.volume, start=start, key=song.key,
+                                                eq=state.eq, bass_boost=state.bass_boost)
+    if not source: return False
 
     state.current_song = song
-    state.start_time = time.time()
-    state.total_paused_duration = 0
+    state.stream_url = url
+    state.set_position(start)
     state.is_paused = False
     
     def after_playing(error):
         if error: print(f"[ERROR] Playback error: {error}")
-        asyncio.run_coroutine_threadsafe(play_next(guild_id), bot.loop)
+        state.track_ended_at = time.perf_counter()
+        asyncio.run_coroutine_threadsafe(play_next(guild_id, vc), bot.loop)
 
-    state.voice_client.play(source, after=after_playing)
+    try:
+        vc.play(source, after=after_playing, **bot.governor.encoder_options())
+    except discord.ClientException as e:
+        # Lost voice between the check and play(): don't leak the FFmpeg process
+        print(f"[ERROR] Could not start '{song.title}': {e}")
+        source.cleanup()
+        state.current_song = None
+        state.stream_url = None
+        hand_back(guild_id, song, start)
+        bot.bridge.notify(guild_id)
+        return False
+    if not start:
+        bot.player.audio_cache.record_play(song.key, url, song.duration)
+        bot.autoplay.index.record(guild_id, song)
+    bot.bridge.notify(guild_id)
+    bot.record_transition_gap(state)
+    return True
 
 @bot.tree.command(name="stop", description="Stop the music and clear the queue")
 async def stop(interaction: discord.Interaction):
     state = bot.get_guild_state(interaction.guild_id)
     bot.queue_mgr.clear(interaction.guild_id)
-    state.queue_list = []
+    state.current_song = None # Nothing for autoplay to follow
+    bot.bridge.notify(interaction.guild_id)
     if state.voice_client:
         state.voice_client.stop()
     await interaction.response.send_message("⏹️ Systems Halted. Queue purged.")
@@ -209,6 +615,7 @@ async def pause(interaction: discord.Interaction):
         state.voice_client.pause()
         state.is_paused = True
         state.pause_start_time = time.time()
+        bot.bridge.notify(interaction.guild_id)
         await interaction.response.send_message("⏸️ Execution Suspended.")
     else:
         await interaction.response.send_message("❌ Not playing.")
@@ -220,13 +627,38 @@ async def resume(interaction: discord.Interaction):
         state.voice_client.resume()
         state.is_paused = False
         state.total_paused_duration += time.time() - state.pause_start_time
+        bot.bridge.notify(interaction.guild_id)
         await interaction.response.send_message("▶️ Execution Resumed.")
 
+def parse_position(text: str):
+    """'90', '1:30' or '1:02:03' -> seconds, or None."""
+    try:
+        seconds = 0
+        for part in text.strip().split(":"):
+            seconds = seconds * 60 + float(part)
+    except ValueError:
+        return None
+    return seconds if seconds >= 0 else None
+
+@bot.tree.command(name="seek", description="Jump to a position in the current track")
+@app_commands.describe(position="Seconds or m:ss, e.g. 95 or 1:35")
+async def seek(interaction: discord.Interaction, position: str):
+    seconds = parse_position(position)
+    if seconds is None:
+        return await interaction.response.send_message("❌ Use seconds or m:ss, e.g. `1:35`.")
+    await interaction.response.defer()
+    if await bot.seek(interaction.guild_id, seconds):
+        state = bot.get_guild_state(interaction.guild_id)
+        elapsed = int(state.get_elapsed())
+        await interaction.followup.send(f"⏩ Jumped to **{elapsed // 60}:{elapsed % 60:02d}**")
+    else:
+        await interaction.followup.send("❌ Nothing is playing.")
+
 @bot.tree.command(name="volume", description="Adjust the audio level")
 @app_commands.describe(level="Volume level 1-200")
 async def volume(interaction: discord.Interaction, level: int):
     state = bot.get_guild_state(interaction.guild_id)
     state.volume = min(max(level / 100, 0), 2.0)
-    if state.voice_client and state.voice_client.source:
-        state.voice_client.source.volume = state.volume
+    bot.player.apply_volume(state)
+    bot.bridge.notify(interaction.guild_id)
     await interaction.response.send_message(f"🔊 Output calibrated to: **{level}%**")
@@ -0,0 +1,313 @@
+import asyncio
+import itertools
+import json
+import os
+import sys
+from fastapi import HTTPException
+from .config import (
+    BRIDGE_SOCKET, BRIDGE_WORKERS, BRIDGE_IPC_TIMEOUT, BRIDGE_IPC_MAX_BUFFER, DASHBOARD_PORT
+)
+from .dashboard_bridge import DashboardBridge
+from .fanout import encode_frame
+
+# Wire format (one message per line over the Unix socket):
+#   web -> bot   {"id": n, "op": "...", "args": [...]}
+#   bot -> web   R{"id": n, "result": ...} | R{"id": n, "error": [status, detail]}
+#                F<guild_id> <pre-encoded dashboard frame>
+# Frames are forwarded verbatim, so each one is encoded once in the bot process.
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_STREAM_LIMIT = 16 * 1024 * 1024
+
+# Request ops served straight from the in-process DashboardBridge engine API
+_OPS = {
+    "ready": "bot_ready",
+    "guilds": "bot_guilds",
+    "session_save": "save_session",
+    "session_load": "load_session",
+    "status": "global_status",
+    "control": "control",
+    "metrics": "metrics_text",
+    "loop_report": "loop_report",
+    "guild_status": "guild_status",
+}
+
+
+class RemoteSubscriber:
+    """Bot-side stand-in for every dashboard of one guild on one web worker.
+
+    Sits in DashboardBridge.active_websockets like a DashboardClient; the web
+    worker does the per-socket buffering and fan-out.
+    """
+    def __init__(self, conn, guild_id: int):
+        self.conn = conn
+        self.guild_id = guild_id
+        self.closed = False
+
+    def push(self, frame: str):
+        if not self.closed:
+            self.conn.send_frame(self.guild_id, frame)
+
+    def request_snapshot(self):
+        pass # The web worker fetches snapshots itself
+
+    async def close(self, lagged: bool = False):
+        self.closed = True
+
+
+class _WorkerConnection:
+    """One connected web worker, as seen from the bot."""
+    def __init__(self, writer):
+        self.writer = writer
+        self.subscribers = {} # guild_id -> RemoteSubscriber
+
+    def send_frame(self, guild_id: int, frame: str):
+        if self.writer.is_closing():
+            return
+        if self.writer.transport.get_write_buffer_size() > BRIDGE_IPC_MAX_BUFFER:
+            # Worker stopped reading: cut it off, it reconnects and resyncs every client
+            print("[BRIDGE] ⚠️ Web worker is not keeping up, dropping its connection")
+            self.writer.transport.abort()
+            return
+        self.writer.write(b"F%d %s\n" % (guild_id, frame.encode()))
+
+    def reply(self, call_id, result=None, error=None):
+        if self.writer.is_closing():
+            return
+        message = {"id": call_id, "error": error} if error else {"id": call_id, "result": result}
+        self.writer.write(b"R" + encode_frame(message).encode() + b"\n")
+
+
+class BridgeHost:
+    """Bot side of BRIDGE_MODE=process: serves BRIDGE_SOCKET and supervises the web process."""
+    def __init__(self, bridge: DashboardBridge, path: str = BRIDGE_SOCKET):
+        self.bridge = bridge
+        self.path = path
+        self.proc = None
+        self._server = None
+        self._closing = False
+
+    async def serve(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path) # Left behind by a previous run
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path, limit=_STREAM_LIMIT)
+        os.chmod(self.path, 0o600) # Owner only: the socket can save sessions and control playback
+        print(f"[BRIDGE] 🔌 Engine listening on {self.path}, dashboard runs in {BRIDGE_WORKERS} worker process(es)")
+
+        while not self._closing:
+            self.proc = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "bot.bridge_ipc", cwd=_PROJECT_ROOT
+            )
+            code = await self.proc.wait()
+            if self._closing:
+                break
+            print(f"[BRIDGE] ⚠️ Dashboard process exited ({code}), restarting")
+            await asyncio.sleep(1)
+
+    async def close(self):
+        self._closing = True
+        if self.proc and self.proc.returncode is None:
+            self.proc.terminate()
+            try:
+                await asyncio.wait_for(self.proc.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                self.proc.kill()
+        if self._server:
+            self._server.close()
+
+    async def _handle(self, reader, writer):
+        conn = _WorkerConnection(writer)
+        try:
+            while line := await reader.readline():
+                request = json.loads(line)
+                asyncio.create_task(self._dispatch(conn, request))
+        except (ConnectionError, ValueError) as e:
+            print(f"[BRIDGE] ⚠️ Web worker connection failed: {e}")
+        finally:
+            for guild_id, subscriber in conn.subscribers.items():
+                await subscriber.close()
+                self.bridge._drop_client(guild_id, subscriber)
+            writer.close()
+
+    async def _dispatch(self, conn: _WorkerConnection, request: dict):
+        call_id, op, args = request["id"], request["op"], request.get("args", [])
+        try:
+            if op == "subscribe":
+                guild_id = args[0]
+                if guild_id not in conn.subscribers:
+                    subscriber = conn.subscribers[guild_id] = RemoteSubscriber(conn, guild_id)
+                    await self.bridge.attach(guild_id)
+                    self.bridge.active_websockets.setdefault(guild_id, []).append(subscriber)
+                result = None
+            elif op == "unsubscribe":
+                subscriber = conn.subscribers.pop(args[0], None)
+                if subscriber:
+                    await subscriber.close()
+                    self.bridge._drop_client(args[0], subscriber)
+                result = None
+            elif op == "snapshot":
+                await self.bridge.attach(args[0])
+                result = self.bridge.snapshot_frame(args[0])
+            else:
+                result = await getattr(self.bridge, _OPS[op])(*args)
+            conn.reply(call_id, result)
+        except HTTPException as e:
+            conn.reply(call_id, error=[e.status_code, e.detail])
+        except Exception as e:
+            print(f"[BRIDGE] ❌ {op} failed: {type(e).__name__}: {e}")
+            conn.reply(call_id, error=[500, str(e)])
+
+
+class RemoteBridge(DashboardBridge):
+    """The dashboard web layer running in its own process (one per uvicorn worker).
+
+    Routes, OAuth and per-socket fan-out run here; every engine call is a
+    request over BRIDGE_SOCKET, and guild frames arrive pre-encoded from the
+    bot. One subscription per guild per worker, however many browsers watch it.
+    """
+    def __init__(self, path: str = BRIDGE_SOCKET):
+        self.path = path
+        self._writer = None
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._connect_lock = asyncio.Lock()
+        self._reconnect_task = None
+        super().__init__(bot=None)
+
+    def register_gauges(self):
+        pass # /metrics is served from the bot process
+
+    # --- IPC ---
+    async def _ensure_connected(self):
+        if self._writer is not None:
+            return
+        async with self._connect_lock:
+            if self._writer is not None:
+                return
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path, limit=_STREAM_LIMIT)
+            except OSError:
+                raise HTTPException(503, "Bot engine unavailable, retrying...")
+            self._writer = writer
+            asyncio.create_task(self._read(reader, writer))
+
+            # After a reconnect, re-subscribe and bring every open dashboard back in sync
+            for guild_id, clients in list(self.active_websockets.items()):
+                asyncio.create_task(self._call("subscribe", guild_id))
+                for client in clients:
+                    client.request_snapshot()
+
+    async def _read(self, reader, writer):
+        try:
+            while line := await reader.readline():
+                kind, body = line[:1], line[1:-1]
+                if kind == b"F":
+                    guild_id, frame = body.split(b" ", 1)
+                    self.deliver(int(guild_id), frame.decode())
+                elif kind == b"R":
+                    reply = json.loads(body)
+                    future = self._pending.get(reply["id"])
+                    if future and not future.done():
+                        future.set_result(reply)
+        except (ConnectionError, ValueError) as e:
+            print(f"[BRIDGE] ⚠️ Engine connection failed: {e}")
+        finally:
+            if self._writer is writer:
+                self._writer = None
+            writer.close()
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("engine connection lost"))
+            if self.active_websockets and (not self._reconnect_task or self._reconnect_task.done()):
+                self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self):
+        delay = 0.5
+        while self._writer is None and self.active_websockets:
+            await asyncio.sleep(delay)
+            try:
+                await self._ensure_connected()
+            except HTTPException:
+                delay = min(delay * 2, 5)
+
+    async def _call(self, op: str, *args):
+        await self._ensure_connected()
+        call_id = next(self._ids)
+        future = self._pending[call_id] = asyncio.get_running_loop().create_future()
+        try:
+            self._writer.write(encode_frame({"id": call_id, "op": op, "args": args}).encode() + b"\n")
+            reply = await asyncio.wait_for(future, timeout=BRIDGE_IPC_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise HTTPException(504, "Bot engine did not answer in time")
+        except (ConnectionError, AttributeError):
+            raise HTTPException(503, "Bot engine unavailable, retrying...")
+        finally:
+            self._pending.pop(call_id, None)
+        if "error" in reply:
+            raise HTTPException(*reply["error"])
+        return reply["result"]
+
+    # --- Engine API over IPC ---
+    async def bot_ready(self) -> bool:
+        try:
+            return await self._call("ready")
+        except HTTPException:
+            return False
+
+    async def bot_guilds(self, guild_ids) -> list:
+        return await self._call("guilds", list(guild_ids))
+
+    async def save_session(self, token: str, user: dict, ttl: float = None):
+        await self._call("session_save", token, user, ttl)
+
+    async def load_session(self, token: str):
+        return await self._call("session_load", token)
+
+    async def global_status(self) -> dict:
+        status = await self._call("status")
+        status["engine"] = f"Akaza Senior V3 (Split Process, {BRIDGE_WORKERS} web worker(s))"
+        status["dashboard_fanout"] = self.fanout_stats.as_dict() # This worker's sockets
+        status["oauth"].update(guild_lists=self.guild_lists.stats(), rate_limits=self.rate_limiter.stats())
+        return status
+
+    async def control(self, guild_id: int, action: str, params: dict) -> dict:
+        return await self._call("control", guild_id, action, params)
+
+    async def metrics_text(self) -> str:
+        return await self._call("metrics")
+
+    async def loop_report(self, top: int) -> dict:
+        return await self._call("loop_report", top) # The bot's loop, not this worker's
+
+    async def guild_status(self, guild_id: int) -> dict:
+        return await self._call("guild_status", guild_id)
+
+    async def attach(self, guild_id: int):
+        if guild_id not in self.active_websockets:
+            await self._call("subscribe", guild_id)
+
+    def snapshot_frame(self, guild_id: int):
+        return self._call("snapshot", guild_id)
+
+    def _drop_client(self, guild_id: int, client):
+        super()._drop_client(guild_id, client)
+        if guild_id not in self.active_websockets and self._writer is not None:
+            asyncio.create_task(self._unsubscribe(guild_id))
+
+    async def _unsubscribe(self, guild_id: int):
+        try:
+            await self._call("unsubscribe", guild_id)
+        except HTTPException:
+            pass # Connection gone: the bot drops the subscription itself
+
+
+def create_app():
+    return RemoteBridge().app
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(
+        "bot.bridge_ipc:create_app", factory=True,
+        host="0.0.0.0", port=DASHBOARD_PORT, workers=BRIDGE_WORKERS, log_level="error"
+    )
@@ -0,0 +1,94 @@
+import asyncio
+from fastapi import HTTPException
+from .config import COMMAND_QUEUE_MAX, COMMAND_COALESCE_DELAY
+
+# Actions where only the latest value matters: a newer one replaces the pending
+# one in place, mapped to what makes two of them "the same". Only the trailing run
+# of that action is searched, so nothing queued in between is reordered.
+COALESCED_ACTIONS = {
+    "volume": lambda params: None,
+    "equalizer": lambda params: params.get("band"),
+    "seek": lambda params: None,
+}
+
+
+class CommandStats:
+    def __init__(self):
+        self.received = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.rejected = 0
+
+    def as_dict(self):
+        return {"received": self.received, "coalesced": self.coalesced,
+                "batches": self.batches, "rejected": self.rejected}
+
+
+class GuildCommandQueue:
+    """Serialises dashboard commands for one guild, in arrival order.
+
+    Commands queue up while the previous batch runs (a batch holding a
+    coalescable action waits COMMAND_COALESCE_DELAY first); superseded ones
+    (see COALESCED_ACTIONS) are folded into the pending entry and share its result.
+    `on_batch` runs once after each batch, so a burst of slider moves yields a
+    single state update.
+    """
+    def __init__(self, apply, on_batch, on_idle, stats: CommandStats):
+        self._apply = apply
+        self._on_batch = on_batch
+        self._on_idle = on_idle
+        self._stats = stats
+        self._pending = [] # [action, params, coalesce key, [futures]]
+        self._task = None
+
+    def submit(self, action: str, params: dict) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._stats.received += 1
+
+        key_of = COALESCED_ACTIONS.get(action)
+        if key_of is not None:
+            key = key_of(params)
+            for entry in reversed(self._pending):
+                if entry[0] != action:
+                    break # seek(10), skip, seek(50) must stay three commands
+                if entry[2] == key:
+                    entry[1] = params
+                    entry[3].append(future)
+                    self._stats.coalesced += 1
+                    return future
+        else:
+            key = None
+
+        if len(self._pending) >= COMMAND_QUEUE_MAX:
+            self._stats.rejected += 1
+            future.set_exception(HTTPException(429, "Too many pending commands"))
+            return future
+
+        self._pending.append([action, params, key, [future]])
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._drain())
+        return future
+
+    async def _drain(self):
+        while self._pending:
+            if any(entry[0] in COALESCED_ACTIONS for entry in self._pending):
+                await asyncio.sleep(COMMAND_COALESCE_DELAY) # Let the rest of a slider drag arrive
+            batch, self._pending = self._pending, []
+            for action, params, _, futures in batch:
+                try:
+                    result, error = await self._apply(action, params), None
+                except HTTPException as e:
+                    result, error = None, e
+                except Exception as e:
+                    print(f"[CONTROL] ❌ {action} failed: {type(e).__name__}: {e}")
+                    result, error = None, HTTPException(500, str(e))
+                for future in futures:
+                    if future.done():
+                        continue
+                    if error is None:
+                        future.set_result(result)
+                    else:
+                        future.set_exception(error)
+            self._stats.batches += 1
+            self._on_batch()
+        self._on_idle()
@@ -9,17 +9,151 @@ OWNER_ID = int(os.environ.get("OWNER_ID", "0"))
 
 # 🎵 Audio Engine Configuration (Senior Level)
 BITRATE = 192000 # 192kbps High-Fidelity
+FFMPEG_BEFORE_OPTIONS = '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5'
+LOUDNESS_TARGET_I = -16 # Integrated loudness target (LUFS)
+LOUDNESS_TARGET_TP = -1.5 # True-peak ceiling (dBTP)
+LOUDNESS_TARGET_LRA = 11
+# Live single-pass loudnorm: only used for tracks whose loudness hasn't been measured yet
+FFMPEG_AUDIO_FILTER = f'loudnorm=I={LOUDNESS_TARGET_I}:TP={LOUDNESS_TARGET_TP}:LRA={LOUDNESS_TARGET_LRA}'
+FFMPEG_OUTPUT_OPTIONS = '-vn -b:a 192k'
 FFMPEG_OPTIONS = {
-    'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5',
-    'options': '-vn -b:a 192k -af "loudnorm=I=-16:TP=-1.5:LRA=11"'
+    'before_options': FFMPEG_BEFORE_OPTIONS,
+    'options': f'{FFMPEG_OUTPUT_OPTIONS} -af "{FFMPEG_AUDIO_FILTER}"'
 }
+# How measured tracks are normalized: "gain" (static volume, nearly free) or "linear" (two-pass loudnorm)
+LOUDNESS_MODE = os.environ.get("LOUDNESS_MODE", "gain").lower()
+LOUDNESS_ANALYSIS_WORKERS = 1 # Concurrent background FFmpeg loudness scans
+LOUDNESS_MAX_PENDING = 32 # Tracks waiting for analysis; more are skipped until the next play
+LOUDNESS_ANALYSIS_TIMEOUT = 120
+LOUDNESS_CACHE_MAX = 20000 # Measured tracks kept (a few dozen bytes each)
+# "pcm"  -> FFmpeg decodes to PCM, Python applies volume + EQ and encodes Opus per frame
+# "opus" -> FFmpeg applies volume and encodes Opus itself (no per-frame Python work)
+AUDIO_PIPELINE = os.environ.get("AUDIO_PIPELINE", "pcm").lower()
+# Equalizer / bass boost: applied per PCM frame in-process (FFmpeg filters on the opus pipeline)
+EQ_BANDS_HZ = (("lowshelf", 250), ("peaking", 1000), ("highshelf", 4000)) # low, mid, high
+EQ_MID_Q = 0.7
+EQ_MAX_GAIN_DB = 10 # Matches the dashboard sliders
+BASS_BOOST_HZ = 100
+BASS_BOOST_DB = 8
+EQ_BLOCK_SAMPLES = 96 # Frames are filtered in blocks this long (a 20 ms frame is 960 samples)
 
 # 🌐 Dashboard Uplink Config
 DASHBOARD_PORT = int(os.environ.get("PORT", 8000))
-SYNC_INTERVAL = 3 # Real-time sync every 3 seconds
+SYNC_INTERVAL = 3 # Safety-net sync; only sends when something changed
+SYNC_COALESCE_DELAY = 0.05 # Batch bursts of state changes into one delta
 HEARTBEAT_TIMEOUT = 10
+WS_SEND_TIMEOUT = 5 # A dashboard socket that can't take a frame in this time is dropped
+WS_CLIENT_BUFFER = 16 # Frames buffered per dashboard client before coalescing into a snapshot
+WS_MAX_OVERFLOWS = 3 # Consecutive overflows before a lagging client is disconnected
+# "inproc"  -> dashboard web server shares the bot's event loop (default)
+# "process" -> it runs in BRIDGE_WORKERS separate uvicorn worker(s) talking to the bot over BRIDGE_SOCKET
+BRIDGE_MODE = os.environ.get("BRIDGE_MODE", "inproc").lower()
+BRIDGE_SOCKET = os.environ.get("BRIDGE_SOCKET", "/tmp/akaza_bridge.sock")
+BRIDGE_WORKERS = int(os.environ.get("BRIDGE_WORKERS", 1))
+BRIDGE_IPC_TIMEOUT = 10 # Seconds a web worker waits for the bot to answer
+BRIDGE_IPC_MAX_BUFFER = 4 * 1024 * 1024 # Unsent frames per web worker before it is cut off and resyncs
+SESSION_TTL = 7 * 24 * 3600 # Dashboard logins expire after this (or the token's own expiry, if sooner)
+SESSION_MAX = 5000 # Least recently used sessions are dropped beyond this
+GUILD_LIST_TTL = 60 # A user's server list is served from cache this long...
+GUILD_LIST_STALE = 15 * 60 # ...then served stale while refreshing in the background, up to this age
+GUILD_LIST_MAX = 5000 # Users whose server lists are cached
+DISCORD_API_TIMEOUT = 5
+DISCORD_MAX_RATE_LIMIT_WAIT = 3 # Wait out shorter Discord rate limits instead of failing
+COMMAND_COALESCE_DELAY = 0.05 # Window for repeated volume/EQ slider changes to collapse into one
+COMMAND_QUEUE_MAX = 64 # Dashboard commands waiting per guild before new ones are rejected
+PREFETCH_LEAD = 15 # Seconds before a song ends to warm up the next one
+PREFETCH_CHECK_INTERVAL = 2
 
 # 📋 Performance & Limits
 MAX_QUEUE_SIZE = 500
 MAX_HISTORY_SIZE = 100
-CACHE_CLEAR_INTERVAL = 3600 # 1 hour
+PLAYLIST_BATCH_SIZE = 50 # Playlist entries streamed into the queue per batch
+CACHE_CLEAR_INTERVAL = 3600 # 1 hour: untouched guild states are evicted after this
+REAPER_INTERVAL = 60 # Seconds between idle-guild sweeps
+VOICE_IDLE_GRACE = 120 # Leave empty/idle voice channels after this many seconds
+GUILD_MEMORY_BUDGET_MB = int(os.environ.get("GUILD_MEMORY_BUDGET_MB", 64)) # Guild state + queues + history
+
+# 🔊 Voice Connections
+VOICE_CONNECT_TIMEOUT = 20.0
+VOICE_CONNECT_ATTEMPTS = 3 # Tries per /play or resume connect before giving up
+VOICE_CONNECT_CONCURRENCY = 8 # Voice handshakes in flight at once (reconnect storms queue behind this)
+VOICE_RECONNECT_GRACE = 2 # Seconds discord.py gets to heal a dropped connection itself
+VOICE_RECONNECT_ATTEMPTS = 6 # Rejoin attempts after a drop before the queue is left waiting
+VOICE_BACKOFF_BASE = 0.5 # Jittered exponential backoff between attempts...
+VOICE_BACKOFF_MAX = 15 # ...capped at this
+
+# 🎲 Autoplay (co-play index built from what guilds actually play)
+AUTOPLAY_WINDOW = 4 # Each play is linked to this many previous plays in its guild
+AUTOPLAY_MAX_NEIGHBORS = 32 # Links kept per track (weakest dropped)
+AUTOPLAY_MAX_TRACKS = 50000 # Tracks in the index before the least recently played are compacted away
+AUTOPLAY_CANDIDATES = 5 # Top-scoring tracks the pick is drawn from
+AUTOPLAY_NO_REPEAT = 25 # A guild's recently played tracks that autoplay won't pick again
+AUTOPLAY_TRACKED_GUILDS = 10000 # Per-guild recent-play windows kept
+AUTOPLAY_RELATED_SCAN = 50 # Mix entries read looking for one not recently played (the first is the seed itself)
+
+# 🩺 Event Loop Watchdog (always on: a heartbeat coroutine plus a mostly sleeping thread)
+LOOP_WATCHDOG_INTERVAL = 0.1 # Heartbeat period; how late it runs is the loop lag
+LOOP_STALL_THRESHOLD = 0.1 # Lag past this is a stall: the loop thread's stack gets sampled
+LOOP_STALL_SAMPLE_INTERVAL = 0.02 # Stack samples are taken this often while the loop is stuck
+LOOP_STALL_LOG_THRESHOLD = 1.0 # Stalls longer than this are also printed
+LOOP_STALL_MAX_STACKS = 200 # Distinct stacks kept (least sampled dropped)
+LOOP_STALL_STACK_DEPTH = 16 # Innermost frames kept per sample
+LOOP_STALL_REPORT_TOP = 10
+
+# 🚦 Load Governor (steps audio quality down, then holds new streams, when the instance runs hot)
+GOVERNOR_INTERVAL = 2.0 # Seconds between load readings
+GOVERNOR_CPU_CORES = float(os.environ.get("GOVERNOR_CPU_CORES", 0)) # 0 = cgroup CPU quota, else os.cpu_count()
+GOVERNOR_MEMORY_LIMIT_MB = int(os.environ.get("GOVERNOR_MEMORY_LIMIT_MB", 0)) # 0 = cgroup memory limit, else RAM
+GOVERNOR_CPU_HIGH = 85 # % of the CPU budget used by the bot and its FFmpeg/worker children...
+GOVERNOR_CPU_LOW = 60 # ...and the level it has to fall back under before quality steps up again
+GOVERNOR_MEMORY_HIGH = 0.85 # Share of the memory limit (RSS of the whole process tree)
+GOVERNOR_MEMORY_LOW = 0.70
+GOVERNOR_LATE_FRAMES_HIGH = 0.02 # Share of voice frames read more than a frame late
+GOVERNOR_LATE_FRAMES_LOW = 0.005
+GOVERNOR_MIN_FRAMES = 100 # Fewer frames in a reading than this and lateness is ignored
+GOVERNOR_STEP_DOWN_AFTER = 2 # Consecutive hot readings before quality drops one tier
+GOVERNOR_STEP_UP_AFTER = 15 # Consecutive calm readings before it climbs back one tier
+GOVERNOR_HOLD_AFTER = 3 # Hot readings at the lowest tier before new streams are held
+GOVERNOR_REOPEN_AFTER = 3 # Readings out of the hot zone before held streams start again
+GOVERNOR_ADMIT_BURST = 2 # Held streams started per reading once admissions reopen
+GOVERNOR_ADMISSION_WAIT = 20 # Seconds a held /play waits before it is turned away
+GOVERNOR_RESPAWNS_PER_READING = 2 # Running streams moved off live loudnorm per reading after a step down
+GOVERNOR_HISTORY = 100 # Quality/admission changes kept for the status endpoint
+# name, Opus kbps, Opus bandwidth, live loudnorm for unmeasured tracks, in-process EQ/bass boost
+QUALITY_TIERS = (
+    ("high", BITRATE // 1000, "full", True, True),
+    ("reduced", 96, "full", False, True),
+    ("minimal", 64, "superwide", False, False),
+)
+
+# 🗃️ Track Resolution Cache
+TRACK_CACHE_MAX_BYTES = int(os.environ.get("TRACK_CACHE_MAX_BYTES", 8 * 1024 * 1024)) # 8 MB
+TRACK_CACHE_QUERY_TTL = 6 * 3600 # How long a search query keeps pointing at the same track
+TRACK_CACHE_STREAM_TTL = 3600 # Fallback lifetime when a stream URL carries no `expire`
+TRACK_CACHE_SAFETY_MARGIN = 120 # Treat stream URLs as stale this many seconds before expiry
+
+# 💽 Local Audio Cache (Ogg/Opus copies of frequently played tracks; 0 bytes disables it)
+AUDIO_CACHE_DIR = os.environ.get("AUDIO_CACHE_DIR", "audio_cache")
+AUDIO_CACHE_MAX_BYTES = int(os.environ.get("AUDIO_CACHE_MAX_BYTES", 2 * 1024 * 1024 * 1024)) # 2 GB
+AUDIO_CACHE_MIN_PLAYS = 3 # Plays before a track is transcoded locally
+AUDIO_CACHE_MAX_TRACK_SECONDS = 20 * 60 # Longer tracks (mixes, streams) always stream
+AUDIO_CACHE_WORKERS = 1 # Concurrent background transcodes
+AUDIO_CACHE_MAX_PENDING = 16
+AUDIO_CACHE_TIMEOUT = 600
+AUDIO_CACHE_TRACKED_MAX = 20000 # Play counters kept (least recent dropped)
+
+# ⛏️ Extraction Workers (yt-dlp runs in separate processes)
+EXTRACTION_WORKERS = int(os.environ.get("EXTRACTION_WORKERS", 2))
+EXTRACTION_QUEUE_SIZE = 32 # Requests allowed to wait for a free worker before rejecting
+EXTRACTION_TIMEOUT = 30 # Seconds before a stuck extraction is killed
+EXTRACTION_WORKER_MAX_JOBS = 50 # Recycle a worker after this many extractions
+EXTRACTION_WORKER_MAX_RSS_MB = 300 # ...or once its memory grows past this
+
+# 💾 Crash-Safe Journal (point JOURNAL_PATH at a persistent disk on Render)
+JOURNAL_PATH = os.environ.get("JOURNAL_PATH", "akaza_journal.db")
+JOURNAL_FLUSH_INTERVAL = 1.0 # Mutations are batched and fsynced together this often
+JOURNAL_POSITION_INTERVAL = 10 # Playback positions are checkpointed this often
+JOURNAL_COMPACT_INTERVAL = 600 # Fold the log into per-guild snapshots this often...
+JOURNAL_COMPACT_ROWS = 20000 # ...or as soon as the log grows past this many entries
+JOURNAL_PENDING_MAX = 50000 # Unwritten entries kept while writes fail; the oldest are dropped past this
+JOURNAL_RESUME_CONCURRENCY = 4 # Voice channels rejoined in parallel after a restart
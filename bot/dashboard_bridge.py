@@ -1,23 +1,78 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, PlainTextResponse
 import httpx
 import asyncio
 import json
+import math
 import time
 from typing import Dict, List
-from .config import CLIENT_ID, CLIENT_SECRET, REDIRECT_URI
+from .config import (
+    CLIENT_ID, CLIENT_SECRET, REDIRECT_URI, SYNC_COALESCE_DELAY, EQ_MAX_GAIN_DB, LOOP_STALL_REPORT_TOP
+)
+from .state_sync import GuildSnapshot
+from .fanout import DashboardClient, FanoutStats, encode_frame
+from .discord_oauth import SessionStore, GuildListCache, DiscordRateLimiter
+from .command_queue import GuildCommandQueue, CommandStats
+from . import metrics
+import psutil
+
+
+# Numeric parameter each command needs: action -> (name, type)
+NUMERIC_PARAMS = {
+    "move_queue": ("to", int),
+    "volume": ("level", float),
+    "seek": ("position", float),
+    "equalizer": ("gain", float),
+}
+
+
+def checked_params(action: str, params) -> dict:
+    """Validates a command's params, converting its numeric one; raises HTTPException(400)."""
+    if not isinstance(params, dict):
+        raise HTTPException(400, "params must be an object")
+    spec = NUMERIC_PARAMS.get(action)
+    if spec is None:
+        return params
+    name, kind = spec
+    value = params.get(name)
+    if value is None:
+        raise HTTPException(400, f"Missing {name}")
+    try:
+        number = kind(value)
+    except (TypeError, ValueError, OverflowError):
+        number = None
+    if number is None or isinstance(value, bool) or not math.isfinite(number):
+        raise HTTPException(400, f"{name} must be a number")
+    return {**params, name: number}
+
 
 class DashboardBridge:
+    """Web layer of the dashboard: OAuth, REST control, and WebSocket fan-out.
+
+    Everything the routes need from the bot goes through the "engine" methods
+    below. By default they call into the bot directly (same process, same
+    loop); bridge_ipc.RemoteBridge overrides them to run the web layer in a
+    separate process that talks to the bot over a Unix socket.
+    """
     def __init__(self, bot):
         self.bot = bot
         self.app = FastAPI(title="Akaza Dashboard Uplink")
-        self.active_websockets: Dict[int, List[WebSocket]] = {}
+        self.active_websockets: Dict[int, List[DashboardClient]] = {}
+        self.fanout_stats = FanoutStats()
+        self.snapshots: Dict[int, GuildSnapshot] = {} # Last state pushed per guild
+        self._dirty_guilds = set()
+        self._flush_task = None
+        self.commands: Dict[int, GuildCommandQueue] = {} # Guilds with dashboard commands in flight
+        self.command_stats = CommandStats()
         self.http_client = httpx.AsyncClient()
+        self.rate_limiter = DiscordRateLimiter()
+        self.rate_limiter.install(self.http_client)
+        self.guild_lists = GuildListCache(self.http_client)
         
-        # Security: In-memory token store (Simplified for rebuild)
-        self.tokens = {} # token -> user_data
+        # Security: In-memory session store with expiry (lives in the bot process when split)
+        self.sessions = SessionStore()
         
         self.app.add_middleware(
             CORSMiddleware,
@@ -28,6 +83,7 @@ class DashboardBridge:
         )
         
         self.setup_routes()
+        self.register_gauges()
         
         # Serve static files for the dashboard
         # This must be mounted AFTER routes or using a specific order
@@ -65,74 +121,48 @@ class DashboardBridge:
             user_r = await self.http_client.get("https://discord.com/api/users/@me", headers=headers)
             user = user_r.json()
             
-            # 3. Store locally (In-proc)
-            self.tokens[access_token] = user
+            # 3. Store locally (In-proc, or in the bot process when split)
+            await self.save_session(access_token, user, token_data.get('expires_in'))
             
             # Redirect back to frontend with token
-            from fastapi.responses import RedirectResponse
             return RedirectResponse(url=f"/?token={access_token}")
 
         @self.app.get("/api/user")
         async def get_user(token: str):
-            if token not in self.tokens:
+            user = await self.load_session(token)
+            if user is None:
                 raise HTTPException(401, "Invalid session")
-            return self.tokens[token]
+            return user
 
         @self.app.get("/api/servers")
         async def get_servers(token: str):
-            if not token or token not in self.tokens:
+            if not token or await self.load_session(token) is None:
                 print(f"[AUTH] ❌ Invalid or missing token")
                 raise HTTPException(401, "Session expired or invalid")
             
             # Check if bot is ready
-            if not self.bot.is_ready():
+            if not await self.bot_ready():
                 print(f"[BOT] ⚠️ Bot not ready yet")
                 raise HTTPException(503, "Bot is starting up. Please wait a moment and try again.")
             
-            print(f"[SERVERS] 🔍 Fetching guilds from Discord...")
-            
             try:
-                headers = {'Authorization': f'Bearer {token}'}
-                
-                # Single attempt with short timeout for immediate feedback
-                r = await asyncio.wait_for(
-                    self.http_client.get("https://discord.com/api/users/@me/guilds", headers=headers),
-                    timeout=3.0  # Very short timeout - fail fast
-                )
-                
-                print(f"[DISCORD API] Response status: {r.status_code}")
-                
-                # Handle specific error cases
-                if r.status_code == 401:
-                    print(f"[DISCORD API] ❌ Token expired or invalid")
-                    raise HTTPException(401, "Discord session expired. Please login again.")
-                
-                elif r.status_code == 429:
-                    print(f"[DISCORD API] ⏳ Rate limited")
-                    raise HTTPException(429, "Discord API rate limit. Please try again in 30 seconds.")
-                
-                elif r.status_code != 200:
-                    error_text = r.text[:200] if r.text else "Unknown error"
-                    print(f"[DISCORD API] ❌ Status {r.status_code}: {error_text}")
-                    raise HTTPException(r.status_code, f"Discord API error: {error_text}")
-                
-                # Success - parse response
-                user_guilds = r.json()
-                
-                if not isinstance(user_guilds, list):
-                    print(f"[DISCORD API] ⚠️ Unexpected response format: {type(user_guilds)}")
-                    if isinstance(user_guilds, dict):
-                        error_msg = user_guilds.get('message', 'Unknown format')
-                        raise HTTPException(500, f"Discord returned error: {error_msg}")
-                    raise HTTPException(500, "Invalid response from Discord")
+                # Cached per user; stale lists are served instantly while refreshing in the background
+                user_guilds = await self.guild_lists.get(token)
                 
                 print(f"[SERVERS] ✅ Found {len(user_guilds)} guilds")
                 
+                ids = []
+                for g in user_guilds:
+                    try:
+                        ids.append(int(g['id']))
+                    except (KeyError, TypeError, ValueError):
+                        pass
+                present = set(await self.bot_guilds(ids))
+
                 servers = []
                 for g in user_guilds:
                     try:
                         guild_id = int(g['id'])
-                        discord_guild = self.bot.get_guild(guild_id)
                         
                         perms = int(g.get('permissions', 0))
                         has_manage = (perms & 0x20) == 0x20 or (perms & 0x8) == 0x8
@@ -141,7 +171,7 @@ class DashboardBridge:
                             "id": g['id'],
                             "name": g.get('name', 'Unknown Server'),
                             "icon": g.get('icon'),
-                            "bot_in": discord_guild is not None,
+                            "bot_in": guild_id in present,
                             "has_access": has_manage,
                             "permissions": perms
                         })
@@ -149,13 +179,8 @@ class DashboardBridge:
                         print(f"[SKIP] ⚠️ Bad guild entry: {entry_err}")
                         continue
                 
-                print(f"[SERVERS] ✅ Returning {len(servers)} processed servers")
                 return servers
                 
-            except asyncio.TimeoutError:
-                print(f"[DISCORD API] ⏱️ Request timeout after 3s")
-                raise HTTPException(504, "Discord API timeout. Click refresh button to try again.")
-                
             except HTTPException:
                 raise
                 
@@ -165,118 +190,318 @@ class DashboardBridge:
 
         @self.app.get("/health")
         async def health_check():
-            return {"status": "operational", "bot_ready": self.bot.is_ready()}
+            return {"status": "operational", "bot_ready": await self.bot_ready()}
 
         @self.app.websocket("/ws/{guild_id}")
         async def websocket_endpoint(websocket: WebSocket, guild_id: int):
             await websocket.accept()
-            if guild_id not in self.active_websockets:
-                self.active_websockets[guild_id] = []
-            self.active_websockets[guild_id].append(websocket)
+            # Bring the guild's snapshot up to date; the new client starts from it
+            await self.attach(guild_id)
+            client = DashboardClient(
+                websocket,
+                snapshot_factory=lambda: self.snapshot_frame(guild_id),
+                stats=self.fanout_stats,
+                on_close=lambda c: self._drop_client(guild_id, c)
+            )
+            self.active_websockets.setdefault(guild_id, []).append(client)
             
             try:
-                # Send initial state immediately on connect
-                await self.broadcast_state(guild_id, [websocket])
                 while True:
-                    await websocket.receive_text() # Keep-alive
-            except WebSocketDisconnect:
-                if guild_id in self.active_websockets:
-                    self.active_websockets[guild_id].remove(websocket)
+                    try:
+                        message = json.loads(await websocket.receive_text())
+                    except ValueError:
+                        continue # Keep-alive pings
+                    if not isinstance(message, dict):
+                        continue
+                    if message.get("type") == "resync":
+                        client.request_snapshot()
+                    elif message.get("type") == "command":
+                        asyncio.create_task(self._socket_command(client, guild_id, message))
+            except (WebSocketDisconnect, RuntimeError):
+                pass
+            finally:
+                await client.close()
 
         @self.app.get("/api/bot/status")
         async def get_bot_global_status():
             """Returns the overall health of the bot process."""
-            return {
-                "is_running": True,
-                "bot_ready": self.bot.is_ready(),
-                "latency": round(self.bot.latency * 1000, 2) if self.bot.is_ready() else 0,
-                "engine": "Akaza Senior V3 (Unified Process)"
-            }
+            return await self.global_status()
+
+        @self.app.get("/api/bot/stalls")
+        async def get_loop_stalls(top: int = LOOP_STALL_REPORT_TOP):
+            """Code paths that blocked the event loop longest, with their stacks."""
+            return await self.loop_report(top)
 
         @self.app.post("/api/server/{guild_id}/control")
         async def control_bot(guild_id: int, action: str, params: dict = None):
-            if not self.bot.is_ready():
-                raise HTTPException(status_code=503, detail="Bot engine not ready")
-            
-            guild = self.bot.get_guild(guild_id)
-            if not guild:
-                raise HTTPException(status_code=404, detail="Guild not found")
-            
-            state = self.bot.get_guild_state(guild_id)
-            params = params or {}
-            
-            try:
-                if action == "play":
-                    query = params.get("query")
-                    if not query: raise HTTPException(400, "Missing query")
-                    asyncio.create_task(self.bot.dashboard_play(guild_id, query))
-                
-                elif action == "pause":
-                    if state.voice_client:
-                        state.voice_client.pause()
-                        state.is_paused = True
-                        state.pause_start_time = time.time()
-                
-                elif action == "resume":
-                    if state.voice_client:
-                        state.voice_client.resume()
-                        state.is_paused = False
-                        state.total_paused_duration += time.time() - state.pause_start_time
-                
-                elif action == "skip":
-                    if state.voice_client: state.voice_client.stop()
-                
-                elif action == "stop":
-                    self.bot.queue_mgr.clear(guild_id)
-                    state.queue_list = []
-                    if state.voice_client: state.voice_client.stop()
-
-                elif action == "volume":
-                    level = params.get("level", 100)
-                    state.volume = min(max(level / 100, 0), 2.0)
-                    if state.voice_client and state.voice_client.source:
-                        state.voice_client.source.volume = state.volume
-
-                await self.broadcast_state(guild_id)
-                return {"status": "dispatched", "action": action}
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=str(e))
+            return await self.control(guild_id, action, params or {})
+
+        @self.app.get("/metrics")
+        async def get_metrics():
+            return PlainTextResponse(await self.metrics_text(), media_type="text/plain; version=0.0.4")
 
         @self.app.get("/api/server/{guild_id}/status")
         async def get_status(guild_id: int):
-            state = self.bot.get_guild_state(guild_id)
-            return {"online": True, "connected": state.voice_client is not None}
+            return await self.guild_status(guild_id)
+
+    # --- Engine API (overridden by bridge_ipc.RemoteBridge) ---
+    async def bot_ready(self) -> bool:
+        return self.bot.is_ready()
+
+    async def bot_guilds(self, guild_ids) -> list:
+        """The subset of `guild_ids` the bot is a member of."""
+        return [guild_id for guild_id in guild_ids if self.bot.get_guild(guild_id) is not None]
+
+    async def save_session(self, token: str, user: dict, ttl: float = None):
+        self.sessions.put(token, user, ttl)
+
+    async def load_session(self, token: str):
+        return self.sessions.get(token)
+
+    async def global_status(self) -> dict:
+        return {
+            "is_running": True,
+            "bot_ready": self.bot.is_ready(),
+            "latency": round(self.bot.latency * 1000, 2) if self.bot.is_ready() else 0,
+            "engine": "Akaza Senior V3 (Unified Process)",
+            "track_cache": self.bot.player.cache.stats(),
+            "extractions_deduplicated": self.bot.player.deduplicated,
+            "extraction_pool": self.bot.player.extractor.stats(),
+            "loudness": self.bot.player.loudness.as_dict(),
+            "audio_cache": self.bot.player.audio_cache.as_dict(),
+            "autoplay": self.bot.autoplay.as_dict(),
+            "transition_gaps": self.bot.transition_gap_stats(),
+            "voice": self.bot.voice_mgr.reconnect_stats(),
+            "event_loop": self.bot.watchdog.as_dict(),
+            "governor": self.bot.governor.as_dict(),
+            "dashboard_fanout": self.fanout_stats.as_dict(),
+            "reaper": self.bot.reaper.last_report,
+            "journal": self.bot.journal.stats,
+            "oauth": self.oauth_stats(),
+            "commands": self.command_stats.as_dict()
+        }
+
+    async def control(self, guild_id: int, action: str, params: dict) -> dict:
+        if not self.bot.is_ready():
+            raise HTTPException(status_code=503, detail="Bot engine not ready")
+        
+        guild = self.bot.get_guild(guild_id)
+        if not guild:
+            raise HTTPException(status_code=404, detail="Guild not found")
+
+        params = checked_params(action, params) # Bad input is a 400 now, not a 500 from the queue later
+        # REST and WebSocket commands share one ordered, coalescing queue per guild
+        commands = self.commands.get(guild_id)
+        if commands is None:
+            commands = self.commands[guild_id] = GuildCommandQueue(
+                apply=lambda action, params: self._apply_command(guild_id, action, params),
+                on_batch=lambda: self.notify(guild_id),
+                on_idle=lambda: self.commands.pop(guild_id, None),
+                stats=self.command_stats
+            )
+        return await commands.submit(action, params)
 
-    async def broadcast_state(self, guild_id: int, target_websockets: List[WebSocket] = None):
-        """Broadcasts the current bot state to the dashboard via WebSockets."""
+    async def _apply_command(self, guild_id: int, action: str, params: dict) -> dict:
         state = self.bot.get_guild_state(guild_id)
-        if not state: return
 
-        payload = {
-            "online": True,
+        if action == "play":
+            query = params.get("query")
+            if not query: raise HTTPException(400, "Missing query")
+            vc = state.voice_client
+            if not self.bot.governor.accepting and not (vc and (vc.is_playing() or vc.is_paused())):
+                # Already playing guilds can still queue; only new streams are held back
+                raise HTTPException(503, "The engine is at capacity and can't start new streams. Try again in a minute.")
+            asyncio.create_task(self.bot.dashboard_play(guild_id, query))
+        
+        elif action == "pause":
+            if state.voice_client:
+                state.voice_client.pause()
+                state.is_paused = True
+                state.pause_start_time = time.time()
+        
+        elif action == "resume":
+            if state.voice_client:
+                state.voice_client.resume()
+                state.is_paused = False
+                state.total_paused_duration += time.time() - state.pause_start_time
+        
+        elif action == "skip":
+            if state.voice_client: state.voice_client.stop()
+        
+        elif action == "stop":
+            self.bot.queue_mgr.clear(guild_id)
+            state.current_song = None # Nothing for autoplay to follow
+            if state.voice_client: state.voice_client.stop()
+
+        elif action == "delete_queue":
+            if self.bot.queue_mgr.remove(guild_id, params.get("id")) is None:
+                raise HTTPException(404, "Track no longer in queue")
+
+        elif action == "move_queue":
+            if not self.bot.queue_mgr.move(guild_id, params.get("id"), params["to"]):
+                raise HTTPException(404, "Track no longer in queue")
+
+        elif action == "volume":
+            state.volume = min(max(params["level"] / 100, 0), 2.0)
+            self.bot.player.apply_volume(state)
+
+        elif action == "seek":
+            if not await self.bot.seek(guild_id, params["position"]):
+                raise HTTPException(409, "Nothing is playing")
+
+        elif action == "equalizer":
+            band = params.get("band")
+            if band not in state.EQ_BANDS: raise HTTPException(400, "Unknown equalizer band")
+            state.eq[state.EQ_BANDS.index(band)] = min(max(params["gain"], -EQ_MAX_GAIN_DB), EQ_MAX_GAIN_DB)
+            self.bot.player.apply_effects(state)
+
+        elif action == "bass_boost":
+            state.bass_boost = bool(params.get("enabled"))
+            self.bot.player.apply_effects(state)
+
+        elif action == "auto_play":
+            state.auto_play = bool(params.get("enabled"))
+
+        return {"status": "dispatched", "action": action}
+
+    def oauth_stats(self) -> dict:
+        return {
+            "sessions": len(self.sessions),
+            "guild_lists": self.guild_lists.stats(),
+            "rate_limits": self.rate_limiter.stats()
+        }
+
+    async def metrics_text(self) -> str:
+        return metrics.render()
+
+    async def loop_report(self, top: int) -> dict:
+        return self.bot.watchdog.report(max(1, min(top, 50)))
+
+    async def guild_status(self, guild_id: int) -> dict:
+        state = self.bot.get_guild_state(guild_id)
+        return {"online": True, "connected": state.voice_client is not None}
+
+    async def attach(self, guild_id: int):
+        """A dashboard subscribed to the guild; bring its snapshot up to date."""
+        await self.broadcast_state(guild_id)
+
+    async def _socket_command(self, client: DashboardClient, guild_id: int, message: dict):
+        """Runs a command sent over the dashboard socket and acks it on the same socket."""
+        ack = {"type": "ack", "seq": message.get("seq")}
+        try:
+            ack["result"] = await self.control(guild_id, str(message.get("action")), message.get("params") or {})
+            ack["ok"] = True
+        except HTTPException as e:
+            ack.update(ok=False, status=e.status_code, detail=e.detail)
+        client.push(encode_frame(ack))
+
+    def notify(self, guild_id: int):
+        """Marks a guild's state as changed; dashboards get one delta per burst of changes."""
+        self.bot.journal.mark(guild_id) # Every state change already funnels through here
+        if guild_id not in self.active_websockets:
+            return
+        self._dirty_guilds.add(guild_id)
+        if not self._flush_task or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_dirty())
+
+    async def _flush_dirty(self):
+        await asyncio.sleep(SYNC_COALESCE_DELAY)
+        dirty, self._dirty_guilds = self._dirty_guilds, set()
+        for guild_id in dirty:
+            await self.broadcast_state(guild_id)
+
+    def _capture(self, guild_id: int, state):
+        fields = {
             "connected": state.voice_client is not None,
             "channel": state.voice_client.channel.name if state.voice_client else None,
-            "current_song": state.current_song,
             "is_paused": state.is_paused,
             "volume": int(state.volume * 100),
-            "queue": state.queue_list,
             "bass_boost": state.bass_boost,
             "auto_play": state.auto_play,
             "listeners": state.listeners_count,
-            "elapsed": int(state.get_elapsed()),
-            "history": state.history,
-            "eq_gains": state.eq_gains
+            "eq_gains": state.eq_gains,
+            # Moves only on seek/resume, so a seek always produces a delta carrying the new elapsed
+            "started_at": round(state.start_time + state.total_paused_duration, 1)
         }
+        return fields, state.current_song, self.bot.queue_mgr.get_queue(guild_id), self.bot.queue_mgr.get_history(guild_id)
 
-        websockets = target_websockets if target_websockets is not None else self.active_websockets.get(guild_id, [])
-        dead_ws = []
-        
-        for ws in websockets:
-            try:
-                await ws.send_json(payload)
-            except:
-                dead_ws.append(ws)
-        
-        for dw in dead_ws:
-            if guild_id in self.active_websockets:
-                self.active_websockets[guild_id].remove(dw)
+    async def broadcast_state(self, guild_id: int):
+        """Pushes what changed since the last sync to every dashboard of the guild."""
+        state = self.bot.get_guild_state(guild_id)
+        if not state: return
+
+        snapshot = self.snapshots.get(guild_id)
+        if snapshot is None:
+            snapshot = self.snapshots[guild_id] = GuildSnapshot()
+
+        started = time.perf_counter()
+        delta = snapshot.update(*self._capture(guild_id, state))
+        if not delta:
+            return
+
+        # Elapsed always rides along so clients can re-anchor their local progress timer
+        delta["changes"]["elapsed"] = int(state.get_elapsed())
+        frame = encode_frame(delta) # Encoded once, shared by every subscriber
+        metrics.BROADCAST_SECONDS.observe(time.perf_counter() - started)
+        metrics.BROADCAST_BYTES.observe(len(frame))
+        self.deliver(guild_id, frame)
+
+    def deliver(self, guild_id: int, frame: str):
+        for client in self.active_websockets.get(guild_id, []):
+            client.push(frame)
+
+    def register_gauges(self):
+        """Scrape-time gauges; nothing here runs on the playback hot path."""
+        process = psutil.Process()
+        process.cpu_percent(None) # Prime the CPU counter
+
+        ffmpeg_procs = {} # pid -> psutil.Process, reused so cpu_percent() has a baseline
+
+        def ffmpeg_children():
+            live = {}
+            for child in process.children(recursive=True):
+                try:
+                    if child.name().startswith("ffmpeg"):
+                        live[child.pid] = ffmpeg_procs.get(child.pid) or child
+                except psutil.Error:
+                    pass # Exited between listing and inspection
+            ffmpeg_procs.clear()
+            ffmpeg_procs.update(live)
+            return list(live.values())
+
+        def ffmpeg_cpu_per_stream():
+            children, total = ffmpeg_children(), 0.0
+            for child in children:
+                try:
+                    total += child.cpu_percent(None)
+                except psutil.Error:
+                    pass
+            return round(total / len(children), 2) if children else 0
+
+        metrics.Gauge("akaza_voice_clients", "Connected voice clients.", lambda: len(self.bot.voice_clients))
+        metrics.Gauge("akaza_ffmpeg_processes", "Running FFmpeg child processes.", lambda: len(ffmpeg_children()))
+        metrics.Gauge("akaza_ffmpeg_cpu_percent_per_stream", "Average CPU of FFmpeg children since the previous scrape.", ffmpeg_cpu_per_stream)
+        metrics.Gauge("akaza_loudness_streams", "FFmpeg streams started by loudness handling.",
+                      lambda: [({"filter": "static"}, self.bot.player.loudness.stats["static_streams"]),
+                               ({"filter": "live_loudnorm"}, self.bot.player.loudness.stats["live_streams"]),
+                               ({"filter": "none"}, self.bot.player.loudness.stats["unnormalized_streams"])])
+        metrics.Gauge("akaza_quality_tier", "Load governor quality tier (0 = full quality).", lambda: self.bot.governor.level)
+        metrics.Gauge("akaza_admissions_open", "1 while the load governor lets new streams start.",
+                      lambda: int(self.bot.governor.accepting))
+        metrics.Gauge("akaza_ws_subscribers", "Dashboard WebSocket subscribers per guild.",
+                      lambda: [({"guild": gid}, len(clients)) for gid, clients in self.active_websockets.items()])
+        metrics.Gauge("akaza_process_resident_memory_bytes", "Bot process RSS.", lambda: process.memory_info().rss)
+        metrics.Gauge("akaza_process_cpu_percent", "Bot process CPU usage since the previous scrape.", lambda: process.cpu_percent(None))
+
+    def snapshot_frame(self, guild_id: int) -> str:
+        snapshot = self.snapshots.get(guild_id) or GuildSnapshot()
+        state = self.bot.get_guild_state(guild_id)
+        return encode_frame(snapshot.snapshot(int(state.get_elapsed())))
+
+    def _drop_client(self, guild_id: int, client: DashboardClient):
+        clients = self.active_websockets.get(guild_id)
+        if clients and client in clients:
+            clients.remove(client)
+        if not clients:
+            self.active_websockets.pop(guild_id, None)
+            self.snapshots.pop(guild_id, None)
@@ -0,0 +1,212 @@
+import asyncio
+import collections
+import time
+import httpx
+from fastapi import HTTPException
+from .config import (
+    SESSION_TTL, SESSION_MAX, GUILD_LIST_TTL, GUILD_LIST_STALE, GUILD_LIST_MAX,
+    DISCORD_API_TIMEOUT, DISCORD_MAX_RATE_LIMIT_WAIT
+)
+
+DISCORD_API = "https://discord.com/api"
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"rate limited for {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class SessionStore:
+    """Dashboard sessions (access token -> Discord user) with expiry and an LRU bound."""
+    def __init__(self, ttl: float = SESSION_TTL, max_sessions: int = SESSION_MAX):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = collections.OrderedDict() # token -> (user, expires_at)
+
+    def put(self, token: str, user: dict, ttl: float = None):
+        expires_at = time.time() + min(ttl or self.ttl, self.ttl)
+        self._sessions[token] = (user, expires_at)
+        self._sessions.move_to_end(token)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def get(self, token: str):
+        entry = self._sessions.get(token)
+        if entry is None:
+            return None
+        user, expires_at = entry
+        if expires_at <= time.time():
+            del self._sessions[token]
+            return None
+        self._sessions.move_to_end(token)
+        return user
+
+    def discard(self, token: str):
+        self._sessions.pop(token, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class DiscordRateLimiter:
+    """Honours Discord's rate-limit headers for every call on the shared httpx client.
+
+    Installed as request/response event hooks: requests wait out an exhausted
+    bucket (or a global limit) instead of hitting a 429, and give up with
+    RateLimited when the wait would exceed DISCORD_MAX_RATE_LIMIT_WAIT.
+    Buckets are tracked per token, since user-token limits are per user.
+    """
+    def __init__(self, max_wait: float = DISCORD_MAX_RATE_LIMIT_WAIT):
+        self.max_wait = max_wait
+        self._route_buckets = {} # path -> Discord bucket id
+        self._blocked = {} # (authorization, bucket) -> monotonic time it resets
+        self._global_until = 0.0
+        self.waits = 0
+        self.rejected = 0
+        self.hits_429 = 0
+
+    def install(self, client: httpx.AsyncClient):
+        client.event_hooks["request"].append(self.before_request)
+        client.event_hooks["response"].append(self.after_response)
+
+    def _key(self, request):
+        path = request.url.path
+        return request.headers.get("Authorization", ""), self._route_buckets.get(path, path)
+
+    async def before_request(self, request):
+        now = time.monotonic()
+        wait = max(self._global_until, self._blocked.get(self._key(request), 0)) - now
+        if wait <= 0:
+            return
+        if wait > self.max_wait:
+            self.rejected += 1
+            raise RateLimited(wait)
+        self.waits += 1
+        await asyncio.sleep(wait)
+
+    async def after_response(self, response):
+        headers = response.headers
+        now = time.monotonic()
+        bucket = headers.get("x-ratelimit-bucket")
+        if bucket:
+            self._route_buckets[response.request.url.path] = bucket
+        key = self._key(response.request)
+
+        if response.status_code == 429:
+            self.hits_429 += 1
+            retry_after = float(headers.get("retry-after") or headers.get("x-ratelimit-reset-after") or 1)
+            if headers.get("x-ratelimit-global") or headers.get("x-ratelimit-scope") == "global":
+                self._global_until = now + retry_after
+            else:
+                self._blocked[key] = now + retry_after
+        elif headers.get("x-ratelimit-remaining") == "0":
+            self._blocked[key] = now + float(headers.get("x-ratelimit-reset-after") or 1)
+        else:
+            self._blocked.pop(key, None)
+
+        if len(self._blocked) > 1024:
+            self._blocked = {k: until for k, until in self._blocked.items() if until > now}
+
+    def stats(self):
+        return {"waits": self.waits, "rejected": self.rejected, "hits_429": self.hits_429,
+                "blocked_buckets": sum(1 for until in self._blocked.values() if until > time.monotonic())}
+
+
+class GuildListCache:
+    """Per-user `/users/@me/guilds` cache with stale-while-revalidate.
+
+    Fresh for GUILD_LIST_TTL; after that the cached list is still returned
+    immediately (up to GUILD_LIST_STALE) while one background refresh runs.
+    Concurrent fetches for the same token share a single request, and Discord
+    failures fall back to the stale list when there is one.
+    """
+    def __init__(self, client: httpx.AsyncClient, ttl: float = GUILD_LIST_TTL,
+                 stale: float = GUILD_LIST_STALE, max_users: int = GUILD_LIST_MAX):
+        self.client = client
+        self.ttl = ttl
+        self.stale = stale
+        self.max_users = max_users
+        self._lists = collections.OrderedDict() # token -> (guilds, fetched_at)
+        self._inflight = {}
+        self.hits = self.misses = self.refreshes = self.stale_served = 0
+
+    async def get(self, token: str):
+        entry = self._lists.get(token)
+        if entry is not None:
+            guilds, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age < self.stale:
+                self._lists.move_to_end(token)
+                self.hits += 1
+                if age >= self.ttl and token not in self._inflight:
+                    self.refreshes += 1
+                    self._start_fetch(token).add_done_callback(_consume_error)
+                return guilds
+        self.misses += 1
+        return await asyncio.shield(self._inflight.get(token) or self._start_fetch(token))
+
+    def invalidate(self, token: str):
+        self._lists.pop(token, None)
+
+    def _start_fetch(self, token: str):
+        task = self._inflight[token] = asyncio.create_task(self._fetch(token))
+        task.add_done_callback(lambda _: self._inflight.pop(token, None))
+        return task
+
+    async def _fetch(self, token: str):
+        headers = {'Authorization': f'Bearer {token}'}
+        try:
+            r = await asyncio.wait_for(
+                self.client.get(f"{DISCORD_API}/users/@me/guilds", headers=headers),
+                timeout=DISCORD_API_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            print(f"[DISCORD API] ⏱️ Request timeout after {DISCORD_API_TIMEOUT}s")
+            return self._fallback(token, HTTPException(504, "Discord API timeout. Click refresh button to try again."))
+        except RateLimited as e:
+            print(f"[DISCORD API] ⏳ Rate limited locally for {e.retry_after:.1f}s")
+            return self._fallback(token, HTTPException(429, f"Discord API rate limit. Please try again in {int(e.retry_after) + 1} seconds."))
+
+        print(f"[DISCORD API] Response status: {r.status_code}")
+        if r.status_code == 401:
+            print(f"[DISCORD API] ❌ Token expired or invalid")
+            self.invalidate(token)
+            raise HTTPException(401, "Discord session expired. Please login again.")
+        if r.status_code == 429:
+            print(f"[DISCORD API] ⏳ Rate limited")
+            retry_after = r.headers.get("retry-after", "30")
+            return self._fallback(token, HTTPException(429, f"Discord API rate limit. Please try again in {retry_after} seconds."))
+        if r.status_code != 200:
+            error_text = r.text[:200] if r.text else "Unknown error"
+            print(f"[DISCORD API] ❌ Status {r.status_code}: {error_text}")
+            return self._fallback(token, HTTPException(r.status_code, f"Discord API error: {error_text}"))
+
+        guilds = r.json()
+        if not isinstance(guilds, list):
+            print(f"[DISCORD API] ⚠️ Unexpected response format: {type(guilds)}")
+            if isinstance(guilds, dict):
+                raise HTTPException(500, f"Discord returned error: {guilds.get('message', 'Unknown format')}")
+            raise HTTPException(500, "Invalid response from Discord")
+
+        self._lists[token] = (guilds, time.monotonic())
+        self._lists.move_to_end(token)
+        while len(self._lists) > self.max_users:
+            self._lists.popitem(last=False)
+        return guilds
+
+    def _fallback(self, token: str, error: HTTPException):
+        entry = self._lists.get(token)
+        if entry is None:
+            raise error
+        self.stale_served += 1
+        return entry[0]
+
+    def stats(self):
+        return {"users": len(self._lists), "hits": self.hits, "misses": self.misses,
+                "background_refreshes": self.refreshes, "stale_served": self.stale_served}
+
+
+def _consume_error(task):
+    if not task.cancelled() and task.exception():
+        print(f"[DISCORD API] ⚠️ Background guild refresh failed: {task.exception()}")
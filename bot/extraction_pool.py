@@ -0,0 +1,340 @@
+import asyncio
+import json
+import os
+import sys
+from .config import (
+    EXTRACTION_WORKERS, EXTRACTION_QUEUE_SIZE, EXTRACTION_TIMEOUT,
+    EXTRACTION_WORKER_MAX_JOBS, EXTRACTION_WORKER_MAX_RSS_MB
+)
+
+# Configure yt-dlp for high stability
+YDL_OPTIONS = {
+    'format': 'bestaudio/best',
+    'extractaudio': True,
+    'audioformat': 'mp3',
+    'outtmpl': '%(extractor)s-%(id)s-%(title)s.%(ext)s',
+    'restrictfilenames': True,
+    'noplaylist': True,
+    'nocheckcertificate': True,
+    'ignoreerrors': False,
+    'logtostderr': False,
+    'quiet': True,
+    'no_warnings': True,
+    'default_search': 'auto',
+    'source_address': '0.0.0.0',
+}
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ExtractionError(Exception):
+    """Raised when a worker fails, times out or the pool is saturated."""
+
+
+class ExtractionWorker:
+    """One yt-dlp subprocess speaking JSON lines over stdin/stdout."""
+    def __init__(self, proc):
+        self.proc = proc
+        self.jobs = 0
+        self.rss = 0
+
+    @classmethod
+    async def spawn(cls):
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "bot.extraction_pool",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            cwd=_PROJECT_ROOT,
+            limit=1024 * 1024
+        )
+        return cls(proc)
+
+    async def send(self, request: dict):
+        self.proc.stdin.write(json.dumps(request).encode() + b"\n")
+        await self.proc.stdin.drain()
+
+    async def receive(self):
+        line = await self.proc.stdout.readline()
+        if not line:
+            raise ExtractionError(f"worker {self.proc.pid} exited")
+
+        reply = json.loads(line)
+        if "rss" in reply:
+            # Final reply of a job
+            self.jobs += 1
+            self.rss = reply["rss"]
+        if not reply["ok"]:
+            raise ExtractionError(reply["error"])
+        return reply
+
+    async def request(self, query: str):
+        await self.send({"query": query})
+        return (await self.receive())["data"]
+
+    def is_alive(self):
+        return self.proc.returncode is None
+
+    async def stop(self, kill: bool = False):
+        if not self.is_alive():
+            return
+        try:
+            if kill:
+                self.proc.kill()
+            else:
+                self.proc.stdin.close()
+            await asyncio.wait_for(self.proc.wait(), timeout=5)
+        except (asyncio.TimeoutError, ProcessLookupError):
+            self.proc.kill()
+        except Exception:
+            pass
+
+
+class ExtractionPool:
+    """Runs yt-dlp in recycled worker processes, off the event loop and the GIL."""
+    def __init__(self, size: int = EXTRACTION_WORKERS, queue_size: int = EXTRACTION_QUEUE_SIZE,
+                 timeout: float = EXTRACTION_TIMEOUT, max_jobs: int = EXTRACTION_WORKER_MAX_JOBS,
+                 max_rss_mb: int = EXTRACTION_WORKER_MAX_RSS_MB):
+        self.size = size
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.max_jobs = max_jobs
+        self.max_rss = max_rss_mb * 1024 * 1024
+
+        self._idle = asyncio.Queue()
+        self._spawned = 0
+        self._waiting = 0
+        self._closed = False
+
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.recycled = 0
+
+    async def extract(self, query: str):
+        """Resolves a query in a worker; raises ExtractionError on failure."""
+        if self._closed:
+            raise ExtractionError("extraction pool is closed")
+        if self._waiting >= self.queue_size:
+            self.rejected += 1
+            raise ExtractionError("extraction queue is full")
+
+        self._waiting += 1
+        try:
+            worker = await self._acquire()
+        finally:
+            self._waiting -= 1
+
+        try:
+            data = await asyncio.wait_for(worker.request(query), timeout=self.timeout)
+            self.completed += 1
+            return data
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            await worker.stop(kill=True)
+            raise ExtractionError(f"extraction timed out after {self.timeout}s")
+        except ExtractionError:
+            self.failed += 1
+            raise
+        except asyncio.CancelledError:
+            # The reply may still be in flight; the worker's pipe is no longer trustworthy
+            await worker.stop(kill=True)
+            raise
+        finally:
+            await self._release(worker)
+
+    async def extract_playlist(self, url: str, batch_size: int = 50):
+        """Async generator of placeholder-song batches for a playlist/mix URL.
+
+        The first batch holds a single entry so playback can begin while the
+        rest of the playlist is still being paged in by the worker. A reader
+        task drains the worker into a buffer and releases it after the last
+        page, so a consumer that is slow, or extracts tracks itself between
+        batches, never keeps a worker checked out.
+        """
+        if self._closed:
+            raise ExtractionError("extraction pool is closed")
+        if self._waiting >= self.queue_size:
+            self.rejected += 1
+            raise ExtractionError("extraction queue is full")
+
+        self._waiting += 1
+        try:
+            worker = await self._acquire()
+        finally:
+            self._waiting -= 1
+
+        pages = asyncio.Queue() # Batches, then an ExtractionError or None once the worker is released
+        reader = asyncio.create_task(self._read_playlist(worker, url, batch_size, pages))
+        try:
+            while True:
+                page = await pages.get()
+                if page is None:
+                    return
+                if isinstance(page, ExtractionError):
+                    raise page
+                yield page
+        finally:
+            if not reader.done():
+                reader.cancel() # Consumer stopped early: the reader kills the worker mid-playlist
+            await asyncio.gather(reader, return_exceptions=True)
+
+    async def _read_playlist(self, worker, url: str, batch_size: int, pages: asyncio.Queue):
+        finished = False
+        try:
+            await worker.send({"query": url, "mode": "playlist", "batch_size": batch_size})
+            while True:
+                reply = await asyncio.wait_for(worker.receive(), timeout=self.timeout)
+                if reply.get("done"):
+                    finished = True
+                    self.completed += 1
+                    return
+                pages.put_nowait(reply["partial"])
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            pages.put_nowait(ExtractionError(f"playlist page timed out after {self.timeout}s"))
+        except ExtractionError as e:
+            finished = True # The worker sent its final (error) reply
+            self.failed += 1
+            pages.put_nowait(e)
+        except Exception as e: # Garbled reply: the pipe can't be trusted any more
+            self.failed += 1
+            pages.put_nowait(ExtractionError(f"{type(e).__name__}: {e}"))
+        finally:
+            if not finished:
+                # Timed out or cancelled: unread batches are still in the pipe
+                await worker.stop(kill=True)
+            await self._release(worker)
+            pages.put_nowait(None)
+
+    async def _acquire(self):
+        if self._idle.empty() and self._spawned < self.size:
+            self._spawned += 1
+            try:
+                return await ExtractionWorker.spawn()
+            except Exception:
+                self._spawned -= 1
+                raise
+        try:
+            # Bounded, so a worker that never comes back can't hang every /play behind it
+            return await asyncio.wait_for(self._idle.get(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise ExtractionError(f"no extraction worker free after {self.timeout}s")
+
+    async def _release(self, worker):
+        if worker.is_alive() and (worker.jobs >= self.max_jobs or worker.rss >= self.max_rss):
+            self.recycled += 1
+            await worker.stop()
+
+        if self._closed:
+            await worker.stop(kill=True)
+            self._spawned -= 1
+        elif worker.is_alive():
+            self._idle.put_nowait(worker)
+        else:
+            self._spawned -= 1
+            if self._waiting:
+                # Callers are parked on _idle; hand them a fresh worker right away
+                self._spawned += 1
+                try:
+                    self._idle.put_nowait(await ExtractionWorker.spawn())
+                except Exception as e:
+                    self._spawned -= 1
+                    print(f"[ERROR] Extraction worker respawn failed: {e}")
+
+    async def close(self):
+        self._closed = True
+        while not self._idle.empty():
+            worker = self._idle.get_nowait()
+            await worker.stop(kill=True)
+            self._spawned -= 1
+
+    def stats(self):
+        return {
+            "workers": self._spawned,
+            "idle": self._idle.qsize(),
+            "waiting": self._waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "recycled": self.recycled,
+        }
+
+
+def _song_from_entry(entry: dict):
+    """Lightweight placeholder for a flat playlist entry; the stream URL is resolved later."""
+    thumbnail = entry.get('thumbnail')
+    if not thumbnail and entry.get('thumbnails'):
+        thumbnail = entry['thumbnails'][-1].get('url')
+    return {
+        'title': entry.get('title') or entry.get('id') or 'Unknown',
+        'url': None,
+        'thumbnail': thumbnail,
+        'duration': entry.get('duration'),
+        'original_url': entry.get('webpage_url') or entry.get('url')
+    }
+
+
+def _stream_playlist(ydl, url: str, channel, batch_size: int):
+    """Writes playlist entries as partial replies: the first one alone, then in batches."""
+    info = ydl.extract_info(url, download=False, process=False)
+    if info.get('_type') == 'url':
+        info = ydl.extract_info(info['url'], download=False, process=False)
+
+    batch, limit = [], 1 # First track goes out alone so playback can start right away
+    for entry in info.get('entries') or [info]:
+        if not entry:
+            continue
+        batch.append(_song_from_entry(entry))
+        if len(batch) >= limit:
+            channel.write(json.dumps({"ok": True, "partial": batch}) + "\n")
+            batch, limit = [], batch_size
+    if batch:
+        channel.write(json.dumps({"ok": True, "partial": batch}) + "\n")
+
+
+def _worker_main():
+    """Worker process loop: one JSON request per line in, one JSON reply per line out."""
+    import psutil
+    import yt_dlp
+
+    # Keep the protocol channel private; anything yt-dlp prints goes to stderr
+    channel = os.fdopen(os.dup(sys.stdout.fileno()), "w", buffering=1)
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    proc = psutil.Process()
+    ydl = yt_dlp.YoutubeDL(YDL_OPTIONS)
+    playlist_ydl = None
+
+    for line in sys.stdin:
+        request = json.loads(line)
+        query = request["query"]
+        try:
+            if request.get("mode") == "playlist":
+                if playlist_ydl is None:
+                    playlist_ydl = yt_dlp.YoutubeDL({**YDL_OPTIONS, 'noplaylist': False, 'extract_flat': 'in_playlist'})
+                _stream_playlist(playlist_ydl, query, channel, request.get("batch_size", 50))
+                reply = {"ok": True, "done": True}
+            else:
+                is_url = query.startswith('http')
+                data = ydl.extract_info(query if is_url else f"ytsearch:{query}", download=False)
+                if 'entries' in data:
+                    data = data['entries'][0]
+                reply = {"ok": True, "data": {
+                    'title': data['title'],
+                    'url': data['url'],
+                    'thumbnail': data.get('thumbnail'),
+                    'duration': data.get('duration'),
+                    'original_url': data.get('webpage_url')
+                }}
+        except Exception as e:
+            reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+        reply["rss"] = proc.memory_info().rss
+        channel.write(json.dumps(reply) + "\n")
+
+
+if __name__ == "__main__":
+    _worker_main()
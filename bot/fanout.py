@@ -0,0 +1,120 @@
+import asyncio
+import collections
+import inspect
+import json
+import time
+from .config import WS_SEND_TIMEOUT, WS_CLIENT_BUFFER, WS_MAX_OVERFLOWS
+
+try:
+    import orjson
+
+    def encode_frame(payload) -> str:
+        return orjson.dumps(payload).decode()
+except ImportError:
+    def encode_frame(payload) -> str:
+        return json.dumps(payload, separators=(",", ":"))
+
+
+class FanoutStats:
+    """Counters shared by every dashboard client."""
+    def __init__(self):
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.clients_dropped = 0
+        self.send_timeouts = 0
+        self.latencies = collections.deque(maxlen=500) # enqueue -> sent, seconds
+
+    def as_dict(self):
+        lat = sorted(self.latencies)
+        p = lambda q: round(lat[min(len(lat) - 1, int(len(lat) * q))] * 1000, 2) if lat else 0
+        return {
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped,
+            "clients_dropped": self.clients_dropped,
+            "send_timeouts": self.send_timeouts,
+            "latency_p50_ms": p(0.5),
+            "latency_p99_ms": p(0.99),
+        }
+
+
+class DashboardClient:
+    """One dashboard socket with its own bounded outbound buffer and sender task.
+
+    Broadcasts only enqueue pre-encoded frames, so a slow socket never blocks
+    the others. When the buffer overflows its pending deltas are thrown away and
+    replaced by a single fresh snapshot; clients that keep overflowing are cut.
+    """
+    def __init__(self, websocket, snapshot_factory, stats: FanoutStats, on_close):
+        self.websocket = websocket
+        self.stats = stats
+        self._snapshot_factory = snapshot_factory
+        self._on_close = on_close
+        self._pending = collections.deque()
+        self._needs_snapshot = True # Every client starts from a full snapshot
+        self._overflows = 0
+        self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        self._task = asyncio.create_task(self._sender())
+        self.closed = False
+
+    def push(self, frame: str):
+        if self.closed:
+            return
+        if len(self._pending) >= WS_CLIENT_BUFFER:
+            self.stats.frames_dropped += len(self._pending)
+            self._pending.clear()
+            self._needs_snapshot = True
+            self._overflows += 1
+            if self._overflows >= WS_MAX_OVERFLOWS:
+                print(f"[WS] ⚠️ Dropping lagging dashboard client")
+                asyncio.create_task(self.close(lagged=True))
+                return
+        else:
+            self._pending.append((frame, time.perf_counter()))
+        self._wakeup.set()
+
+    def request_snapshot(self):
+        self._needs_snapshot = True
+        self._wakeup.set()
+
+    async def _sender(self):
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                while self._pending or self._needs_snapshot:
+                    if self._needs_snapshot:
+                        # The snapshot already contains everything still queued
+                        self._needs_snapshot = False
+                        self._pending.clear()
+                        frame, queued_at = self._snapshot_factory(), time.perf_counter()
+                        if inspect.isawaitable(frame): # Fetched from the bot process when split
+                            frame = await frame
+                    else:
+                        frame, queued_at = self._pending.popleft()
+
+                    await asyncio.wait_for(self.websocket.send_text(frame), timeout=WS_SEND_TIMEOUT)
+                    self.stats.frames_sent += 1
+                    self.stats.latencies.append(time.perf_counter() - queued_at)
+                self._overflows = 0
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self.stats.send_timeouts += 1
+            await self.close(lagged=True)
+        except Exception:
+            await self.close()
+
+    async def close(self, lagged: bool = False):
+        if self.closed:
+            return
+        self.closed = True
+        if lagged:
+            self.stats.clients_dropped += 1
+        self._on_close(self)
+        if asyncio.current_task() is not self._task:
+            self._task.cancel()
+        try:
+            await self.websocket.close()
+        except Exception:
+            pass
@@ -0,0 +1,185 @@
+import asyncio
+import sys
+import time
+import psutil
+from .config import REAPER_INTERVAL, VOICE_IDLE_GRACE, CACHE_CLEAR_INTERVAL, GUILD_MEMORY_BUDGET_MB
+from .track import Track
+
+_DEFAULT_EQ = (0, 0, 0)
+
+
+def estimate_track_bytes(track: Track) -> int:
+    return sys.getsizeof(track) + sum(sys.getsizeof(getattr(track, slot)) for slot in Track.__slots__)
+
+
+def estimate_guild_bytes(state, queue, history) -> int:
+    """Approximate bytes held by one guild: state object, its eq list and every queued/history Track."""
+    size = sys.getsizeof(state) + sys.getsizeof(state.eq) + sys.getsizeof(state.stream_url)
+    for items in (queue, history):
+        size += sys.getsizeof(items) + sum(estimate_track_bytes(t) for t in items)
+    return size
+
+
+class GuildReaper:
+    """Frees voice connections, FFmpeg processes and state of guilds nobody is using.
+
+    Every REAPER_INTERVAL seconds it:
+      1. disconnects from voice channels that have been empty (or idle with
+         nothing queued) for VOICE_IDLE_GRACE seconds, tearing down sources;
+      2. evicts GuildState/queue/history of guilds untouched for
+         CACHE_CLEAR_INTERVAL, keeping only a compact dormant tuple when the
+         guild has non-default settings or pending songs;
+      3. if the estimated footprint of all guilds is over GUILD_MEMORY_BUDGET_MB,
+         evicts the coldest idle guilds early until it fits.
+    """
+    def __init__(self, bot):
+        self.bot = bot
+        self.dormant = {} # guild_id -> (volume, bass_boost, auto_play, eq, queued Tracks)
+        self.last_report = {}
+        self._process = psutil.Process()
+
+    async def run(self):
+        while not self.bot.is_closed():
+            await asyncio.sleep(REAPER_INTERVAL)
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"[REAPER] ❌ Sweep failed: {type(e).__name__}: {e}")
+
+    async def sweep(self):
+        rss_before = self._process.memory_info().rss
+        now = time.time()
+        disconnected = processes = evicted = frozen = 0
+        evicted_bytes = 0
+
+        for guild_id, state in list(self.bot.guild_states.items()):
+            vc = state.voice_client
+            if vc is not None:
+                if self._is_idle(state, now):
+                    processes += await self.release_voice(state)
+                    disconnected += 1
+                continue
+
+            if guild_id in self.bot.bridge.active_websockets or now - state.last_active < CACHE_CLEAR_INTERVAL:
+                continue
+
+            evicted_bytes += self._estimate_bytes(guild_id, state)
+            frozen += self.freeze(guild_id, state)
+            evicted += 1
+
+        footprint = self.estimate_footprint()
+        budget = GUILD_MEMORY_BUDGET_MB * 1024 * 1024
+        if footprint > budget:
+            cold = sorted(
+                (s for gid, s in self.bot.guild_states.items()
+                 if s.voice_client is None and gid not in self.bot.bridge.active_websockets),
+                key=lambda s: s.last_active
+            )
+            for state in cold:
+                if footprint <= budget:
+                    break
+                freed = self._estimate_bytes(state.guild_id, state)
+                footprint -= freed
+                evicted_bytes += freed
+                frozen += self.freeze(state.guild_id, state)
+                evicted += 1
+
+        rss_after = self._process.memory_info().rss
+        self.last_report = {
+            "at": int(now),
+            "disconnected": disconnected,
+            "ffmpeg_killed": processes,
+            "states_evicted": evicted,
+            "states_dormant": frozen,
+            "dormant_total": len(self.dormant),
+            "evicted_bytes_est": evicted_bytes,
+            "footprint_bytes_est": footprint,
+            "budget_bytes": budget,
+            "rss_delta_bytes": rss_before - rss_after,
+        }
+        if disconnected or evicted:
+            print(f"[REAPER] 🧹 Disconnected {disconnected} idle voice clients, killed {processes} FFmpeg, "
+                  f"evicted {evicted} guild states (~{evicted_bytes // 1024} KiB, {frozen} kept dormant)")
+
+    def _is_idle(self, state, now: float) -> bool:
+        vc = state.voice_client
+        channel = getattr(vc, "channel", None)
+        listeners = [m for m in getattr(channel, "members", []) if not m.bot]
+        state.listeners_count = len(listeners)
+
+        playing = vc.is_connected() and (vc.is_playing() or vc.is_paused())
+        has_queue = bool(self.bot.queue_mgr.get_queue(state.guild_id))
+        if listeners and (playing or has_queue):
+            state.idle_since = 0
+            return False
+
+        if not state.idle_since:
+            state.idle_since = now
+            return False
+        return now - state.idle_since >= VOICE_IDLE_GRACE
+
+    async def release_voice(self, state) -> int:
+        """Disconnects a guild's voice client and kills its FFmpeg sources."""
+        vc = state.voice_client
+        state.voice_client = None # play_next sees this and won't pop the queue
+        state.releasing = True # ...nor touch the state while disconnect() fires `after`
+        state.idle_since = 0
+        killed = 0
+
+        if getattr(vc, "source", None) is not None:
+            killed += 1 # Stopped by disconnect() below
+        if state.prefetched and state.prefetched[1] is not None:
+            killed += 1
+        self.bot.take_prefetched(state, None)
+
+        if state.current_song:
+            # Parked here, before the disconnect, so it waits at the queue head whatever `after` does
+            self.bot.hold_for_resume(state.guild_id, state.current_song, state.get_elapsed())
+        state.current_song = None
+        state.stream_url = None
+
+        try:
+            await vc.disconnect(force=True)
+        except Exception as e:
+            print(f"[REAPER] ⚠️ Disconnect failed in guild {state.guild_id}: {e}")
+        finally:
+            state.releasing = False # A late `after` now finds nothing to play or park
+
+        self.bot.bridge.notify(state.guild_id)
+        return killed
+
+    def freeze(self, guild_id: int, state) -> bool:
+        """Drops a cold guild's state, keeping a compact record if it's worth restoring."""
+        del self.bot.guild_states[guild_id]
+        queue, _ = self.bot.queue_mgr.drop(guild_id)
+
+        eq = tuple(state.eq)
+        records = tuple(queue) # Tracks carry no stream URL, so they're already compact
+        if state.volume == 1.0 and not state.bass_boost and state.auto_play and eq == _DEFAULT_EQ and not records:
+            return False
+
+        self.dormant[guild_id] = (state.volume, state.bass_boost, state.auto_play, eq, records)
+        return True
+
+    def thaw(self, guild_id: int, state):
+        """Restores settings and queued songs of a dormant guild into a fresh GuildState."""
+        record = self.dormant.pop(guild_id, None)
+        if record is None:
+            return
+        volume, bass_boost, auto_play, eq, records = record
+        state.volume = volume
+        state.bass_boost = bass_boost
+        state.auto_play = auto_play
+        state.eq = list(eq)
+        self.bot.queue_mgr.restore(guild_id, records) # Still in the journal, so not re-recorded
+
+    def estimate_footprint(self) -> int:
+        """Cheap O(guilds) estimate: sampled bytes per Track times the number of Tracks held."""
+        tracks = self.bot.queue_mgr.total_items()
+        sample = self.bot.queue_mgr.sample()
+        per_track = sum(map(estimate_track_bytes, sample)) // len(sample) if sample else 0
+        per_state = estimate_guild_bytes(next(iter(self.bot.guild_states.values())), (), ()) if self.bot.guild_states else 0
+        return per_state * len(self.bot.guild_states) + per_track * tracks
+
+    def _estimate_bytes(self, guild_id: int, state) -> int:
+        return estimate_guild_bytes(state, self.bot.queue_mgr.get_queue(guild_id), self.bot.queue_mgr.get_history(guild_id))
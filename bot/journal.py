@@ -0,0 +1,279 @@
+import asyncio
+import collections
+import json
+import sqlite3
+import threading
+import time
+from .config import (
+    JOURNAL_PATH, JOURNAL_FLUSH_INTERVAL, JOURNAL_POSITION_INTERVAL,
+    JOURNAL_COMPACT_INTERVAL, JOURNAL_COMPACT_ROWS, JOURNAL_PENDING_MAX, MAX_HISTORY_SIZE
+)
+from .track import Track
+from . import metrics
+
+try:
+    import orjson
+
+    def _dumps(value) -> str:
+        return orjson.dumps(value).decode()
+except ImportError:
+    def _dumps(value) -> str:
+        return json.dumps(value, separators=(",", ":"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS log (seq INTEGER PRIMARY KEY, guild_id INTEGER NOT NULL, op TEXT NOT NULL, args TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS guilds (guild_id INTEGER PRIMARY KEY, record TEXT NOT NULL);
+"""
+
+
+def pack_track(track: Track):
+    return [getattr(track, slot) for slot in Track.__slots__]
+
+
+def unpack_track(row) -> Track:
+    return Track(*row[1:], id=row[0])
+
+
+class GuildRecord:
+    """Everything the journal knows about one guild, as restored on startup."""
+    __slots__ = ('settings', 'now', 'queue', 'history')
+
+    def __init__(self):
+        self.settings = None # [volume, bass_boost, auto_play, eq]
+        self.now = None # [voice channel id, packed track or None, position, paused]
+        self.queue = collections.deque()
+        self.history = collections.deque(maxlen=MAX_HISTORY_SIZE)
+
+    def apply(self, op: str, args):
+        if op == 'enqueue':
+            self.queue.append(args[0])
+        elif op == 'next':
+            index = self._find(args[0])
+            if index is not None:
+                self.history.appendleft(self.queue[index])
+                del self.queue[index]
+        elif op == 'remove':
+            index = self._find(args[0])
+            if index is not None:
+                del self.queue[index]
+        elif op == 'move':
+            index = self._find(args[0])
+            if index is not None:
+                row = self.queue[index]
+                del self.queue[index]
+                self.queue.insert(max(0, min(args[1], len(self.queue))), row)
+        elif op == 'clear':
+            self.queue.clear()
+        elif op == 'state':
+            self.settings, self.now = args
+
+    def _find(self, item_id):
+        for index, row in enumerate(self.queue):
+            if row[0] == item_id:
+                return index
+        return None
+
+    def dump(self):
+        return [self.settings, self.now, list(self.queue), list(self.history)]
+
+    @classmethod
+    def load(cls, data):
+        record = cls()
+        record.settings, record.now, queue, history = data
+        record.queue.extend(queue)
+        record.history.extend(history)
+        return record
+
+
+class PlaybackJournal:
+    """Append-only SQLite (WAL) journal of queue and playback mutations.
+
+    Mutations are appended to an in-memory list on the hot path and written by
+    a background task in one transaction every JOURNAL_FLUSH_INTERVAL, so a
+    burst costs a single fsync off the event loop. The log is periodically
+    folded into one snapshot row per guild. On startup `load()` replays
+    snapshot + log to rebuild queues, settings and the now-playing position.
+    Buffered rows are only dropped once their transaction has committed; a
+    failed write puts them back, in order, for the next flush. If writes keep
+    failing, the oldest past JOURNAL_PENDING_MAX are dropped and the next
+    write is a full compaction, which restores a consistent log.
+    """
+    def __init__(self, bot, path: str = JOURNAL_PATH):
+        self.bot = bot
+        self.path = path
+        self._pending = []
+        self._dirty = set() # Guilds whose settings/now-playing must be re-captured
+        self._lock = threading.Lock()
+        self._writing = asyncio.Lock() # One flush/compaction at a time, in order; close() waits for it
+        self._db = None
+        self._log_rows = 0
+        self._resync = False # Entries were dropped: only a compaction makes the log whole again
+        self.stats = {"flushes": 0, "entries": 0, "compactions": 0, "dropped": 0, "last_flush_ms": 0.0}
+
+    def open(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=FULL") # Every batch commit is durable
+            self._db.executescript(_SCHEMA)
+            self._log_rows = self._db.execute("SELECT COUNT(*) FROM log").fetchone()[0]
+        return self._db
+
+    # --- Hot path (event loop, no I/O) ---
+    def record(self, guild_id: int, op: str, *args):
+        self._pending.append((guild_id, op, args))
+
+    def mark(self, guild_id: int):
+        """Settings or now-playing changed; captured at the next flush."""
+        self._dirty.add(guild_id)
+
+    # --- Background writer ---
+    async def run(self):
+        last_positions = last_compact = time.monotonic()
+        while not self.bot.is_closed():
+            await asyncio.sleep(JOURNAL_FLUSH_INTERVAL)
+            now = time.monotonic()
+            try:
+                if now - last_positions >= JOURNAL_POSITION_INTERVAL:
+                    self._dirty.update(gid for gid, s in self.bot.guild_states.items() if s.current_song)
+                    last_positions = now
+                if now - last_compact >= JOURNAL_COMPACT_INTERVAL or self._log_rows >= JOURNAL_COMPACT_ROWS or self._resync:
+                    await self.compact()
+                    last_compact = now
+                else:
+                    await self.flush()
+            except Exception as e:
+                print(f"[JOURNAL] ❌ Write failed: {type(e).__name__}: {e}")
+
+    def _take_batch(self):
+        for guild_id in self._dirty:
+            state = self.bot.guild_states.get(guild_id)
+            if state is not None:
+                self._pending.append((guild_id, 'state', self.capture_state(state)))
+        self._dirty.clear()
+        batch, self._pending = self._pending, []
+        return batch
+
+    def _keep(self, batch):
+        """Puts a batch whose write failed back in front of anything recorded since."""
+        self._pending[:0] = batch
+        excess = len(self._pending) - JOURNAL_PENDING_MAX
+        if excess > 0:
+            del self._pending[:excess]
+            self._resync = True
+            self.stats["dropped"] += excess
+            metrics.JOURNAL_DROPPED.inc(excess)
+            print(f"[JOURNAL] ⚠️ Dropped the {excess} oldest unwritten entries; the next compaction restores the log")
+        print(f"[JOURNAL] ⚠️ {len(self._pending)} entries kept for the next flush")
+
+    async def flush(self):
+        async with self._writing:
+            batch = self._take_batch()
+            if not batch:
+                return
+            rows = [(guild_id, op, _dumps(args)) for guild_id, op, args in batch]
+            try:
+                await asyncio.to_thread(self._write, rows)
+            except Exception:
+                self._keep(batch)
+                raise
+
+    @staticmethod
+    def _transaction(db, work):
+        db.execute("BEGIN")
+        try:
+            work()
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def _write(self, rows):
+        started = time.perf_counter()
+        with self._lock:
+            db = self.open()
+            self._transaction(db, lambda: db.executemany("INSERT INTO log (guild_id, op, args) VALUES (?, ?, ?)", rows))
+            self._log_rows += len(rows)
+        self.stats["flushes"] += 1
+        self.stats["entries"] += len(rows)
+        self.stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    async def compact(self):
+        """Replaces the whole log with one snapshot row per guild."""
+        async with self._writing:
+            batch = self._take_batch() # Superseded by the snapshot taken in the same loop tick, once it commits
+            rows = [(guild_id, _dumps(record.dump())) for guild_id, record in self.capture_all().items()]
+            try:
+                await asyncio.to_thread(self._rewrite, rows)
+            except Exception:
+                self._keep(batch) # The old log is still intact, so they are appended to it
+                raise
+            self._resync = False
+
+    def _rewrite(self, rows):
+        def replace():
+            db.execute("DELETE FROM log")
+            db.execute("DELETE FROM guilds")
+            db.executemany("INSERT INTO guilds (guild_id, record) VALUES (?, ?)", rows)
+
+        with self._lock:
+            db = self.open()
+            self._transaction(db, replace)
+            db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._log_rows = 0
+        self.stats["compactions"] += 1
+
+    # --- Capture (event loop) ---
+    def capture_state(self, state):
+        vc = state.voice_client
+        channel_id = vc.channel.id if vc is not None and getattr(vc, "channel", None) else None
+        song = state.current_song
+        if song is not None:
+            now = [channel_id, pack_track(song), round(state.get_elapsed(), 1), state.is_paused]
+        elif state.resume_at is not None:
+            # Held at the queue head after a voice drop: keep the position it resumes from
+            held, position = state.resume_at
+            now = [None, pack_track(held), round(position, 1), True]
+        else:
+            now = [channel_id, None, 0, state.is_paused]
+        return [state.volume, state.bass_boost, state.auto_play, list(state.eq)], now
+
+    def capture_all(self):
+        records = {}
+        for guild_id, (volume, bass_boost, auto_play, eq, queued) in self.bot.reaper.dormant.items():
+            record = records[guild_id] = GuildRecord()
+            record.settings = [volume, bass_boost, auto_play, list(eq)]
+            record.queue.extend(map(pack_track, queued))
+        for guild_id in self.bot.queue_mgr.guild_ids():
+            record = records.setdefault(guild_id, GuildRecord())
+            record.queue.extend(map(pack_track, self.bot.queue_mgr.get_queue(guild_id)))
+            record.history.extend(map(pack_track, self.bot.queue_mgr.get_history(guild_id)))
+        for guild_id, state in self.bot.guild_states.items():
+            record = records.setdefault(guild_id, GuildRecord())
+            record.settings, record.now = self.capture_state(state)
+        return records
+
+    # --- Restore ---
+    def load(self):
+        """Replays snapshot + log into {guild_id: GuildRecord}. Blocking; call via to_thread."""
+        with self._lock:
+            db = self.open()
+            records = {guild_id: GuildRecord.load(json.loads(data))
+                       for guild_id, data in db.execute("SELECT guild_id, record FROM guilds")}
+            for guild_id, op, args in db.execute("SELECT guild_id, op, args FROM log ORDER BY seq"):
+                record = records.get(guild_id)
+                if record is None:
+                    record = records[guild_id] = GuildRecord()
+                record.apply(op, json.loads(args))
+        return records
+
+    async def close(self):
+        """Closes the database once any flush or compaction already running has committed."""
+        async with self._writing:
+            await asyncio.to_thread(self._close)
+
+    def _close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
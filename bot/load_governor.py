@@ -0,0 +1,226 @@
+import asyncio
+import collections
+import os
+import time
+import psutil
+from .config import (
+    GOVERNOR_INTERVAL, GOVERNOR_CPU_CORES, GOVERNOR_MEMORY_LIMIT_MB, GOVERNOR_CPU_HIGH, GOVERNOR_CPU_LOW,
+    GOVERNOR_MEMORY_HIGH, GOVERNOR_MEMORY_LOW, GOVERNOR_LATE_FRAMES_HIGH, GOVERNOR_LATE_FRAMES_LOW,
+    GOVERNOR_MIN_FRAMES, GOVERNOR_STEP_DOWN_AFTER, GOVERNOR_STEP_UP_AFTER, GOVERNOR_HOLD_AFTER,
+    GOVERNOR_REOPEN_AFTER, GOVERNOR_ADMIT_BURST, GOVERNOR_ADMISSION_WAIT, GOVERNOR_RESPAWNS_PER_READING,
+    GOVERNOR_HISTORY, QUALITY_TIERS
+)
+from .audio_effects import frame_stats
+from . import metrics
+
+QualityTier = collections.namedtuple("QualityTier", "name kbps bandwidth live_loudnorm effects")
+TIERS = tuple(QualityTier(*tier) for tier in QUALITY_TIERS)
+
+
+def _read_limit(path: str):
+    try:
+        with open(path) as f:
+            return f.read().split()
+    except OSError:
+        return None
+
+
+def cpu_capacity() -> float:
+    """Cores this process may use: GOVERNOR_CPU_CORES, else the cgroup quota, else every core."""
+    if GOVERNOR_CPU_CORES > 0:
+        return GOVERNOR_CPU_CORES
+    cores = float(os.cpu_count() or 1)
+    quota = _read_limit("/sys/fs/cgroup/cpu.max") # cgroup v2: "<quota> <period>" or "max <period>"
+    if quota and quota[0] != "max":
+        return min(cores, int(quota[0]) / int(quota[1]))
+    quota, period = _read_limit("/sys/fs/cgroup/cpu/cpu.cfs_quota_us"), _read_limit("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+    if quota and period and int(quota[0]) > 0:
+        return min(cores, int(quota[0]) / int(period[0]))
+    return cores
+
+
+def memory_limit() -> int:
+    """Bytes the process tree may hold: GOVERNOR_MEMORY_LIMIT_MB, else the cgroup limit, else RAM."""
+    if GOVERNOR_MEMORY_LIMIT_MB > 0:
+        return GOVERNOR_MEMORY_LIMIT_MB * 1024 * 1024
+    total = psutil.virtual_memory().total
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        limit = _read_limit(path)
+        if limit and limit[0].isdigit() and int(limit[0]) < total: # v1 reports "unlimited" as a huge number
+            return int(limit[0])
+    return total
+
+
+class LoadGovernor:
+    """Trades audio quality, then new streams, for the streams already playing.
+
+    Every GOVERNOR_INTERVAL it reads three signals: CPU of the bot and all
+    its children (FFmpeg, extraction workers) against the CPU budget, their
+    combined RSS against the memory limit, and the share of voice frames
+    read late. A run of hot readings drops one tier of QUALITY_TIERS:
+    lower Opus bitrate and bandwidth, no live loudnorm, no in-process EQ.
+    Background loudness scans and cache transcodes also pause below the top
+    tier. Encoder and EQ changes reach running streams at once. Streams
+    still on live loudnorm are respawned a few per reading, so the step
+    itself doesn't spike the CPU. Still hot at the lowest tier, new
+    streams are held (`admit`) and then turned away. Separate high and low
+    thresholds plus streak counts keep it from flapping. Every change is
+    kept in `changes` and printed.
+    """
+    def __init__(self, bot):
+        self.bot = bot
+        self.level = 0 # Index into TIERS
+        self.accepting = True
+        self.cpu_cores = cpu_capacity()
+        self.memory_limit = memory_limit()
+        self.changes = collections.deque(maxlen=GOVERNOR_HISTORY)
+        self.reading = {}
+        self._process = psutil.Process()
+        self._procs = {} # pid -> psutil.Process, reused so cpu_percent() has a baseline
+        self._frames = (0, 0)
+        self._hot = self._calm = self._cool = 0
+        self._waiters = collections.deque() # Futures of held playback starts, oldest first
+        self._restream = collections.deque() # guild ids whose FFmpeg still runs a dropped tier's filters
+        self.stats = {"admitted": 0, "held": 0, "rejected": 0, "respawned": 0}
+
+    @property
+    def tier(self) -> QualityTier:
+        return TIERS[self.level]
+
+    def encoder_options(self) -> dict:
+        """Opus encoder settings for a new PCM stream (ignored by discord.py for Opus sources)."""
+        return {"bitrate": self.tier.kbps, "bandwidth": self.tier.bandwidth}
+
+    async def run(self):
+        self._frames = (frame_stats.frames, frame_stats.late)
+        await asyncio.to_thread(self._read_load) # Primes the CPU counters
+        while not self.bot.is_closed():
+            await asyncio.sleep(GOVERNOR_INTERVAL)
+            try:
+                self.update(*await asyncio.to_thread(self._read_load), self._late_ratio())
+            except Exception as e:
+                print(f"[GOVERNOR] ❌ Reading failed: {type(e).__name__}: {e}")
+
+    # --- Signals ---
+    def _read_load(self):
+        """CPU (% of the budget) and RSS (share of the limit) of the whole process tree. Runs in a thread."""
+        cpu, rss, procs = 0.0, 0, {}
+        for proc in (self._process, *self._process.children(recursive=True)):
+            proc = self._procs.get(proc.pid, proc)
+            try:
+                cpu += proc.cpu_percent(None)
+                rss += proc.memory_info().rss
+            except psutil.Error:
+                continue # Exited between listing and inspection
+            procs[proc.pid] = proc
+        self._procs = procs
+        return cpu / self.cpu_cores, rss / self.memory_limit
+
+    def _late_ratio(self):
+        frames, late = frame_stats.frames, frame_stats.late
+        (prev_frames, prev_late), self._frames = self._frames, (frames, late)
+        if frames - prev_frames < GOVERNOR_MIN_FRAMES:
+            return None # Too little audio to judge (or the opus pipeline, which Python doesn't pace)
+        return (late - prev_late) / (frames - prev_frames)
+
+    # --- Decisions ---
+    def update(self, cpu: float, memory: float, late):
+        self.reading = {"cpu_percent": round(cpu, 1), "memory": round(memory, 3),
+                        "late_frames": None if late is None else round(late, 4)}
+        hot = cpu >= GOVERNOR_CPU_HIGH or memory >= GOVERNOR_MEMORY_HIGH or (late or 0) >= GOVERNOR_LATE_FRAMES_HIGH
+        calm = cpu < GOVERNOR_CPU_LOW and memory < GOVERNOR_MEMORY_LOW and (late or 0) < GOVERNOR_LATE_FRAMES_LOW
+        self._hot = self._hot + 1 if hot else 0
+        self._calm = self._calm + 1 if calm else 0
+        self._cool = 0 if hot else self._cool + 1
+
+        if self._hot >= GOVERNOR_STEP_DOWN_AFTER and self.level < len(TIERS) - 1:
+            self._set_level(self.level + 1)
+        elif self._hot >= GOVERNOR_HOLD_AFTER and self.accepting:
+            self._set_accepting(False)
+        elif self._cool >= GOVERNOR_REOPEN_AFTER and not self.accepting:
+            self._set_accepting(True)
+        elif self._calm >= GOVERNOR_STEP_UP_AFTER and self.accepting and self.level > 0:
+            self._set_level(self.level - 1)
+
+        self._respawn()
+        if self.accepting:
+            self._release(GOVERNOR_ADMIT_BURST)
+
+    def _reason(self) -> str:
+        late = self.reading["late_frames"]
+        return (f"cpu {self.reading['cpu_percent']:.0f}% of {self.cpu_cores:g} cores, "
+                f"rss {self.reading['memory']:.0%}, late frames {'n/a' if late is None else f'{late:.1%}'}")
+
+    def _record(self, icon: str, kind: str, before: str, after: str):
+        reason = self._reason()
+        self.changes.append({"at": round(time.time()), "kind": kind, "from": before, "to": after, "reason": reason})
+        metrics.GOVERNOR_CHANGES.inc()
+        print(f"[GOVERNOR] {icon} {kind.capitalize()} {before} → {after} ({reason})")
+
+    def _set_level(self, level: int):
+        before = self.tier.name
+        icon = "📉" if level > self.level else "📈"
+        self.level = level
+        self._hot = self._calm = 0 # Give the new tier a few readings to show its effect
+        self._record(icon, "quality", before, self.tier.name)
+
+        player = self.bot.player
+        player.loudness.paused = player.audio_cache.paused = level > 0
+        self._restream.clear()
+        for guild_id, state in list(self.bot.guild_states.items()):
+            if player.apply_quality(state):
+                self._restream.append(guild_id)
+
+    def _set_accepting(self, accepting: bool):
+        self.accepting = accepting
+        self._hot = self._calm = self._cool = 0
+        if accepting:
+            self._record("✅", "admissions", "closed", "open")
+        else:
+            self._record("🚦", "admissions", "open", "closed")
+
+    def _respawn(self):
+        player = self.bot.player
+        for _ in range(min(GOVERNOR_RESPAWNS_PER_READING, len(self._restream))):
+            state = self.bot.guild_states.get(self._restream.popleft())
+            if state and player.apply_quality(state) and player.replace_source(state, state.get_elapsed()):
+                self.stats["respawned"] += 1
+
+    # --- Admission ---
+    async def admit(self, on_hold=None) -> bool:
+        """Waits for room to start a new stream; False once GOVERNOR_ADMISSION_WAIT runs out.
+
+        `on_hold` is awaited first if the start has to wait, to tell the user why.
+        """
+        if self.accepting and not self._waiters:
+            self.stats["admitted"] += 1
+            return True
+        self.stats["held"] += 1
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter) # In line before telling the user, so a release can't pass it by
+        try:
+            if on_hold is not None:
+                await on_hold()
+            await asyncio.wait_for(waiter, GOVERNOR_ADMISSION_WAIT)
+        except asyncio.TimeoutError:
+            self.stats["rejected"] += 1
+            return False
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        self.stats["admitted"] += 1
+        return True
+
+    def _release(self, count: int):
+        while count and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done(): # Timed out or cancelled ones are skipped
+                waiter.set_result(None)
+                count -= 1
+
+    def as_dict(self):
+        return dict(
+            self.stats, tier=self.tier._asdict(), accepting=self.accepting, waiting=len(self._waiters),
+            reading=self.reading, cpu_cores=self.cpu_cores, memory_limit_mb=self.memory_limit // (1024 * 1024),
+            changes=list(self.changes)[-20:]
+        )
@@ -0,0 +1,157 @@
+import asyncio
+import collections
+import os
+import sys
+import threading
+import time
+import traceback
+from .config import (
+    LOOP_WATCHDOG_INTERVAL, LOOP_STALL_THRESHOLD, LOOP_STALL_SAMPLE_INTERVAL, LOOP_STALL_LOG_THRESHOLD,
+    LOOP_STALL_MAX_STACKS, LOOP_STALL_STACK_DEPTH, LOOP_STALL_REPORT_TOP
+)
+from . import metrics
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _short_path(filename: str) -> str:
+    if filename.startswith(_PROJECT_ROOT + os.sep):
+        return os.path.relpath(filename, _PROJECT_ROOT)
+    parts = filename.split(os.sep)
+    if "site-packages" in parts:
+        return "/".join(parts[parts.index("site-packages") + 1:])
+    return "/".join(parts[-2:]) # stdlib: "asyncio/events.py"
+
+
+def _format(frame) -> str:
+    filename, lineno, name = frame
+    return f"{_short_path(filename)}:{lineno} in {name}"
+
+
+class LoopWatchdog:
+    """Measures event-loop lag and finds out what is blocking the loop.
+
+    A heartbeat coroutine wakes every LOOP_WATCHDOG_INTERVAL and records how
+    late it ran. A daemon thread watches the heartbeats. Once one is more
+    than LOOP_STALL_THRESHOLD overdue, it samples the loop thread's Python
+    stack every LOOP_STALL_SAMPLE_INTERVAL until the loop responds again.
+    Samples are grouped by stack and by the task that was running, so the
+    report ranks code paths by how long they held the loop. While the loop
+    is healthy the thread wakes about once per heartbeat and only compares
+    two timestamps.
+    """
+    def __init__(self):
+        self._beat = time.monotonic()
+        self._loop = None
+        self._loop_thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._stacks = {} # (task, frames) -> [samples, stalls, last seen]
+        self._last_key = None # Most recent stack sampled, for the stall log line
+        self._lags = collections.deque(maxlen=1000)
+        self.stats = {"stalls": 0, "samples": 0, "max_lag_ms": 0.0, "stacks_dropped": 0}
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+        try:
+            while True:
+                expected = time.monotonic() + LOOP_WATCHDOG_INTERVAL
+                await asyncio.sleep(LOOP_WATCHDOG_INTERVAL)
+                self._beat = now = time.monotonic()
+                self._record_lag(max(0.0, now - expected))
+        finally:
+            self._stop.set()
+
+    def _record_lag(self, lag: float):
+        self._lags.append(lag)
+        metrics.LOOP_LAG_SECONDS.observe(lag)
+        if lag <= LOOP_STALL_THRESHOLD:
+            return
+        self.stats["stalls"] += 1
+        self.stats["max_lag_ms"] = max(self.stats["max_lag_ms"], round(lag * 1000, 1))
+        metrics.LOOP_STALLS.inc()
+        if lag > LOOP_STALL_LOG_THRESHOLD:
+            where = self._culprit(self._last_key[1]) if self._last_key else "unknown"
+            print(f"[LOOP] 🐢 Event loop blocked for {lag:.2f}s in {where}")
+
+    # --- Watchdog thread ---
+    def _watch(self):
+        stalled_beat = None
+        while not self._stop.is_set():
+            beat = self._beat
+            overdue = time.monotonic() - (beat + LOOP_WATCHDOG_INTERVAL)
+            if overdue < LOOP_STALL_THRESHOLD:
+                self._stop.wait(LOOP_STALL_THRESHOLD - overdue) # Until this beat would count as a stall
+                continue
+            self._sample(new_stall=beat != stalled_beat)
+            stalled_beat = beat
+            self._stop.wait(LOOP_STALL_SAMPLE_INTERVAL)
+
+    def _sample(self, new_stall: bool):
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return
+        summary = traceback.StackSummary.extract(
+            traceback.walk_stack(frame), limit=LOOP_STALL_STACK_DEPTH, lookup_lines=False
+        )
+        frames = tuple((entry.filename, entry.lineno, entry.name) for entry in reversed(summary)) # Innermost last
+        task = asyncio.current_task(self._loop) # Read across threads; only a label
+        key = (task.get_coro().__qualname__ if task else "callback", frames)
+
+        with self._lock:
+            entry = self._stacks.get(key)
+            if entry is None:
+                if len(self._stacks) >= LOOP_STALL_MAX_STACKS:
+                    del self._stacks[min(self._stacks, key=lambda k: self._stacks[k][0])]
+                    self.stats["stacks_dropped"] += 1
+                entry = self._stacks[key] = [0, 0, 0.0]
+            entry[0] += 1
+            entry[1] += new_stall
+            entry[2] = time.time()
+            self._last_key = key
+        self.stats["samples"] += 1
+
+    # --- Reports ---
+    @staticmethod
+    def _culprit(frames) -> str:
+        """Innermost frame of our own code: where the blocking call was made."""
+        for frame in reversed(frames):
+            if frame[0].startswith(_PROJECT_ROOT + os.sep) and "site-packages" not in frame[0]:
+                return _format(frame)
+        return _format(frames[-1]) if frames else "unknown"
+
+    def lag_stats(self) -> dict:
+        lags = sorted(self._lags)
+        if not lags:
+            return {"samples": 0}
+        pick = lambda q: round(lags[min(len(lags) - 1, int(len(lags) * q))] * 1000, 2)
+        return {"samples": len(lags), "p50_ms": pick(0.5), "p99_ms": pick(0.99), "max_ms": round(lags[-1] * 1000, 2)}
+
+    def as_dict(self):
+        return dict(self.stats, lag=self.lag_stats(), threshold_ms=LOOP_STALL_THRESHOLD * 1000)
+
+    def report(self, top: int = LOOP_STALL_REPORT_TOP) -> dict:
+        """The `top` stacks that held the loop longest, innermost frame last."""
+        with self._lock:
+            entries = sorted(self._stacks.items(), key=lambda item: item[1][0], reverse=True)
+        # The same call site shows up under many innermost frames (a big encode is sampled all over json/)
+        hotspots = collections.Counter()
+        for (_, frames), (samples, _, _) in entries:
+            hotspots[self._culprit(frames)] += samples
+        entries = entries[:top]
+        return dict(self.as_dict(), hotspots=[
+            {"where": where, "blocked_ms": round(samples * LOOP_STALL_SAMPLE_INTERVAL * 1000)}
+            for where, samples in hotspots.most_common(top)
+        ], top=[{
+            "where": self._culprit(frames),
+            "blocking_in": _format(frames[-1]) if frames else "unknown",
+            "task": task,
+            "blocked_ms": round(samples * LOOP_STALL_SAMPLE_INTERVAL * 1000),
+            "samples": samples,
+            "stalls": stalls,
+            "last_seen": round(last_seen),
+            "stack": [_format(frame) for frame in frames],
+        } for (task, frames), (samples, stalls, last_seen) in entries])
@@ -0,0 +1,126 @@
+import asyncio
+import collections
+import json
+from .config import (
+    FFMPEG_BEFORE_OPTIONS, FFMPEG_AUDIO_FILTER, LOUDNESS_TARGET_I, LOUDNESS_TARGET_TP,
+    LOUDNESS_MODE, LOUDNESS_ANALYSIS_WORKERS, LOUDNESS_MAX_PENDING, LOUDNESS_ANALYSIS_TIMEOUT, LOUDNESS_CACHE_MAX
+)
+
+# (input_i, input_tp, input_lra, input_thresh, target_offset) as reported by loudnorm
+_FIELDS = ("input_i", "input_tp", "input_lra", "input_thresh", "target_offset")
+
+
+def parse_loudnorm_report(stderr: str):
+    """Extracts the measurement tuple from `loudnorm=print_format=json` output, or None."""
+    start, end = stderr.rfind("{"), stderr.rfind("}")
+    if start < 0 or end < start:
+        return None
+    try:
+        report = json.loads(stderr[start:end + 1])
+        measured = tuple(float(report[field]) for field in _FIELDS)
+    except (ValueError, KeyError):
+        return None
+    # Silence/very short inputs report -inf; those are better left to live loudnorm
+    return measured if all(abs(v) != float("inf") for v in measured) else None
+
+
+def static_gain_db(measured) -> float:
+    """Gain that brings a track to the loudness target without pushing its peaks past the ceiling."""
+    input_i, input_tp = measured[0], measured[1]
+    return min(LOUDNESS_TARGET_I - input_i, LOUDNESS_TARGET_TP - input_tp)
+
+
+def loudness_filter(measured, mode: str = LOUDNESS_MODE) -> str:
+    """FFmpeg filter normalizing a measured track; live single-pass loudnorm if unmeasured."""
+    if measured is None:
+        return FFMPEG_AUDIO_FILTER
+    if mode == "linear":
+        input_i, input_tp, input_lra, input_thresh, offset = measured
+        return (f"{FFMPEG_AUDIO_FILTER}:measured_I={input_i}:measured_TP={input_tp}:measured_LRA={input_lra}"
+                f":measured_thresh={input_thresh}:offset={offset}:linear=true")
+    return f"volume={static_gain_db(measured):.2f}dB"
+
+
+class LoudnessAnalyzer:
+    """Measures each track's loudness once, in the background, and remembers it by track key.
+
+    Playback asks `filter_for(key)`: measured tracks get a static gain (or a
+    linear two-pass loudnorm), everything else keeps the live loudnorm filter
+    while its scan is queued. Scans run in at most LOUDNESS_ANALYSIS_WORKERS
+    FFmpeg processes so they never compete with playback for long, and none
+    start while `paused` (set by the load governor).
+    """
+    def __init__(self):
+        self._measured = collections.OrderedDict() # track key -> measurement tuple (None = unmeasurable)
+        self._pending = set()
+        self._gate = asyncio.Semaphore(LOUDNESS_ANALYSIS_WORKERS)
+        self.paused = False
+        self.stats = {
+            "analyzed": 0, "failed": 0, "skipped": 0, "deferred": 0,
+            "static_streams": 0, "live_streams": 0, "unnormalized_streams": 0
+        }
+
+    def get(self, key: str):
+        measured = self._measured.get(key)
+        if measured is not None:
+            self._measured.move_to_end(key)
+        return measured
+
+    def filter_for(self, key: str, light: bool = False) -> str:
+        """`light` is the cheap variant for a loaded instance: static gain only, unmeasured tracks pass through."""
+        measured = self.get(key) if key else None
+        if measured is None and light:
+            self.stats["unnormalized_streams"] += 1
+            return "anull"
+        self.stats["live_streams" if measured is None else "static_streams"] += 1
+        return loudness_filter(measured, "gain" if light else LOUDNESS_MODE)
+
+    def schedule(self, key: str, url: str):
+        """Queues a background scan unless the track is measured, queued or known to fail."""
+        if not key or not url or key in self._measured or key in self._pending:
+            return
+        if self.paused:
+            self.stats["deferred"] += 1 # Scanned on a later play
+            return
+        if len(self._pending) >= LOUDNESS_MAX_PENDING:
+            self.stats["skipped"] += 1
+            return
+        self._pending.add(key)
+        asyncio.create_task(self._run(key, url))
+
+    async def _run(self, key: str, url: str):
+        try:
+            async with self._gate:
+                measured = await self.analyze(url)
+        except Exception as e:
+            print(f"[LOUDNESS] ⚠️ Analysis failed: {type(e).__name__}: {e}")
+            measured = None
+        finally:
+            self._pending.discard(key)
+
+        self.stats["analyzed" if measured else "failed"] += 1
+        self._measured[key] = measured # Failures are remembered too, so they aren't rescanned every play
+        while len(self._measured) > LOUDNESS_CACHE_MAX:
+            self._measured.popitem(last=False)
+
+    async def analyze(self, url: str):
+        """Runs one loudnorm measurement pass over the whole stream (no audio output)."""
+        reconnect = FFMPEG_BEFORE_OPTIONS.split() if url.startswith("http") else [] # Network inputs only
+        proc = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-hide_banner", "-nostats", *reconnect, "-i", url,
+            "-vn", "-sn", "-dn", "-af", f"{FFMPEG_AUDIO_FILTER}:print_format=json", "-f", "null", "-",
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            _, stderr = await asyncio.wait_for(proc.communicate(), timeout=LOUDNESS_ANALYSIS_TIMEOUT)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return None
+        if proc.returncode != 0:
+            return None
+        return parse_loudnorm_report(stderr.decode(errors="replace"))
+
+    def as_dict(self):
+        return dict(self.stats, measured=sum(1 for m in self._measured.values() if m), pending=len(self._pending))
@@ -0,0 +1,129 @@
+import bisect
+import time
+
+# Latency buckets (seconds) shared by the hot-path histograms
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and two additions."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets=FAST_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        REGISTRY.append(self)
+
+    def observe(self, value: float):
+        self._counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sum += value
+
+    def time(self):
+        return _Timer(self)
+
+    def collect(self):
+        lines, running = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), self._counts):
+            running += count
+            lines.append(f'{self.name}_bucket{{le="{_format_value(bound)}"}} {running}')
+        lines.append(f"{self.name}_sum {self._sum}")
+        lines.append(f"{self.name}_count {running}")
+        return lines
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+        REGISTRY.append(self)
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def collect(self):
+        return [f"{self.name} {_format_value(self.value)}"]
+
+
+class Gauge:
+    """Gauge read at scrape time from a callback returning [(labels, value), ...] or a number."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, callback):
+        self.name = name
+        self.help = help_text
+        self.callback = callback
+        REGISTRY.append(self)
+
+    def collect(self):
+        try:
+            samples = self.callback()
+        except Exception as e:
+            print(f"[METRICS] ⚠️ Gauge {self.name} failed: {e}")
+            return []
+        if not isinstance(samples, list):
+            samples = [({}, samples)]
+        return [f"{self.name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples]
+
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+REGISTRY = []
+
+
+def render() -> str:
+    """Prometheus text exposition format (version 0.0.4)."""
+    out = []
+    for metric in REGISTRY:
+        out.append(f"# HELP {metric.name} {metric.help}")
+        out.append(f"# TYPE {metric.name} {metric.kind}")
+        out.extend(metric.collect())
+    return "\n".join(out) + "\n"
+
+
+# --- Hot-path instruments ---
+EXTRACT_SECONDS = Histogram("akaza_extract_info_seconds", "Time to resolve a track via extract_info (cache hits included).", SLOW_BUCKETS)
+FFMPEG_SPAWN_SECONDS = Histogram("akaza_ffmpeg_spawn_seconds", "Time to create an FFmpeg audio source.")
+TRACK_GAP_SECONDS = Histogram("akaza_track_gap_seconds", "Silence between the end of one track and the start of the next.", SLOW_BUCKETS)
+BROADCAST_SECONDS = Histogram("akaza_broadcast_state_seconds", "Time spent diffing and encoding one guild's dashboard update.")
+BROADCAST_BYTES = Histogram("akaza_broadcast_payload_bytes", "Encoded size of dashboard state frames.", SIZE_BUCKETS)
+VOICE_RECONNECT_SECONDS = Histogram("akaza_voice_reconnect_seconds", "Time from a voice drop until the connection is back.", SLOW_BUCKETS)
+LOOP_LAG_SECONDS = Histogram("akaza_event_loop_lag_seconds", "How late the event loop ran the watchdog heartbeat.")
+LOOP_STALLS = Counter("akaza_event_loop_stalls_total", "Heartbeats late by more than LOOP_STALL_THRESHOLD.")
+GOVERNOR_CHANGES = Counter("akaza_governor_changes_total", "Quality tier and admission changes made by the load governor.")
+JOURNAL_DROPPED = Counter("akaza_journal_dropped_total", "Unwritten journal entries dropped because writes kept failing.")
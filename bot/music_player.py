@@ -1,63 +1,242 @@
 import discord
-import yt_dlp
 import asyncio
-from .config import FFMPEG_OPTIONS
-import gc
-
-# Configure yt-dlp for high stability
-YDL_OPTIONS = {
-    'format': 'bestaudio/best',
-    'extractaudio': True,
-    'audioformat': 'mp3',
-    'outtmpl': '%(extractor)s-%(id)s-%(title)s.%(ext)s',
-    'restrictfilenames': True,
-    'noplaylist': True,
-    'nocheckcertificate': True,
-    'ignoreerrors': False,
-    'logtostderr': False,
-    'quiet': True,
-    'no_warnings': True,
-    'default_search': 'auto',
-    'source_address': '0.0.0.0',
-}
+import contextlib
+from urllib.parse import urlparse, parse_qs
+from .config import (
+    FFMPEG_BEFORE_OPTIONS, FFMPEG_OUTPUT_OPTIONS, AUDIO_PIPELINE,
+    PLAYLIST_BATCH_SIZE, TRACK_CACHE_MAX_BYTES, TRACK_CACHE_QUERY_TTL, TRACK_CACHE_STREAM_TTL, TRACK_CACHE_SAFETY_MARGIN
+)
+from .track_cache import TrackCache, normalize_query
+from .extraction_pool import ExtractionPool, ExtractionError
+from .track import Track
+from .loudness import LoudnessAnalyzer
+from .audio_effects import EffectsSource, ffmpeg_filters
+from .audio_cache import AudioCache
+from . import metrics
 
 class MusicPlayer:
     """Handles audio extraction and playback logic."""
     def __init__(self, bot):
         self.bot = bot
-        self.ydl = yt_dlp.YoutubeDL(YDL_OPTIONS)
+        self.extractor = ExtractionPool()
+        self.cache = TrackCache(
+            max_bytes=TRACK_CACHE_MAX_BYTES,
+            query_ttl=TRACK_CACHE_QUERY_TTL,
+            stream_ttl=TRACK_CACHE_STREAM_TTL,
+            safety_margin=TRACK_CACHE_SAFETY_MARGIN
+        )
+        self.loudness = LoudnessAnalyzer()
+        self.audio_cache = AudioCache()
+        # Single-flight table: normalized query -> shared resolution task
+        self._inflight = {}
+        self.deduplicated = 0
 
-    async def extract_info(self, query: str):
-        """Extracts song metadata and stream URL without blocking the loop."""
-        loop = asyncio.get_event_loop()
+    async def extract_info(self, query: str, requester: str = 'Dashboard'):
+        """Resolves a query or URL into a Track without blocking the loop.
+
+        The stream URL stays in the cache; use stream_url() when it's time to play.
+        """
+        info = await self._lookup(query)
+        if not info:
+            return None
+        track = Track.from_info(info, requester)
+        self.loudness.schedule(track.key, info['url']) # Measured before it's likely to play
+        return track
+
+    async def stream_url(self, track: Track):
+        """Returns a valid stream URL for a track, re-resolving it if it expired or was evicted."""
+        info = await self._lookup(track.key)
+        if not info:
+            return None
+        if track.duration is None:
+            track.duration = info.get('duration')
+        if track.thumbnail is None:
+            track.thumbnail = info.get('thumbnail')
+        self.loudness.schedule(track.key, info['url'])
+        return info['url']
+
+    async def source_url(self, track: Track):
+        """Where to play a track from: its local audio cache copy if there is one, else its stream URL.
+
+        Checked first so a cached track needs neither a worker nor the network to start.
+        """
+        return self.audio_cache.lookup(track.key) or await self.stream_url(track)
+
+    async def _lookup(self, query: str):
+        with metrics.EXTRACT_SECONDS.time():
+            cached = self.cache.get(query)
+            if cached:
+                info, fresh = cached
+                if fresh:
+                    return info
+                # Metadata is still good; only the signed stream URL needs refreshing
+                query = info['original_url'] or query
+
+            key = normalize_query(query)
+            task = self._inflight.get(key)
+            if task:
+                self.deduplicated += 1
+            else:
+                task = asyncio.create_task(self._resolve_and_cache(query))
+                self._inflight[key] = task
+                task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+            # Shielded so one caller giving up doesn't cancel the others' resolution
+            return await asyncio.shield(task)
+
+    @staticmethod
+    def is_playlist_url(query: str) -> bool:
+        if not query.startswith('http'):
+            return False
+        parsed = urlparse(query)
+        return 'list' in parse_qs(parsed.query) or parsed.path.startswith('/playlist') or '/sets/' in parsed.path
+
+    async def iter_playlist(self, url: str, requester: str = 'Dashboard'):
+        """Yields batches of placeholder Tracks for a playlist or mix; streams resolve later."""
         try:
-            # Check if it's already a URL
-            is_url = query.startswith('http')
-            data = await loop.run_in_executor(None, lambda: self.ydl.extract_info(query if is_url else f"ytsearch:{query}", download=False))
-            
-            if 'entries' in data:
-                data = data['entries'][0]
-
-            return {
-                'title': data['title'],
-                'url': data['url'],
-                'thumbnail': data.get('thumbnail'),
-                'duration': data.get('duration'),
-                'requester': 'Dashboard', # Default, updated by bot.py
-                'original_url': data.get('webpage_url')
-            }
-        except Exception as e:
+            async with contextlib.aclosing(self.extractor.extract_playlist(url, batch_size=PLAYLIST_BATCH_SIZE)) as batches:
+                async for batch in batches:
+                    yield [Track.from_info(entry, requester) for entry in batch]
+        except ExtractionError as e:
+            print(f"[ERROR] Playlist import failed for '{url}': {e}")
+
+    async def _resolve_and_cache(self, query: str):
+        info = await self._resolve(query)
+        if info:
+            self.cache.put(query, info)
+        return info
+
+    async def _resolve(self, query: str):
+        """Runs a full yt-dlp extraction for a query or URL in the worker pool."""
+        try:
+            return await self.extractor.extract(query)
+        except ExtractionError as e:
             print(f"[ERROR] Extraction failed for '{query}': {e}")
             return None
-        finally:
-            gc.collect()
 
-    def create_source(self, url: str, volume: float = 1.0):
-        """Creates a high-quality PCM volume transformer for Discord."""
+    async def close(self):
+        await self.extractor.close()
+
+    def create_source(self, url: str, volume: float = 1.0, start: float = 0, key: str = None,
+                      eq=(), bass_boost: bool = False):
+        """Creates the playback source for the configured AUDIO_PIPELINE.
+
+        `key` (Track.key) selects the precomputed loudness correction, if any.
+        `url` comes from source_url(), so it is already the local audio cache
+        copy when there is one. Filters and bitrate follow the load
+        governor's current quality tier.
+        """
+        governor = self.bot.governor
+        tier = governor.tier
+        if not tier.effects:
+            eq, bass_boost = (), False
+        before = FFMPEG_BEFORE_OPTIONS if url.startswith("http") else '' # Reconnect options are for network inputs
+        if start > 0:
+            before = f"-ss {start:.2f} {before}"
+        with metrics.FFMPEG_SPAWN_SECONDS.time():
+            audio_filter = self.loudness.filter_for(key, light=not tier.live_loudnorm)
+            source = self._create_source(url, before, volume, audio_filter, eq, bass_boost, tier.kbps)
+        if source is not None:
+            # What apply_quality() checks when the tier drops under this stream
+            source.quality_level = governor.level
+            source.live_loudnorm = audio_filter.startswith("loudnorm") # Single-pass or linear, both run loudnorm
+        return source
+
+    def _create_source(self, url: str, before: str, volume: float, audio_filter: str, eq, bass_boost: bool, kbps: int):
         try:
-            ffmpeg_src = discord.FFmpegPCMAudio(url, **FFMPEG_OPTIONS)
-            source = discord.PCMVolumeTransformer(ffmpeg_src, volume=volume)
-            return source
+            if AUDIO_PIPELINE == "opus":
+                return self._create_opus_source(url, before, volume, audio_filter, eq, bass_boost, kbps)
+
+            ffmpeg_src = discord.FFmpegPCMAudio(url, before_options=before, options=f'{FFMPEG_OUTPUT_OPTIONS} -af "{audio_filter}"')
+            return EffectsSource(ffmpeg_src, volume=volume, eq=eq, bass_boost=bass_boost)
         except Exception as e:
             print(f"[ERROR] FFmpeg source creation failed: {e}")
             return None
+
+    def _create_opus_source(self, url: str, before: str, volume: float, audio_filter: str, eq, bass_boost: bool, kbps: int):
+        """FFmpeg does volume, EQ, filtering and Opus encoding; Python only forwards packets."""
+        filters = [audio_filter, *ffmpeg_filters(eq, bass_boost)]
+        if volume != 1.0:
+            filters.append(f"volume={volume:.2f}")
+
+        return discord.FFmpegOpusAudio(
+            url,
+            bitrate=kbps,
+            before_options=before,
+            options=f'-vn -af "{",".join(filters)}"'
+        )
+
+    def apply_volume(self, state):
+        """Pushes state.volume to the live source of a guild."""
+        vc = state.voice_client
+        if not vc or not vc.source:
+            return
+
+        if isinstance(vc.source, discord.PCMVolumeTransformer):
+            vc.source.volume = state.volume
+        elif state.current_song:
+            # Opus frames can't be scaled, so FFmpeg is respawned at the current position
+            self.replace_source(state, state.get_elapsed())
+
+    def apply_effects(self, state):
+        """Pushes state.eq / state.bass_boost to the live source of a guild."""
+        vc = state.voice_client
+        if not vc or not vc.source:
+            return
+
+        if isinstance(vc.source, EffectsSource):
+            vc.source.set_effects(*self.effects_for(state)) # Heard from the next frame on
+        elif state.current_song:
+            self.replace_source(state, state.get_elapsed())
+
+    def effects_for(self, state):
+        """EQ and bass boost as the current quality tier allows them."""
+        if self.bot.governor.tier.effects:
+            return state.eq, state.bass_boost
+        return (), False
+
+    def apply_quality(self, state) -> bool:
+        """Moves a guild's live stream to the governor's current tier.
+
+        Encoder bitrate/bandwidth (set from the player thread) and in-process
+        EQ change in place. Returns True when only a new FFmpeg gets it there:
+        an opus-pipeline stream built for a higher tier, or live loudnorm the
+        tier no longer allows.
+        """
+        vc = state.voice_client
+        source = vc.source if vc else None
+        if source is None:
+            return False
+        governor = self.bot.governor
+        tier = governor.tier
+        if isinstance(source, EffectsSource):
+            source.set_effects(*self.effects_for(state))
+            if vc.encoder: # Created by VoiceClient.play() for PCM sources
+                source.retune(vc.encoder, tier.kbps, tier.bandwidth)
+        if getattr(source, "quality_level", governor.level) >= governor.level:
+            return False # Built for this tier or a lower one; upgrades wait for the next track
+        return not isinstance(source, EffectsSource) or (source.live_loudnorm and not tier.live_loudnorm)
+
+    def source_settings(self, state):
+        """What a prefetched source was built with; opus sources must match it to be reused."""
+        return state.volume, tuple(state.eq), state.bass_boost, self.bot.governor.level
+
+    def replace_source(self, state, position: float):
+        """Swaps the playing source in place without firing the `after` callback."""
+        vc = state.voice_client
+        if not vc or not vc.source or not state.current_song or not state.stream_url:
+            return False
+
+        source = self.create_source(state.stream_url, volume=state.volume, start=position, key=state.current_song.key,
+                                    eq=state.eq, bass_boost=state.bass_boost)
+        if not source:
+            return False
+
+        old_source = vc.source
+        if isinstance(source, EffectsSource) and isinstance(old_source, EffectsSource):
+            source.retune_like(old_source) # A retune the old source hadn't applied yet
+        vc.source = source
+        old_source.cleanup()
+        if state.is_paused:
+            vc.pause()
+        return True
@@ -1,50 +1,129 @@
 import collections
+import itertools
+from .config import MAX_QUEUE_SIZE, MAX_HISTORY_SIZE
+from .journal import pack_track
+
+_EMPTY = () # Shared read-only view for guilds without a queue/history
 
 class QueueManager:
-    """Manages per-guild music queues with FIFO behavior."""
-    def __init__(self):
-        self._queues = collections.defaultdict(list)
-        self._history = collections.defaultdict(list)
+    """Manages per-guild music queues with FIFO behavior.
+
+    Queues are deques (O(1) enqueue/dequeue) and history is a bounded ring
+    buffer. Every queued item gets a stable `id` so dashboard edits target the
+    song they meant even if the queue shifted underneath them. Read paths never
+    create per-guild entries.
+    """
+    def __init__(self, max_queue: int = MAX_QUEUE_SIZE, max_history: int = MAX_HISTORY_SIZE, journal=None):
+        self.max_queue = max_queue
+        self.max_history = max_history
+        self.journal = journal # Optional PlaybackJournal recording every mutation
+        self._queues = {}
+        self._history = {}
+        self._ids = itertools.count(1)
 
     def get_queue(self, guild_id: int):
-        return self._queues[guild_id]
+        return self._queues.get(guild_id, _EMPTY)
+
+    def guild_ids(self):
+        return self._queues.keys() | self._history.keys()
 
-    def add_to_queue(self, guild_id: int, item: dict):
+    def add_to_queue(self, guild_id: int, item):
         """adds a song to the guild's queue."""
-        if len(self._queues[guild_id]) < 500: # Limit check from config
-            self._queues[guild_id].append(item)
+        queue = self._queues.get(guild_id)
+        if queue is None:
+            queue = self._queues[guild_id] = collections.deque()
+        if len(queue) < self.max_queue:
+            if item.id is None:
+                item.id = next(self._ids)
+            queue.append(item)
+            if self.journal:
+                self.journal.record(guild_id, 'enqueue', pack_track(item))
             return True
         return False
 
+    def restore(self, guild_id: int, items, history=()):
+        """Puts back previously queued items (dormant or journaled) without re-journaling them."""
+        top = 0
+        queue = self._queues.setdefault(guild_id, collections.deque())
+        for item in items:
+            if len(queue) >= self.max_queue:
+                break
+            queue.append(item)
+            top = max(top, item.id or 0)
+        if history:
+            ring = self._history.setdefault(guild_id, collections.deque(maxlen=self.max_history))
+            ring.extend(history)
+            top = max(top, max(item.id or 0 for item in history))
+        # Keep new ids clear of restored ones
+        upcoming = next(self._ids)
+        self._ids = itertools.count(max(upcoming, top + 1))
+
     def get_next(self, guild_id: int):
         """Pops and returns the next song in queue."""
-        if self._queues[guild_id]:
-            song = self._queues[guild_id].pop(0)
+        queue = self._queues.get(guild_id)
+        if queue:
+            song = queue.popleft()
             self.add_to_history(guild_id, song)
+            if self.journal:
+                self.journal.record(guild_id, 'next', song.id)
             return song
         return None
 
-    def add_to_history(self, guild_id: int, item: dict):
-        self._history[guild_id].insert(0, item)
-        if len(self._history[guild_id]) > 100:
-            self._history[guild_id].pop()
+    def add_to_history(self, guild_id: int, item):
+        history = self._history.get(guild_id)
+        if history is None:
+            history = self._history[guild_id] = collections.deque(maxlen=self.max_history)
+        history.appendleft(item)
 
     def get_history(self, guild_id: int):
-        return self._history[guild_id]
+        return self._history.get(guild_id, _EMPTY)
 
     def clear(self, guild_id: int):
-        self._queues[guild_id].clear()
+        queue = self._queues.get(guild_id)
+        if queue:
+            queue.clear()
+            if self.journal:
+                self.journal.record(guild_id, 'clear')
 
-    def move(self, guild_id: int, from_idx: int, to_idx: int):
-        try:
-            item = self._queues[guild_id].pop(from_idx)
-            self._queues[guild_id].insert(to_idx, item)
-            return True
-        except IndexError:
+    def find(self, guild_id: int, item_id: int):
+        """Returns the current index of a queued item, or None."""
+        for index, item in enumerate(self._queues.get(guild_id, _EMPTY)):
+            if item.id == item_id:
+                return index
+        return None
+
+    def move(self, guild_id: int, item_id: int, to_idx: int):
+        index = self.find(guild_id, item_id)
+        if index is None:
             return False
+        queue = self._queues[guild_id]
+        item = queue[index]
+        del queue[index]
+        queue.insert(max(0, min(to_idx, len(queue))), item)
+        if self.journal:
+            self.journal.record(guild_id, 'move', item_id, to_idx)
+        return True
 
-    def remove(self, guild_id: int, index: int):
-        try:
-            return self._queues[guild_id].pop(index)
-        except IndexError:
+    def remove(self, guild_id: int, item_id: int):
+        index = self.find(guild_id, item_id)
+        if index is None:
             return None
+        queue = self._queues[guild_id]
+        item = queue[index]
+        del queue[index]
+        if self.journal:
+            self.journal.record(guild_id, 'remove', item_id)
+        return item
+
+    def drop(self, guild_id: int):
+        """Forgets a guild entirely; returns its (queue, history) for archiving."""
+        return self._queues.pop(guild_id, _EMPTY), self._history.pop(guild_id, _EMPTY)
+
+    def total_items(self) -> int:
+        """Queued plus history items across all guilds, O(guilds)."""
+        return sum(map(len, self._queues.values())) + sum(map(len, self._history.values()))
+
+    def sample(self, guilds: int = 20, per_guild: int = 5):
+        """A few queued items from a few guilds, for size estimates."""
+        return [item for queue in itertools.islice(self._queues.values(), guilds)
+                for item in itertools.islice(queue, per_guild)]
@@ -0,0 +1,91 @@
+import itertools
+
+SCALAR_FIELDS = ("connected", "channel", "is_paused", "volume", "bass_boost", "auto_play", "listeners", "eq_gains", "started_at")
+
+
+def public_song(song):
+    """Dashboard view of a Track (which never carries the private stream URL)."""
+    if song is None:
+        return None
+    return song.to_public()
+
+
+def fifo_ops(old: list, new: list):
+    """Describes `new` as `old` minus some front items plus appended ones.
+
+    Items are compared by identity, so this is O(len) pointer checks with no
+    serialization. Returns None when the edit isn't of that shape (reorder,
+    removal from the middle) and a full list must be sent instead.
+    """
+    if not new:
+        return {"drop_front": len(old), "append": []}
+
+    first = new[0]
+    start = next((i for i, item in enumerate(old) if item is first), len(old))
+    kept = len(old) - start
+    if kept > len(new) or any(a is not b for a, b in zip(itertools.islice(old, start, None), new)):
+        return None
+    return {"drop_front": start, "append": [public_song(s) for s in itertools.islice(new, kept, None)]}
+
+
+def _same_items(a: list, b: list) -> bool:
+    return len(a) == len(b) and all(x is y for x, y in zip(a, b))
+
+
+class GuildSnapshot:
+    """Last state pushed to a guild's dashboards, with a monotonically increasing version."""
+    def __init__(self):
+        self.version = 0
+        self.fields = {}
+        self.current_song = None
+        self.queue = []
+        self.history = []
+
+    def update(self, fields: dict, current_song, queue: list, history: list):
+        """Records the new state and returns the delta message, or None if unchanged."""
+        changes = {k: v for k, v in fields.items() if self.fields.get(k, ...) != v}
+        if current_song is not self.current_song:
+            changes["current_song"] = public_song(current_song)
+
+        queue_ops = None
+        if not _same_items(queue, self.queue):
+            queue_ops = fifo_ops(self.queue, queue)
+            if queue_ops is None:
+                changes["queue"] = [public_song(s) for s in queue]
+
+        # History is newest-first and bounded: reversed, it behaves like a FIFO
+        history_ops = None
+        if not _same_items(history, self.history):
+            ops = fifo_ops(self.history[::-1], list(reversed(history)))
+            if ops is None:
+                changes["history"] = [public_song(s) for s in history]
+            else:
+                history_ops = {"drop_oldest": ops["drop_front"], "prepend": ops["append"][::-1]}
+
+        if not changes and not queue_ops and not history_ops:
+            return None
+
+        base = self.version
+        self.version += 1
+        self.fields = dict(fields)
+        self.current_song = current_song
+        self.queue = list(queue)
+        self.history = list(history)
+
+        message = {"type": "delta", "version": self.version, "base": base, "changes": changes}
+        if queue_ops:
+            message["queue_ops"] = queue_ops
+        if history_ops:
+            message["history_ops"] = history_ops
+        return message
+
+    def snapshot(self, elapsed: int):
+        state = dict(self.fields)
+        state.update({
+            "online": True,
+            "current_song": public_song(self.current_song),
+            "queue": [public_song(s) for s in self.queue],
+            "history": [public_song(s) for s in self.history],
+            "elapsed": elapsed
+        })
+        return {"type": "snapshot", "version": self.version, "state": state}
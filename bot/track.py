@@ -0,0 +1,51 @@
+import sys
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Track:
+    """Compact record for a queued/playing song.
+
+    Signed stream URLs are deliberately not stored here: they are long, expire,
+    and live in MusicPlayer's TrackCache, resolved on demand via `key`.
+    Repeated strings (requesters, popular titles, thumbnails) are interned.
+    """
+    __slots__ = ('id', 'title', 'original_url', 'thumbnail', 'duration', 'requester')
+
+    def __init__(self, title, original_url=None, thumbnail=None, duration=None, requester='Dashboard', id=None):
+        self.id = id
+        self.title = _intern(title)
+        self.original_url = original_url
+        self.thumbnail = _intern(thumbnail)
+        self.duration = duration
+        self.requester = _intern(requester)
+
+    @classmethod
+    def from_info(cls, info: dict, requester: str = 'Dashboard'):
+        return cls(
+            info.get('title') or 'Unknown',
+            original_url=info.get('original_url'),
+            thumbnail=info.get('thumbnail'),
+            duration=info.get('duration'),
+            requester=requester
+        )
+
+    @property
+    def key(self) -> str:
+        """What to hand extract_info to get (or refresh) this track's stream URL."""
+        return self.original_url or self.title
+
+    def to_public(self) -> dict:
+        return {
+            'id': self.id,
+            'title': self.title,
+            'thumbnail': self.thumbnail,
+            'duration': self.duration,
+            'requester': self.requester,
+            'original_url': self.original_url
+        }
+
+    def __repr__(self):
+        return f"<Track id={self.id} title={self.title!r}>"
@@ -0,0 +1,142 @@
+import collections
+import re
+import sys
+import time
+from urllib.parse import urlparse, parse_qs
+
+_EXPIRE_PATH = re.compile(r"/expire/(\d+)")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Canonical cache key: URLs kept verbatim, searches case/space folded."""
+    query = query.strip()
+    if query.startswith('http'):
+        return query
+    return _SPACES.sub(" ", query).lower()
+
+
+def stream_expiry(url: str, default_ttl: float):
+    """Reads the signed `expire` timestamp from a stream URL (googlevideo style)."""
+    try:
+        parsed = urlparse(url)
+        expire = parse_qs(parsed.query).get('expire')
+        if expire:
+            return float(expire[0])
+        match = _EXPIRE_PATH.search(parsed.path)
+        if match:
+            return float(match.group(1))
+    except (ValueError, TypeError):
+        pass
+    return time.time() + default_ttl
+
+
+class TrackCache:
+    """Bounded LRU of resolved tracks keyed by webpage_url, with query aliases.
+
+    Entries stay servable until their signed stream URL is about to expire;
+    after that they are reported as stale so only the stream URL is re-resolved.
+    """
+    def __init__(self, max_bytes: int, query_ttl: float, stream_ttl: float, safety_margin: float):
+        self.max_bytes = max_bytes
+        self.query_ttl = query_ttl
+        self.stream_ttl = stream_ttl
+        self.safety_margin = safety_margin
+
+        self._tracks = collections.OrderedDict() # webpage_url -> (song, expires_at, size)
+        self._aliases = collections.OrderedDict() # normalized query -> (webpage_url, alias_expires_at)
+        self._bytes = 0
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, query: str):
+        """Returns (info, fresh) for a query or URL, or None on a miss."""
+        now = time.time()
+        key = self._resolve_key(normalize_query(query), now)
+        entry = self._tracks.get(key) if key else None
+        if not entry:
+            self.misses += 1
+            return None
+
+        self._tracks.move_to_end(key)
+        song, expires_at, _ = entry
+        if expires_at - self.safety_margin > now:
+            self.hits += 1
+            return song, True
+
+        self.stale_hits += 1
+        return song, False
+
+    def put(self, query: str, song: dict):
+        """Stores a resolved track and aliases the query that produced it."""
+        key = song.get('original_url') or song['url']
+        entry_song = dict(song)
+
+        size = self._estimate_size(entry_song)
+        old = self._tracks.pop(key, None)
+        if old:
+            self._bytes -= old[2]
+        self._tracks[key] = (entry_song, stream_expiry(song['url'], self.stream_ttl), size)
+        self._bytes += size
+
+        norm = normalize_query(query)
+        if norm != key:
+            if self._aliases.pop(norm, None) is None:
+                self._bytes += sys.getsizeof(norm)
+            self._aliases[norm] = (key, time.time() + self.query_ttl)
+
+        self._enforce_budget()
+
+    def invalidate(self, query: str):
+        key = self._resolve_key(normalize_query(query), time.time())
+        entry = self._tracks.pop(key, None) if key else None
+        if entry:
+            self._bytes -= entry[2]
+
+    def stats(self):
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._tracks),
+            "aliases": len(self._aliases),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def _resolve_key(self, norm: str, now: float):
+        if norm in self._tracks:
+            return norm
+        alias = self._aliases.get(norm)
+        if not alias:
+            return None
+        key, alias_expires_at = alias
+        if alias_expires_at <= now:
+            del self._aliases[norm]
+            self._bytes -= sys.getsizeof(norm)
+            return None
+        self._aliases.move_to_end(norm)
+        return key
+
+    def _enforce_budget(self):
+        while self._bytes > self.max_bytes and self._tracks:
+            _, (_, _, size) = self._tracks.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+        # Aliases pointing at evicted tracks are dropped lazily, oldest first
+        while self._aliases:
+            norm, (key, _) = next(iter(self._aliases.items()))
+            if key in self._tracks and self._bytes <= self.max_bytes:
+                break
+            del self._aliases[norm]
+            self._bytes -= sys.getsizeof(norm)
+
+    @staticmethod
+    def _estimate_size(song: dict) -> int:
+        return sys.getsizeof(song) + sum(sys.getsizeof(v) for v in song.values())
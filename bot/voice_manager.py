@@ -1,33 +1,71 @@
 import discord
 import asyncio
+import collections
+import random
+import time
+from .config import (
+    VOICE_CONNECT_TIMEOUT, VOICE_CONNECT_ATTEMPTS, VOICE_CONNECT_CONCURRENCY,
+    VOICE_RECONNECT_ATTEMPTS, VOICE_RECONNECT_GRACE, VOICE_BACKOFF_BASE, VOICE_BACKOFF_MAX
+)
+from . import metrics
 
 class VoiceManager:
-    """Manages resilient voice connections and channel operations."""
+    """Manages resilient voice connections and channel operations.
+
+    Connects retry with jittered exponential backoff, and at most
+    VOICE_CONNECT_CONCURRENCY handshakes run at once, so a gateway-wide
+    outage doesn't turn into a reconnect stampede. A connection that drops
+    without us leaving (voice-state event or a player that stopped on a dead
+    client) gets a supervisor that rejoins the channel and resumes the
+    interrupted track from its position. Being kicked, or having the channel
+    deleted, releases the voice state instead: the track is parked, not rejoined.
+    """
     def __init__(self, bot):
         self.bot = bot
+        self._gate = asyncio.Semaphore(VOICE_CONNECT_CONCURRENCY)
+        self._supervisors = {} # guild_id -> recovery task
+        self.reconnect_times = collections.deque(maxlen=200) # seconds from drop to audio again
+        self.stats = {"drops": 0, "recovered": 0, "self_healed": 0, "given_up": 0, "removed": 0, "connect_failures": 0}
 
-    async def connect_to(self, channel: discord.VoiceChannel):
+    async def connect_to(self, channel: discord.VoiceChannel, attempts: int = VOICE_CONNECT_ATTEMPTS):
         """Safely connect to a voice channel with retry logic."""
         if not channel: return None
-        
-        try:
-            # Check if someone else is already connected
-            vc = channel.guild.voice_client
+
+        delay = VOICE_BACKOFF_BASE
+        for attempt in range(attempts):
+            if attempt:
+                await asyncio.sleep(random.uniform(0, delay)) # Full jitter
+                delay = min(delay * 2, VOICE_BACKOFF_MAX)
+            vc = await self._connect_once(channel)
             if vc:
-                if vc.channel.id == channel.id:
-                    return vc
-                await vc.move_to(channel)
                 return vc
-            
-            # Fresh connection
-            return await channel.connect(timeout=20.0, reconnect=True)
-        except Exception as e:
-            print(f"[ERROR] Voice connection failed in {channel.guild.name}: {e}")
-            return None
+        return None
+
+    async def _connect_once(self, channel: discord.VoiceChannel):
+        async with self._gate:
+            try:
+                # Check if someone else is already connected
+                vc = channel.guild.voice_client
+                if vc:
+                    if not vc.is_connected():
+                        await vc.disconnect(force=True) # Dead client: start over
+                    elif vc.channel.id == channel.id:
+                        return vc
+                    else:
+                        await vc.move_to(channel)
+                        return vc
+
+                # Fresh connection
+                return await channel.connect(timeout=VOICE_CONNECT_TIMEOUT, reconnect=True)
+            except Exception as e:
+                self.stats["connect_failures"] += 1
+                print(f"[VOICE] ⚠️ Connection to {channel.guild.name} failed: {type(e).__name__}: {e}")
+                return None
 
     async def disconnect_from(self, guild: discord.Guild):
         """Safely disconnect from a voice channel."""
         vc = guild.voice_client
+        self.bot.get_guild_state(guild.id).voice_client = None # Leaving on purpose: don't reconnect
         if vc:
             await vc.disconnect()
             return True
@@ -36,3 +74,79 @@ class VoiceManager:
     def is_connected(self, guild: discord.Guild):
         """Check connection status."""
         return guild.voice_client and guild.voice_client.is_connected()
+
+    # --- Drop recovery ---
+    def on_dropped(self, guild_id: int, channel_id: int):
+        """A voice connection went away; supervise its recovery unless we left on purpose."""
+        state = self.bot.get_guild_state(guild_id)
+        if state.voice_client is None or not channel_id or guild_id in self._supervisors:
+            return # Released by us (leave/reaper), or already being recovered
+        self.stats["drops"] += 1
+        task = self._supervisors[guild_id] = asyncio.create_task(self._recover(guild_id, channel_id))
+        task.add_done_callback(lambda _: self._supervisors.pop(guild_id, None))
+
+    def _removed(self, guild_id: int, channel_id: int, vc) -> bool:
+        """True if Discord took us out on purpose (kick, channel deleted) rather than the network dropping."""
+        guild = self.bot.get_guild(guild_id)
+        if guild is None or guild.get_channel(channel_id) is None:
+            return True
+        ws = getattr(getattr(vc, "_connection", None), "ws", None)
+        return getattr(getattr(ws, "ws", None), "close_code", None) == 4014 # Disconnected by force
+
+    async def _release_removed(self, guild_id: int, state):
+        self.stats["removed"] += 1
+        print(f"[VOICE] 🚪 Removed from voice in guild {guild_id}; releasing instead of reconnecting")
+        await self.bot.reaper.release_voice(state) # Parks the track at the queue head
+
+    async def _recover(self, guild_id: int, channel_id: int):
+        started = time.perf_counter()
+        state = self.bot.get_guild_state(guild_id)
+        if self._removed(guild_id, channel_id, state.voice_client):
+            return await self._release_removed(guild_id, state)
+
+        # discord.py retries the voice websocket itself; give it a moment first
+        await asyncio.sleep(VOICE_RECONNECT_GRACE)
+        if state.voice_client is None:
+            return # Released on purpose meanwhile
+        if not state.voice_client.is_connected() and self._removed(guild_id, channel_id, state.voice_client):
+            return await self._release_removed(guild_id, state) # The close code can trail the voice-state event
+        if state.voice_client.is_connected():
+            await self.bot.resume_playback(guild_id) # In case its player stopped meanwhile
+            self.stats["self_healed"] += 1
+            self._record(started)
+            return
+
+        # Dead for good: park the track (play_next ignores this client from now on)
+        self.bot.release_dead_voice(state)
+        delay = VOICE_BACKOFF_BASE
+        for attempt in range(VOICE_RECONNECT_ATTEMPTS):
+            guild = self.bot.get_guild(guild_id)
+            channel = guild.get_channel(channel_id) if guild else None
+            if channel is None or not any(not m.bot for m in channel.members):
+                break # Nobody left to play for; the queue waits for the next /play
+            vc = await self._connect_once(channel)
+            if vc:
+                state.voice_client = vc
+                await self.bot.resume_playback(guild_id)
+                self.stats["recovered"] += 1
+                self._record(started)
+                print(f"[VOICE] 🔁 Reconnected in {guild.name} after {time.perf_counter() - started:.1f}s")
+                return
+            await asyncio.sleep(random.uniform(0, delay))
+            delay = min(delay * 2, VOICE_BACKOFF_MAX)
+
+        self.stats["given_up"] += 1
+        print(f"[VOICE] ❌ Gave up reconnecting guild {guild_id}; the queue is kept")
+
+    def _record(self, started: float):
+        elapsed = time.perf_counter() - started
+        self.reconnect_times.append(elapsed)
+        metrics.VOICE_RECONNECT_SECONDS.observe(elapsed)
+
+    def reconnect_stats(self) -> dict:
+        times = sorted(self.reconnect_times)
+        stats = dict(self.stats, recovering=len(self._supervisors), samples=len(times))
+        for name, q in (("p50_ms", 0.5), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+            if times:
+                stats[name] = round(times[min(len(times) - 1, int(len(times) * q))] * 1000, 1)
+        return stats
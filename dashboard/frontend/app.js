@@ -13,6 +13,11 @@ let botStatusInterval = null;
 let wsReconnectAttempts = 0;
 const MAX_WS_RECONNECT_S = 30;
 let lastSyncTime = 0;
+let dashState = null;   // Last full state reconstructed from snapshot + deltas
+let dashVersion = -1;
+let commandSeq = 0;
+const pendingCommands = new Map(); // seq -> {resolve, reject} awaiting the server's ack
+const COMMAND_ACK_TIMEOUT_MS = 10000;
 
 function debounce(func, wait) {
     return function executedFunction(...args) {
@@ -209,6 +214,8 @@ function openControlPanel(server) {
 
 function connectWebSocket(guildId) {
     if (ws) ws.close();
+    dashState = null;
+    dashVersion = -1;
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
     ws = new WebSocket(`${protocol}//${window.location.host}/ws/${guildId}`);
 
@@ -219,11 +226,14 @@ function connectWebSocket(guildId) {
     };
 
     ws.onmessage = (event) => {
-        const data = JSON.parse(event.data);
-        updateUI(data);
+        const msg = JSON.parse(event.data);
+        if (msg.type === 'ack') return settleCommand(msg);
+        applyStateMessage(msg);
     };
 
     ws.onclose = () => {
+        pendingCommands.forEach(({ reject }) => reject(new Error("Uplink lost")));
+        pendingCommands.clear();
         if (currentGuildId === guildId) {
             const delay = Math.min(Math.pow(2, wsReconnectAttempts) * 1000, MAX_WS_RECONNECT_S * 1000);
             console.log(`WS connection lost. Retrying in ${delay / 1000}s...`);
@@ -238,6 +248,38 @@ function connectWebSocket(guildId) {
     };
 }
 
+function applyStateMessage(msg) {
+    if (msg.type === 'snapshot') {
+        dashState = msg.state;
+        dashVersion = msg.version;
+        updateUI(dashState);
+        return;
+    }
+    if (msg.type !== 'delta') return updateUI(msg);
+    // Already folded into the snapshot we hold (frames can cross a snapshot in flight)
+    if (dashState && msg.version <= dashVersion) return;
+
+    // Missed an update (or no snapshot yet): ask the server for a fresh snapshot
+    if (!dashState || msg.base !== dashVersion) {
+        if (ws && ws.readyState === WebSocket.OPEN) ws.send(JSON.stringify({ type: 'resync' }));
+        return;
+    }
+
+    const changed = new Set(Object.keys(msg.changes));
+    Object.assign(dashState, msg.changes);
+    if (msg.queue_ops) {
+        dashState.queue = dashState.queue.slice(msg.queue_ops.drop_front).concat(msg.queue_ops.append);
+        changed.add('queue');
+    }
+    if (msg.history_ops) {
+        const kept = dashState.history.slice(0, dashState.history.length - msg.history_ops.drop_oldest);
+        dashState.history = msg.history_ops.prepend.concat(kept);
+        changed.add('history');
+    }
+    dashVersion = msg.version;
+    updateUI(dashState, changed);
+}
+
 async function updateInitialStatus() {
     try {
         const status = await fetchAPI(`/api/server/${currentGuildId}/status`);
@@ -247,7 +289,7 @@ async function updateInitialStatus() {
     }
 }
 
-function updateUI(status) {
+function updateUI(status, changed = null) {
     // Connection Status
     const statusDot = document.getElementById('bot-channel-status');
     if (status.connected) {
@@ -312,11 +354,11 @@ function updateUI(status) {
         if (document.getElementById('eq-high')) document.getElementById('eq-high').value = status.eq_gains.high || 0;
     }
 
-    // Queue
-    renderQueue(status.queue);
+    // Queue (only rebuilt when it actually changed)
+    if (!changed || changed.has('queue')) renderQueue(status.queue);
 
     // History
-    if (status.history) renderHistory(status.history);
+    if (status.history && (!changed || changed.has('history'))) renderHistory(status.history);
 }
 
 function renderHistory(history) {
@@ -360,7 +402,7 @@ function renderQueue(queue) {
             </div>
             <span class="q-time">${formatTime(item.duration)}</span>
             <div class="q-action">
-                <button class="btn-delete-q" onclick="deleteQueueItem(${index})"><i class="fas fa-trash"></i></button>
+                <button class="btn-delete-q" onclick="deleteQueueItem(${item.id})"><i class="fas fa-trash"></i></button>
             </div>
         `;
         qList.appendChild(div);
@@ -421,8 +463,32 @@ document.querySelector('.btn-save').onclick = async () => {
     }
 };
 
-async function deleteQueueItem(index) {
-    await sendControl('delete_queue', { index });
+async function deleteQueueItem(id) {
+    await sendControl('delete_queue', { id });
+}
+
+// Commands go over the live socket when possible; the server coalesces bursts (e.g. volume drags)
+function sendSocketCommand(action, params) {
+    const seq = ++commandSeq;
+    return new Promise((resolve, reject) => {
+        const timer = setTimeout(() => {
+            pendingCommands.delete(seq);
+            reject(new Error("Command timed out"));
+        }, COMMAND_ACK_TIMEOUT_MS);
+        pendingCommands.set(seq, {
+            resolve: (v) => { clearTimeout(timer); resolve(v); },
+            reject: (e) => { clearTimeout(timer); reject(e); }
+        });
+        ws.send(JSON.stringify({ type: 'command', seq, action, params }));
+    });
+}
+
+function settleCommand(ack) {
+    const pending = pendingCommands.get(ack.seq);
+    if (!pending) return;
+    pendingCommands.delete(ack.seq);
+    if (ack.ok) pending.resolve(ack.result);
+    else pending.reject(new Error(ack.detail || "Signal Rejected"));
 }
 
 async function sendControl(action, params = {}) {
@@ -446,15 +512,19 @@ async function sendControl(action, params = {}) {
 
     try {
         params.token = currentToken;
-        const res = await fetch(`${API_URL}/api/server/${currentGuildId}/control?action=${action}`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify(params)
-        });
-
-        if (!res.ok) {
-            const err = await res.json();
-            throw new Error(err.detail || "Signal Rejected");
+        if (ws && ws.readyState === WebSocket.OPEN) {
+            await sendSocketCommand(action, params);
+        } else {
+            const res = await fetch(`${API_URL}/api/server/${currentGuildId}/control?action=${action}`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(params)
+            });
+
+            if (!res.ok) {
+                const err = await res.json();
+                throw new Error(err.detail || "Signal Rejected");
+            }
         }
 
         // Optimistic UI for some actions
@@ -510,6 +580,18 @@ function stopProgressTimer() {
     progressTimer = null;
 }
 
+// Click-to-seek: the bar jumps right away, the next delta re-anchors it to the bot's position
+const progressBar = document.querySelector('.neon-progress-container');
+if (progressBar) progressBar.onclick = (e) => {
+    if (!currentSongDuration) return;
+    const rect = progressBar.getBoundingClientRect();
+    const position = Math.max(0, Math.min(1, (e.clientX - rect.left) / rect.width)) * currentSongDuration;
+    lastSyncElapsed = position;
+    lastSyncTime = Date.now();
+    updateProgressUI();
+    sendControl('seek', { position });
+};
+
 // Navigation
 function showPage(pageId) {
     document.querySelectorAll('.page').forEach(p => p.classList.remove('active'));